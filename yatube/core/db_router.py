@@ -0,0 +1,117 @@
+"""
+Чтение с реплик, запись в основную базу.
+
+PrimaryReplicaRouter отправляет запись в default, а чтение — на одну из
+DATABASE_REPLICAS. Реплика может отставать, поэтому клиент, который
+только что что-то записал, читает основную базу: ReplicaPinMiddleware
+ставит ему cookie на DATABASE_PIN_SECONDS после любого запроса с
+записью или небезопасным методом. После записи чтения того же запроса
+тоже идут в основную базу. Вне запросов (команды, миграции, фоновые
+потоки) реплики не используются.
+
+Кеш (core.stampede) пересчитывает записи внутри primary(): значение,
+прочитанное с отстающей реплики, легло бы в кеш под новой версией и
+жило бы до следующей записи.
+"""
+import random
+import threading
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+
+PRIMARY = 'default'
+PIN_COOKIE = 'db_primary'
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS', 'TRACE')
+
+_local = threading.local()
+
+
+def replicas():
+    return list(getattr(settings, 'DATABASE_REPLICAS', ()))
+
+
+def pin():
+    """Чтения этого потока идут в основную базу."""
+    _local.pinned = True
+
+
+def unpin():
+    """Чтения этого потока идут на реплики до записи или pin()."""
+    _local.pinned = False
+    _local.wrote = False
+
+
+@contextmanager
+def primary():
+    """Чтения внутри блока идут в основную базу."""
+    pinned = is_pinned()
+    pin()
+    try:
+        yield
+    finally:
+        _local.pinned = pinned
+
+
+def is_pinned():
+    return getattr(_local, 'pinned', True)
+
+
+def wrote():
+    """Была ли запись в этом потоке с последнего unpin()."""
+    return getattr(_local, 'wrote', False)
+
+
+class PrimaryReplicaRouter:
+
+    def db_for_read(self, model, **hints):
+        aliases = replicas()
+        if not aliases or is_pinned():
+            return PRIMARY
+        return random.choice(aliases)
+
+    def db_for_write(self, model, **hints):
+        _local.wrote = True
+        pin()
+        return PRIMARY
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Реплики — копии основной базы.
+        return True
+
+    def allow_migrate(self, db, app_label, **hints):
+        # Схема приходит на реплики вместе с данными.
+        if db in replicas():
+            return False
+        return None
+
+
+class ReplicaPinMiddleware:
+    """
+    Закрепляет клиента за основной базой на DATABASE_PIN_SECONDS после
+    записи. Без реплик не подключается.
+    """
+
+    def __init__(self, get_response):
+        if not replicas():
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.seconds = getattr(settings, 'DATABASE_PIN_SECONDS', 15)
+
+    def __call__(self, request):
+        unpin()
+        if (
+            PIN_COOKIE in request.COOKIES
+            or request.method not in SAFE_METHODS
+        ):
+            pin()
+        try:
+            response = self.get_response(request)
+            if wrote() or request.method not in SAFE_METHODS:
+                response.set_cookie(
+                    PIN_COOKIE, '1', max_age=self.seconds, httponly=True,
+                    samesite='Lax',
+                )
+        finally:
+            pin()
+        return response
@@ -0,0 +1,302 @@
+"""
+Нагрузочное тестирование маршрутов yatube.
+
+Сессии гоняют сценарий по всем маршрутам posts, users и about либо
+прямо через WSGI-приложение в процессе, либо по HTTP к локальному
+серверу. По каждому маршруту собираются задержки, число SQL-запросов и
+размер ответа (клиент принимает gzip), так что JSON API сравнивается
+с соответствующими HTML-страницами.
+
+У каждого воркера свой пользователь (worker_username): иначе воркеры
+отменяли бы подписки друг друга, и отписка давала бы 404.
+
+Маршруты записи создают посты, комментарии и подписки в настроенной
+базе, и сценарий их не удаляет: гонять его нужно на копии базы или
+на отдельной (например, DATABASES с другим NAME), но не на боевой.
+"""
+import http.client
+import sys
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from http.cookies import SimpleCookie
+from io import BytesIO
+from urllib.parse import urlencode, urlsplit
+
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from .query_budget import count_queries
+
+
+class Response:
+
+    def __init__(self, status, headers, body, queries=None):
+        self.status = status
+        self.headers = headers
+        self.body = body
+        self.queries = queries
+
+    def cookies(self):
+        jar = SimpleCookie()
+        for name, value in self.headers:
+            if name.lower() == 'set-cookie':
+                jar.load(value)
+        return {key: morsel.value for key, morsel in jar.items()}
+
+
+class WSGITransport:
+    """Вызывает WSGI-приложение напрямую, без сети."""
+
+    def __init__(self, application):
+        self.application = application
+
+    def request(self, method, path, body=b'', headers=None):
+        path, _, query = path.partition('?')
+        environ = {
+            'REQUEST_METHOD': method,
+            'SCRIPT_NAME': '',
+            'PATH_INFO': path,
+            'QUERY_STRING': query,
+            'SERVER_NAME': 'localhost',
+            'SERVER_PORT': '80',
+            'SERVER_PROTOCOL': 'HTTP/1.1',
+            'HTTP_HOST': 'localhost',
+            'CONTENT_TYPE': 'application/x-www-form-urlencoded',
+            'CONTENT_LENGTH': str(len(body)),
+            'wsgi.version': (1, 0),
+            'wsgi.url_scheme': 'http',
+            'wsgi.input': BytesIO(body),
+            'wsgi.errors': sys.stderr,
+            'wsgi.multithread': True,
+            'wsgi.multiprocess': False,
+            'wsgi.run_once': False,
+        }
+        for name, value in (headers or {}).items():
+            environ['HTTP_' + name.upper().replace('-', '_')] = value
+        started = {}
+
+        def start_response(status, response_headers, exc_info=None):
+            started['status'] = int(status.split()[0])
+            started['headers'] = response_headers
+
+        with CaptureQueriesContext(connection) as queries:
+            result = self.application(environ, start_response)
+            try:
+                content = b''.join(result)
+            finally:
+                if hasattr(result, 'close'):
+                    result.close()
+        return Response(
+            started['status'], started['headers'], content,
+            count_queries(queries),
+        )
+
+
+class HTTPTransport:
+    """Ходит на запущенный сервер; одно keep-alive соединение на поток."""
+
+    def __init__(self, base_url):
+        parts = urlsplit(base_url)
+        self.host = parts.hostname
+        self.port = parts.port or 80
+        self.local = threading.local()
+
+    def _connection(self):
+        if getattr(self.local, 'connection', None) is None:
+            self.local.connection = http.client.HTTPConnection(
+                self.host, self.port, timeout=30
+            )
+        return self.local.connection
+
+    def request(self, method, path, body=b'', headers=None):
+        headers = dict(headers or {})
+        if method == 'POST':
+            headers['Content-Type'] = 'application/x-www-form-urlencoded'
+        try:
+            conn = self._connection()
+            conn.request(method, path, body or None, headers)
+            response = conn.getresponse()
+        except (http.client.HTTPException, OSError):
+            self.local.connection = None
+            raise
+        content = response.read()
+        queries = response.getheader('X-Query-Count')
+        return Response(
+            response.status,
+            response.getheaders(),
+            content,
+            int(queries) if queries is not None else None,
+        )
+
+
+class Session:
+    """Клиент с cookie и CSRF-токеном поверх транспорта."""
+
+    def __init__(self, transport):
+        self.transport = transport
+        self.cookies = {}
+
+    def request(self, method, path, data=None):
+        headers = {'Accept-Encoding': 'gzip'}
+        if self.cookies:
+            headers['Cookie'] = '; '.join(
+                f'{key}={value}' for key, value in self.cookies.items()
+            )
+        body = b''
+        if method == 'POST':
+            data = dict(data or {})
+            token = self.cookies.get('csrftoken', '')
+            data.setdefault('csrfmiddlewaretoken', token)
+            headers['X-CSRFToken'] = token
+            body = urlencode(data).encode()
+        response = self.transport.request(method, path, body, headers)
+        self.cookies.update(response.cookies())
+        return response
+
+    def login(self, username, password):
+        self.request('GET', '/auth/login/')
+        response = self.request('POST', '/auth/login/', {
+            'username': username, 'password': password,
+        })
+        if response.status != 302:
+            raise RuntimeError(f'Не удалось войти как {username}')
+
+
+def percentile(values, percent):
+    """Перцентиль по ближайшему рангу."""
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = max(0, int(round(percent / 100 * len(ordered))) - 1)
+    return ordered[min(rank, len(ordered) - 1)]
+
+
+def worker_username(username, number):
+    """Имя пользователя воркера number: у первого — само username."""
+    return username if number == 0 else f'{username}-{number}'
+
+
+def build_routes(fixtures):
+    """
+    Маршруты сценария: (имя, авторизация, метод, путь, данные).
+
+    fixtures — объекты в базе: slug группы, имя автора (на него же
+    подписываемся), id его поста и id поста пользователя сессии.
+    Выход идет последним: каждый проход сценария начинается со входа.
+    """
+    group = fixtures['group']
+    author = fixtures['author']
+    post = fixtures['post']
+    own_post = fixtures['own_post']
+    return [
+        ('posts:index', False, 'GET', '/', None),
+        ('posts:group_posts', False, 'GET', f'/group/{group}/', None),
+        ('posts:profile', False, 'GET', f'/profile/{author}/', None),
+        ('posts:post_detail', False, 'GET', f'/posts/{post}/', None),
+        ('posts:api_posts', False, 'GET', '/api/posts/', None),
+        ('posts:api_posts', False, 'GET', f'/api/posts/?group={group}',
+         None),
+        ('posts:api_posts', False, 'GET', f'/api/posts/?author={author}',
+         None),
+        ('posts:api_post', False, 'GET', f'/api/posts/{post}/', None),
+        ('posts:api_comments', False, 'GET',
+         f'/api/posts/{post}/comments/', None),
+        ('posts:api_groups', False, 'GET', '/api/groups/', None),
+        ('about:author', False, 'GET', '/about/author/', None),
+        ('about:tech', False, 'GET', '/about/tech/', None),
+        ('users:login', False, 'GET', '/auth/login/', None),
+        ('users:signup', False, 'GET', '/auth/signup/', None),
+        ('posts:index', True, 'GET', '/', None),
+        ('posts:follow_index', True, 'GET', '/follow/', None),
+        ('posts:api_follow', True, 'GET', '/api/follow/', None),
+        ('posts:post_create', True, 'GET', '/create/', None),
+        ('posts:post_create', True, 'POST', '/create/',
+         {'text': 'Нагрузочный пост'}),
+        ('posts:post_edit', True, 'GET', f'/posts/{own_post}/edit/', None),
+        ('posts:add_comment', True, 'POST', f'/posts/{post}/comment',
+         {'text': 'Нагрузочный комментарий'}),
+        ('posts:profile_follow', True, 'GET',
+         f'/profile/{author}/follow/', None),
+        ('posts:profile_unfollow', True, 'GET',
+         f'/profile/{author}/unfollow/', None),
+        ('users:password_change', True, 'GET',
+         '/auth/password_change/', None),
+        ('users:password_change_done', True, 'GET',
+         '/auth/password_change/done/', None),
+        ('users:logout', True, 'GET', '/auth/logout/', None),
+    ]
+
+
+def run(transport, scenarios, iterations):
+    """
+    Запускает по воркеру на сценарий: ((имя, пароль), маршруты), у
+    каждого свой пользователь. Воркер проходит маршруты iterations раз
+    анонимной и авторизованной сессиями. Возвращает сводку.
+    """
+    samples = defaultdict(list)
+    lock = threading.Lock()
+
+    def worker(scenario):
+        credentials, routes = scenario
+        anonymous = Session(transport)
+        user = Session(transport)
+        local = defaultdict(list)
+        for _ in range(iterations):
+            user.login(*credentials)
+            for name, authorized, method, path, data in routes:
+                session = user if authorized else anonymous
+                started = time.perf_counter()
+                try:
+                    response = session.request(method, path, data)
+                    status, queries = response.status, response.queries
+                    size = len(response.body)
+                except Exception:
+                    status, queries, size = None, None, None
+                elapsed = time.perf_counter() - started
+                local[f'{method} {name}'].append(
+                    (elapsed, status, queries, size)
+                )
+        with lock:
+            for key, values in local.items():
+                samples[key].extend(values)
+
+    wall_started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=len(scenarios)) as executor:
+        list(executor.map(worker, scenarios))
+    wall = time.perf_counter() - wall_started
+    return summarize(samples, wall, len(scenarios), iterations)
+
+
+def summarize(samples, wall, concurrency, iterations):
+    routes = {}
+    for key, values in sorted(samples.items()):
+        latencies = [elapsed * 1000 for elapsed, _, _, _ in values]
+        queries = [count for _, _, count, _ in values if count is not None]
+        sizes = [size for _, _, _, size in values if size is not None]
+        errors = sum(
+            1 for _, status, _, _ in values
+            if status is None or status >= 400
+        )
+        routes[key] = {
+            'requests': len(values),
+            'errors': errors,
+            'p50_ms': percentile(latencies, 50),
+            'p95_ms': percentile(latencies, 95),
+            'p99_ms': percentile(latencies, 99),
+            'rps': len(values) / wall if wall else None,
+            'queries_per_request': (
+                sum(queries) / len(queries) if queries else None
+            ),
+            'bytes_per_response': sum(sizes) / len(sizes) if sizes else None,
+        }
+    total = sum(route['requests'] for route in routes.values())
+    return {
+        'concurrency': concurrency,
+        'iterations': iterations,
+        'wall_seconds': wall,
+        'requests': total,
+        'rps': total / wall if wall else None,
+        'routes': routes,
+    }
@@ -0,0 +1,134 @@
+import json
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from core.loadtest import (HTTPTransport, WSGITransport, build_routes,
+                           run, worker_username)
+from posts.models import Group, Post
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = (
+        'Нагрузочный тест всех маршрутов: p50/p95/p99, запросы в секунду, '
+        'SQL-запросы и размер ответа по каждому маршруту. Сценарий пишет '
+        'посты, комментарии и подписки и не удаляет их: запускайте на '
+        'копии базы.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--url',
+            help='Адрес запущенного сервера, например http://127.0.0.1:8000.'
+                 ' Без него WSGI-приложение вызывается в процессе.',
+        )
+        parser.add_argument('--concurrency', type=int, default=4)
+        parser.add_argument(
+            '--iterations', type=int, default=10,
+            help='Сколько раз каждый воркер проходит сценарий.',
+        )
+        parser.add_argument('--username', default='loadtest')
+        parser.add_argument('--password', default='loadtest-password')
+        parser.add_argument(
+            '--setup', action='store_true',
+            help='Создать пользователей (по одному на воркер), группу и '
+                 'посты для сценария (остаются в базе).',
+        )
+        parser.add_argument(
+            '--output', help='Куда записать результаты в JSON.',
+        )
+
+    def setup_fixtures(self, username, password, workers=1):
+        users = []
+        for number in range(workers):
+            user, created = User.objects.get_or_create(
+                username=worker_username(username, number)
+            )
+            if created:
+                user.set_password(password)
+                user.save()
+            users.append(user)
+        author, _ = User.objects.get_or_create(username=f'{username}-author')
+        group, _ = Group.objects.get_or_create(
+            slug=f'{username}-group',
+            defaults={'title': 'Нагрузочная группа', 'description': '-'},
+        )
+        # Пост автора создается первым: он общий для всех воркеров.
+        for owner in (author, *users):
+            if not owner.posts.exists():
+                Post.objects.create(
+                    author=owner, group=group, text='Нагрузочный пост'
+                )
+
+    def fixtures(self, username, author):
+        user = User.objects.filter(username=username).first()
+        group = Group.objects.first()
+        post = Post.objects.filter(author__username=author).first()
+        own_post = Post.objects.filter(author=user).first()
+        if None in (user, group, post, own_post):
+            raise CommandError(
+                'Нет данных для сценария, запустите команду с --setup.'
+            )
+        return {
+            'group': group.slug,
+            'author': post.author.username,
+            'post': post.pk,
+            'own_post': own_post.pk,
+        }
+
+    def scenarios(self, username, password, workers, only=None):
+        """
+        Сценарии воркеров: у каждого свой пользователь, поэтому подписки
+        и отписки воркеров не мешают друг другу. only — оставить только
+        маршруты с этими именами.
+        """
+        scenarios = []
+        for number in range(workers):
+            name = worker_username(username, number)
+            routes = build_routes(self.fixtures(name, f'{username}-author'))
+            if only is not None:
+                routes = [route for route in routes if route[0] in only]
+            scenarios.append(((name, password), routes))
+        return scenarios
+
+    def handle(self, *args, **options):
+        username, password = options['username'], options['password']
+        if options['setup']:
+            self.setup_fixtures(username, password, options['concurrency'])
+        scenarios = self.scenarios(username, password, options['concurrency'])
+        if options['url']:
+            transport = HTTPTransport(options['url'])
+        else:
+            from yatube.wsgi import application
+            transport = WSGITransport(application)
+        result = run(transport, scenarios, options['iterations'])
+        self.report(result)
+        if options['output']:
+            with open(options['output'], 'w') as output:
+                json.dump(result, output, ensure_ascii=False, indent=2)
+
+    def report(self, result):
+        def fmt(value, spec='.1f'):
+            return '-' if value is None else format(value, spec)
+
+        def kilobytes(value):
+            return None if value is None else value / 1024
+
+        self.stdout.write(
+            f'{"маршрут":<32} {"n":>6} {"ошибок":>6} {"p50":>8} '
+            f'{"p95":>8} {"p99":>8} {"rps":>8} {"sql":>6} {"КБ":>7}'
+        )
+        for name, route in result['routes'].items():
+            self.stdout.write(
+                f'{name:<32} {route["requests"]:>6} {route["errors"]:>6} '
+                f'{fmt(route["p50_ms"]):>8} {fmt(route["p95_ms"]):>8} '
+                f'{fmt(route["p99_ms"]):>8} {fmt(route["rps"]):>8} '
+                f'{fmt(route["queries_per_request"]):>6} '
+                f'{fmt(kilobytes(route["bytes_per_response"])):>7}'
+            )
+        self.stdout.write(
+            f'Всего: {result["requests"]} запросов за '
+            f'{result["wall_seconds"]:.1f} с, {result["rps"]:.1f} в секунду.'
+        )
@@ -0,0 +1,86 @@
+import json
+
+from django.core.management.base import CommandError
+from django.db import connections
+from django.test.utils import override_settings
+
+from core.loadtest import WSGITransport, run
+from yatube import settings_production as production
+
+from .loadtest import Command as LoadtestCommand
+
+# Профиль: (PRAGMA, транзакции записи с повторами, повторы,
+# CONN_MAX_AGE). stock — Django без обертки: view записи в автокоммите.
+PROFILES = {
+    'stock': (
+        {'journal_mode': 'DELETE', 'synchronous': 'FULL'}, False, 0, 0,
+    ),
+    'production': (
+        production.SQLITE_PRAGMAS,
+        True,
+        production.SQLITE_WRITE_RETRIES,
+        production.DATABASES['default']['CONN_MAX_AGE'],
+    ),
+}
+# Маршруты сценария: запись и чтение тех же страниц. У воркеров свои
+# пользователи, поэтому подписка и отписка пишут на каждом проходе.
+ROUTES = (
+    'posts:index', 'posts:post_detail', 'posts:post_create',
+    'posts:add_comment', 'posts:profile_follow', 'posts:profile_unfollow',
+)
+
+
+class Command(LoadtestCommand):
+    help = (
+        'Сравнивает конкурентную запись в SQLite без настройки и с '
+        'профилем settings_production: запросы в секунду и ошибки.'
+    )
+
+    def add_arguments(self, parser):
+        super().add_arguments(parser)
+        parser.set_defaults(concurrency=8)
+
+    def apply_profile(self, name):
+        pragmas, transactions, retries, conn_max_age = PROFILES[name]
+        connections.close_all()
+        connections.databases['default']['CONN_MAX_AGE'] = conn_max_age
+        return override_settings(
+            SQLITE_PRAGMAS=pragmas,
+            SQLITE_WRITE_TRANSACTIONS=transactions,
+            SQLITE_WRITE_RETRIES=retries,
+        )
+
+    def handle(self, *args, **options):
+        if options['url']:
+            raise CommandError('Профили переключаются только в процессе.')
+        database = connections['default']
+        if database.vendor != 'sqlite' or database.is_in_memory_db():
+            raise CommandError('Нужна база SQLite в файле.')
+        username, password = options['username'], options['password']
+        if options['setup']:
+            self.setup_fixtures(username, password, options['concurrency'])
+        scenarios = self.scenarios(
+            username, password, options['concurrency'], ROUTES
+        )
+        from yatube.wsgi import application
+        transport = WSGITransport(application)
+        results = {}
+        # WAL сохраняется в файле базы, поэтому stock идет первым.
+        for name in ('stock', 'production'):
+            with self.apply_profile(name):
+                results[name] = run(
+                    transport, scenarios, options['iterations']
+                )
+            self.stdout.write(f'\nПрофиль {name}:')
+            self.report(results[name])
+        for name, result in results.items():
+            errors = sum(
+                route['errors'] for route in result['routes'].values()
+            )
+            self.stdout.write(
+                f'{name}: {result["rps"]:.1f} запросов в секунду, '
+                f'ошибок {errors} из {result["requests"]}'
+            )
+        if options['output']:
+            with open(options['output'], 'w') as output:
+                json.dump(results, output, ensure_ascii=False, indent=2)
@@ -0,0 +1,49 @@
+import sqlite3
+import time
+from contextlib import closing
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+
+from core.db_router import PRIMARY, replicas
+
+
+def copy_sqlite(source, target):
+    """Копирует базу SQLite через backup API, не останавливая запись."""
+    with closing(sqlite3.connect(source)) as src, \
+            closing(sqlite3.connect(target)) as dst:
+        src.backup(dst)
+
+
+class Command(BaseCommand):
+    help = (
+        'Замена репликации для локального запуска: копирует основную базу '
+        'SQLite в файлы реплик из DATABASE_REPLICAS.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--interval', type=float,
+            help='Повторять копирование каждые N секунд (отставание '
+                 'реплик). Без него копирует один раз.',
+        )
+
+    def handle(self, *args, **options):
+        primary = connections[PRIMARY].settings_dict
+        aliases = replicas()
+        if not aliases:
+            raise CommandError('DATABASE_REPLICAS пуст.')
+        for alias in [PRIMARY] + aliases:
+            if connections[alias].vendor != 'sqlite':
+                raise CommandError(
+                    f'{alias}: команда работает только с SQLite.'
+                )
+        while True:
+            for alias in aliases:
+                copy_sqlite(
+                    primary['NAME'], connections[alias].settings_dict['NAME']
+                )
+            self.stdout.write(f'Реплики обновлены: {", ".join(aliases)}')
+            if not options['interval']:
+                return
+            time.sleep(options['interval'])
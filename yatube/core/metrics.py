@@ -0,0 +1,238 @@
+"""
+Метрики запросов: время SQL, шаблонов, миниатюр и ответа целиком.
+
+MetricsMiddleware замеряет выборку запросов (доля METRICS_SAMPLE_RATE)
+и добавляет к ответу заголовок Server-Timing. Гистограммы по имени view
+копятся в памяти процесса и отдаются на /metrics в текстовом формате
+Prometheus. При доле 0 middleware отключается целиком.
+
+Время SQL и шаблонов пересекается: ленивый queryset, вычисленный
+в шаблоне, учитывается в обоих.
+"""
+import random
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connection
+from django.template.base import Template
+
+SECONDS_BUCKETS = (
+    0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10,
+)
+QUERIES_BUCKETS = (1, 2, 3, 5, 8, 13, 21, 50, 100)
+
+# Имя метрики: (описание, границы корзин).
+METRICS = {
+    'yatube_request_duration_seconds': (
+        'Полное время обработки запроса.', SECONDS_BUCKETS,
+    ),
+    'yatube_db_duration_seconds': (
+        'Время SQL-запросов за запрос.', SECONDS_BUCKETS,
+    ),
+    'yatube_db_queries': (
+        'Число SQL-запросов за запрос.', QUERIES_BUCKETS,
+    ),
+    'yatube_template_duration_seconds': (
+        'Время рендеринга шаблонов за запрос.', SECONDS_BUCKETS,
+    ),
+    'yatube_thumbnail_duration_seconds': (
+        'Время построения миниатюр в потоке запроса.', SECONDS_BUCKETS,
+    ),
+}
+# Счетчики: имя метрики — (описание, имя метки).
+COUNTERS = {
+    'yatube_cache_events_total': (
+        'Чтения кеша с защитой от лавины пересчетов по исходу.', 'event',
+    ),
+}
+# Отрезок Server-Timing: (ключ замера, имя метрики).
+TIMINGS = (
+    ('db', 'yatube_db_duration_seconds'),
+    ('template', 'yatube_template_duration_seconds'),
+    ('thumbnail', 'yatube_thumbnail_duration_seconds'),
+)
+
+_local = threading.local()
+
+
+class Histogram:
+    """Кумулятивная гистограмма Prometheus без внешних зависимостей."""
+
+    def __init__(self, buckets):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.sum = 0.0
+
+    def observe(self, value):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+
+    @property
+    def count(self):
+        return sum(self.counts)
+
+    def cumulative(self):
+        total = 0
+        for bound, count in zip(self.buckets + ('+Inf',), self.counts):
+            total += count
+            yield bound, total
+
+
+class Registry:
+    """
+    Гистограммы по (метрика, view) и счетчики по (метрика, метка);
+    общие для всех потоков процесса.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.histograms = {}
+        self.counters = {}
+
+    def inc(self, name, label):
+        with self.lock:
+            key = (name, label)
+            self.counters[key] = self.counters.get(key, 0) + 1
+
+    def observe(self, view, values):
+        with self.lock:
+            for name, value in values.items():
+                key = (name, view)
+                histogram = self.histograms.get(key)
+                if histogram is None:
+                    histogram = Histogram(METRICS[name][1])
+                    self.histograms[key] = histogram
+                histogram.observe(value)
+
+    def clear(self):
+        with self.lock:
+            self.histograms.clear()
+            self.counters.clear()
+
+    def render(self):
+        """Текстовый формат экспозиции Prometheus 0.0.4."""
+        lines = []
+        with self.lock:
+            for name, (description, _) in METRICS.items():
+                series = sorted(
+                    (view, histogram)
+                    for (metric, view), histogram in self.histograms.items()
+                    if metric == name
+                )
+                if not series:
+                    continue
+                lines.append(f'# HELP {name} {description}')
+                lines.append(f'# TYPE {name} histogram')
+                for view, histogram in series:
+                    label = view.replace('\\', r'\\').replace('"', r'\"')
+                    for bound, total in histogram.cumulative():
+                        lines.append(
+                            f'{name}_bucket{{view="{label}",le="{bound}"}} '
+                            f'{total}'
+                        )
+                    lines.append(
+                        f'{name}_sum{{view="{label}"}} {histogram.sum}'
+                    )
+                    lines.append(
+                        f'{name}_count{{view="{label}"}} {histogram.count}'
+                    )
+            for name, (description, label_name) in COUNTERS.items():
+                series = sorted(
+                    (label, count)
+                    for (metric, label), count in self.counters.items()
+                    if metric == name
+                )
+                if not series:
+                    continue
+                lines.append(f'# HELP {name} {description}')
+                lines.append(f'# TYPE {name} counter')
+                for label, count in series:
+                    lines.append(f'{name}{{{label_name}="{label}"}} {count}')
+        return '\n'.join(lines) + '\n'
+
+
+registry = Registry()
+
+
+def _sample():
+    return getattr(_local, 'sample', None)
+
+
+@contextmanager
+def timed(kind):
+    """
+    Прибавляет время блока к замеру kind текущего запроса. Вне выборки
+    ничего не делает; вложенные блоки одного вида не считаются дважды.
+    """
+    sample = _sample()
+    if sample is None or sample['depth'].get(kind):
+        yield
+        return
+    sample['depth'][kind] = 1
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        sample[kind] = sample.get(kind, 0) + time.perf_counter() - started
+        sample['depth'][kind] = 0
+
+
+def _db_wrapper(execute, sql, params, many, context):
+    sample = _sample()
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        sample['db'] = sample.get('db', 0) + time.perf_counter() - started
+        sample['queries'] += 1
+
+
+_template_render = Template.render
+
+
+def _timed_render(self, context):
+    with timed('template'):
+        return _template_render(self, context)
+
+
+class MetricsMiddleware:
+    """Замеряет выборку запросов; ставить первой в MIDDLEWARE."""
+
+    def __init__(self, get_response):
+        self.rate = getattr(settings, 'METRICS_SAMPLE_RATE', 0)
+        if not self.rate:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        Template.render = _timed_render
+
+    def __call__(self, request):
+        if self.rate < 1 and random.random() >= self.rate:
+            return self.get_response(request)
+        sample = _local.sample = {'depth': {}, 'queries': 0}
+        started = time.perf_counter()
+        try:
+            with connection.execute_wrapper(_db_wrapper):
+                response = self.get_response(request)
+        finally:
+            _local.sample = None
+        total = time.perf_counter() - started
+        match = request.resolver_match
+        view = match.view_name if match is not None else 'unresolved'
+        values = {
+            'yatube_request_duration_seconds': total,
+            'yatube_db_queries': sample['queries'],
+        }
+        timing = []
+        for kind, name in TIMINGS:
+            duration = sample.get(kind, 0)
+            values[name] = duration
+            timing.append(f'{kind};dur={duration * 1000:.1f}')
+        timing[0] += f';desc="{sample["queries"]} queries"'
+        timing.append(f'total;dur={total * 1000:.1f}')
+        registry.observe(view, values)
+        response['Server-Timing'] = ', '.join(timing)
+        return response
@@ -1,4 +1,4 @@
-from django.db import models
+from django.db import models, transaction
 
 
 class CreatedModel(models.Model):
@@ -10,3 +10,46 @@ class CreatedModel(models.Model):
 
     class Meta:
         abstract = True
+
+
+class AtomicSaveMixin:
+    """
+    Сохраняет объект в транзакции вместе с обработчиками post_save,
+    чтобы связанные счетчики не расходились с данными.
+    """
+
+    def save(self, *args, **kwargs):
+        with transaction.atomic(using=kwargs.get('using')):
+            super().save(*args, **kwargs)
+
+
+class StoredFieldsMixin:
+    """
+    Помнит значения полей stored_fields из базы, чтобы обработчики
+    post_save видели их смену (например, автора поста в админке).
+    """
+    stored_fields = ()
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance.stored = {
+            name: instance.__dict__[name]
+            for name in cls.stored_fields if name in instance.__dict__
+        }
+        return instance
+
+    def stored_change(self, name, created=False):
+        """
+        (было, стало), если сохранение сменило поле name, иначе None;
+        запоминает новое значение. Поле, не загруженное из базы, не
+        проверяется.
+        """
+        stored = self.__dict__.setdefault('stored', {})
+        if not created and name not in stored:
+            return None
+        old = stored.get(name)
+        new = stored[name] = getattr(self, name)
+        if created or old == new:
+            return None
+        return old, new
@@ -0,0 +1,87 @@
+import logging
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+logger = logging.getLogger(__name__)
+
+
+class QueryBudgetExceeded(AssertionError):
+    """View выполнила больше SQL-запросов, чем ей разрешено."""
+
+
+def get_budget(view_name):
+    """Объявленный в settings.QUERY_BUDGETS максимум для view или None."""
+    return getattr(settings, 'QUERY_BUDGETS', {}).get(view_name)
+
+
+# Управление транзакциями зависит от окружения (BEGIN в autocommit,
+# SAVEPOINT внутри TestCase) и в бюджет не входит.
+TRANSACTION_STATEMENTS = (
+    'BEGIN', 'COMMIT', 'SAVEPOINT', 'RELEASE', 'ROLLBACK',
+)
+
+
+def count_queries(captured):
+    """Число SQL-запросов без операторов управления транзакциями."""
+    return sum(
+        1 for query in captured.captured_queries
+        if not query['sql'].lstrip().upper().startswith(
+            TRANSACTION_STATEMENTS
+        )
+    )
+
+
+def _report(budget, captured, label):
+    queries = '\n'.join(
+        f'{number}. {query["sql"]}'
+        for number, query in enumerate(captured.captured_queries, start=1)
+    )
+    return (
+        f'{label}: {count_queries(captured)} запросов при бюджете '
+        f'{budget}\n{queries}'
+    )
+
+
+@contextmanager
+def assert_max_queries(budget, label='Бюджет запросов'):
+    """
+    Контекстный менеджер для тестов: падает, если внутри блока
+    выполнено больше budget запросов.
+    """
+    with CaptureQueriesContext(connection) as captured:
+        yield captured
+    if count_queries(captured) > budget:
+        raise QueryBudgetExceeded(_report(budget, captured, label))
+
+
+class QueryBudgetMiddleware:
+    """
+    Отладочная middleware: считает запросы каждого ответа и сообщает
+    о превышении бюджета view. Работает только при DEBUG=True.
+    """
+
+    def __init__(self, get_response):
+        if not settings.DEBUG:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.strict = getattr(settings, 'QUERY_BUDGET_STRICT', False)
+
+    def __call__(self, request):
+        with CaptureQueriesContext(connection) as captured:
+            response = self.get_response(request)
+        match = request.resolver_match
+        if match is None:
+            return response
+        count = count_queries(captured)
+        response['X-Query-Count'] = count
+        budget = get_budget(match.view_name)
+        if budget is not None and count > budget:
+            message = _report(budget, captured, match.view_name)
+            if self.strict:
+                raise QueryBudgetExceeded(message)
+            logger.warning(message)
+        return response
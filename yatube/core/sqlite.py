@@ -0,0 +1,101 @@
+"""
+Настройка SQLite под конкурентную запись.
+
+apply_pragmas выполняет SQLITE_PRAGMAS на каждом новом соединении
+(WAL, synchronous, размеры кеша и mmap). retry_on_lock выполняет view
+в транзакции immediate_atomic и повторяет ее, если база так и не
+освободилась. Обычный BEGIN в SQLite отложенный: транзакция, которая
+начала с чтения, при первой записи не ждет busy_timeout, а сразу
+получает «database is locked». BEGIN IMMEDIATE берет блокировку записи
+в начале транзакции и ждет ее в пределах busy_timeout.
+"""
+import logging
+import random
+import time
+from contextlib import contextmanager
+from functools import partial, wraps
+
+from django.conf import settings
+from django.db import OperationalError, transaction
+
+logger = logging.getLogger(__name__)
+
+LOCK_MESSAGES = ('database is locked', 'database table is locked')
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS', 'TRACE')
+
+
+def apply_pragmas(sender, connection, **kwargs):
+    """Обработчик connection_created."""
+    pragmas = getattr(settings, 'SQLITE_PRAGMAS', None)
+    if connection.vendor != 'sqlite' or not pragmas:
+        return
+    with connection.cursor() as cursor:
+        for name, value in pragmas.items():
+            cursor.execute(f'PRAGMA {name} = {value}')
+
+
+def is_lock_error(error):
+    return any(message in str(error) for message in LOCK_MESSAGES)
+
+
+@contextmanager
+def immediate_atomic(using=None):
+    """
+    transaction.atomic, который в SQLite начинает внешнюю транзакцию
+    с BEGIN IMMEDIATE. Вложенный блок и другие базы — обычный atomic.
+    """
+    connection = transaction.get_connection(using)
+    if connection.vendor != 'sqlite' or connection.in_atomic_block:
+        with transaction.atomic(using=using):
+            yield
+        return
+
+    def begin_immediate():
+        connection.cursor().execute('BEGIN IMMEDIATE')
+
+    # atomic открывает транзакцию SQLite через этот метод соединения.
+    connection._start_transaction_under_autocommit = begin_immediate
+    try:
+        with transaction.atomic(using=using):
+            del connection._start_transaction_under_autocommit
+            yield
+    finally:
+        connection.__dict__.pop('_start_transaction_under_autocommit', None)
+
+
+def retry_on_lock(view=None, *, safe_methods=False):
+    """
+    Выполняет view в immediate_atomic и при блокировке базы повторяет её
+    до SQLITE_WRITE_RETRIES раз с экспоненциальной паузой и разбросом.
+    GET и другие безопасные методы только читают и идут без обертки,
+    чтобы не ждать блокировку записи; safe_methods=True — для view,
+    которые пишут и на GET.
+    Внутри чужой транзакции повтор невозможен: view вызывается как есть.
+    SQLITE_WRITE_TRANSACTIONS = False отключает обертку целиком.
+    """
+    if view is None:
+        return partial(retry_on_lock, safe_methods=safe_methods)
+
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        if (
+            not getattr(settings, 'SQLITE_WRITE_TRANSACTIONS', True)
+            or (request.method in SAFE_METHODS and not safe_methods)
+            or transaction.get_connection().in_atomic_block
+        ):
+            return view(request, *args, **kwargs)
+        retries = getattr(settings, 'SQLITE_WRITE_RETRIES', 3)
+        delay = getattr(settings, 'SQLITE_RETRY_DELAY', 0.05)
+        for attempt in range(retries + 1):
+            try:
+                with immediate_atomic():
+                    return view(request, *args, **kwargs)
+            except OperationalError as error:
+                if attempt == retries or not is_lock_error(error):
+                    raise
+                logger.info(
+                    'База занята, повтор %s для %s', attempt + 1,
+                    request.path,
+                )
+            time.sleep(delay * 2 ** attempt * random.uniform(0.5, 1.5))
+    return wrapper
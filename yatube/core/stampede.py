@@ -0,0 +1,117 @@
+"""
+Кеш с защитой от лавины пересчетов (cache stampede).
+
+fetch хранит значение в конверте (значение, версия, срок, время
+расчета) и:
+
+* заранее пересчитывает его с вероятностью, которая растет к концу
+  срока и со временем расчета (XFetch): горячий ключ обновляет один
+  запрос еще до истечения;
+* пускает в пересчет одного: остальные, увидев блокировку, отдают
+  устаревшее значение (stale-while-revalidate), а если его нет — ждут
+  свежее до CACHE_LOCK_WAIT секунд;
+* считает устаревшим и значение прежней версии (например, поколения
+  кеша лент): после записи в посты ленту перестраивает один запрос,
+  а не все сразу.
+
+Пересчет читает основную базу (db_router.primary): версия берется из
+поколения, которое записи уже увеличили, и значение с отстающей реплики
+осталось бы в кеше под ней. Запись живет в кеше timeout + CACHE_STALE_TTL
+секунд. Исходы чтений —
+hit, miss (пересчет), early (ранний пересчет), stale (отдано
+устаревшее) и lock_wait (ожидание чужого пересчета) — считаются в
+yatube_cache_events_total на /metrics.
+"""
+import math
+import random
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+
+from .db_router import primary
+from .metrics import registry
+
+COUNTER = 'yatube_cache_events_total'
+# Пауза между проверками ключа в ожидании чужого пересчета.
+POLL_INTERVAL = 0.05
+
+
+def _setting(name, default):
+    return getattr(settings, name, default)
+
+
+def _count(event):
+    registry.inc(COUNTER, event)
+
+
+def _early(expires, delta, now):
+    """XFetch: пора ли пересчитать еще свежее значение."""
+    beta = _setting('CACHE_EARLY_BETA', 1.0)
+    return now - delta * beta * math.log(1 - random.random()) >= expires
+
+
+def _compute(key, compute, timeout, version):
+    started = time.monotonic()
+    with primary():
+        value = compute()
+    delta = time.monotonic() - started
+    cache.set(
+        key, (value, version, time.time() + timeout, delta),
+        timeout + _setting('CACHE_STALE_TTL', 60 * 60),
+    )
+    return value
+
+
+def _wait(key, version):
+    deadline = time.monotonic() + _setting('CACHE_LOCK_WAIT', 2)
+    while time.monotonic() < deadline:
+        time.sleep(POLL_INTERVAL)
+        entry = cache.get(key)
+        if entry is not None and entry[1] == version:
+            return entry
+    return None
+
+
+def fetch(key, compute, timeout, version=None):
+    """
+    Значение key из кеша или compute(). Значение другой версии или с
+    истекшим сроком отдается, только пока его пересчитывает другой
+    запрос.
+    """
+    return fetch_state(key, compute, timeout, version)[0]
+
+
+def fetch_state(key, compute, timeout, version=None):
+    """
+    Как fetch, но возвращает (значение, stale): stale — отдано
+    устаревшее значение, и валидаторы ответа по текущей версии к нему
+    не подходят.
+    """
+    entry = cache.get(key)
+    fresh = False
+    if entry is not None:
+        value, entry_version, expires, delta = entry
+        now = time.time()
+        fresh = entry_version == version and now < expires
+        if fresh and not _early(expires, delta, now):
+            _count('hit')
+            return value, False
+    lock = f'{key}:lock'
+    if cache.add(lock, 1, _setting('CACHE_LOCK_TIMEOUT', 30)):
+        try:
+            _count('early' if fresh else 'miss')
+            return _compute(key, compute, timeout, version), False
+        finally:
+            cache.delete(lock)
+    if entry is not None:
+        # Пересчитывает другой запрос: пока отдаем то, что есть.
+        _count('hit' if fresh else 'stale')
+        return value, not fresh
+    _count('lock_wait')
+    entry = _wait(key, version)
+    if entry is not None:
+        return entry[0], False
+    # Не дождались: считаем сами, не трогая чужую блокировку.
+    _count('miss')
+    return _compute(key, compute, timeout, version), False
@@ -0,0 +1,164 @@
+"""
+Статика с хешем в именах и заранее сжатыми копиями.
+
+CompressedManifestStaticFilesStorage при collectstatic добавляет к именам
+файлов хеш содержимого (манифест staticfiles.json, ссылки в CSS
+переписываются) и кладет рядом с текстовыми файлами копии .gz и .br
+(пакет brotli из requirements.txt; без него — только .gz).
+
+StaticFilesMiddleware отдает STATIC_ROOT, не доходя до URL-маршрутов:
+по Accept-Encoding выбирает br, gzip или исходный файл, а файлам с хешем
+в имени ставит Cache-Control immutable на год — при повторном визите
+статика не скачивается вовсе. Файлы без хеша кешируются ненадолго и
+проверяются по ETag.
+"""
+import gzip
+import json
+import mimetypes
+import os
+import posixpath
+
+from django.conf import settings
+from django.contrib.staticfiles.storage import ManifestStaticFilesStorage
+from django.core.exceptions import MiddlewareNotUsed
+from django.core.files.base import ContentFile
+from django.http import FileResponse, HttpResponseNotModified
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+COMPRESSIBLE = (
+    '.css', '.js', '.svg', '.json', '.map', '.txt', '.xml', '.html', '.ico',
+)
+# Сжатая копия хранится, только если она заметно меньше исходной.
+MIN_RATIO = 0.95
+IMMUTABLE = 'public, max-age=31536000, immutable'
+REVALIDATE = 'public, max-age=60'
+
+
+def _gzip(data):
+    return gzip.compress(data, compresslevel=9, mtime=0)
+
+
+def _brotli(data):
+    return brotli.compress(data, quality=11)
+
+
+# (Content-Encoding, суффикс файла, кодер) в порядке предпочтения.
+ENCODINGS = [('gzip', '.gz', _gzip)]
+if brotli is not None:
+    ENCODINGS.insert(0, ('br', '.br', _brotli))
+
+
+class CompressedManifestStaticFilesStorage(ManifestStaticFilesStorage):
+
+    def post_process(self, paths, dry_run=False, **options):
+        processed_files = super().post_process(paths, dry_run, **options)
+        for name, hashed_name, processed in processed_files:
+            if not dry_run and not isinstance(processed, Exception):
+                self.compress(name)
+                self.compress(hashed_name)
+            yield name, hashed_name, processed
+
+    def compress(self, name):
+        if not name or not name.endswith(COMPRESSIBLE):
+            return
+        with self.open(name) as source:
+            data = source.read()
+        for _, suffix, encoder in ENCODINGS:
+            compressed = encoder(data)
+            if self.exists(name + suffix):
+                self.delete(name + suffix)
+            if len(compressed) < len(data) * MIN_RATIO:
+                self.save(name + suffix, ContentFile(compressed))
+
+
+def accepted_encodings(header):
+    """Кодировки из Accept-Encoding, которые клиент не запретил (q=0)."""
+    encodings = set()
+    for part in header.split(','):
+        encoding, _, params = part.strip().partition(';')
+        quality = params.strip().partition('q=')[2]
+        try:
+            if quality and float(quality) == 0:
+                continue
+        except ValueError:
+            continue
+        encodings.add(encoding.strip().lower())
+    return encodings
+
+
+class StaticFilesMiddleware:
+    """
+    Отдает собранную статику; ставить сразу после SecurityMiddleware.
+    Не подключается при DEBUG (статику отдает runserver из исходников)
+    и без собранного STATIC_ROOT.
+    """
+
+    def __init__(self, get_response):
+        root = settings.STATIC_ROOT
+        if settings.DEBUG or not root or not os.path.isdir(root):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.root = root
+        self.prefix = settings.STATIC_URL
+        # Манифест читается при запуске: после collectstatic процессы
+        # перезапускают, как и после выкладки кода.
+        self.hashed = self.hashed_names()
+
+    def hashed_names(self):
+        try:
+            with open(os.path.join(self.root, 'staticfiles.json')) as file:
+                return set(json.load(file)['paths'].values())
+        except (OSError, ValueError, KeyError):
+            return set()
+
+    def __call__(self, request):
+        if (
+            request.method in ('GET', 'HEAD')
+            and request.path.startswith(self.prefix)
+        ):
+            response = self.serve(request, request.path[len(self.prefix):])
+            if response is not None:
+                return response
+        return self.get_response(request)
+
+    def serve(self, request, name):
+        name = posixpath.normpath(name).lstrip('/')
+        if name.startswith('..') or name == '.':
+            return None
+        path = os.path.join(self.root, *name.split('/'))
+        if not os.path.isfile(path):
+            return None
+        accepted = accepted_encodings(
+            request.META.get('HTTP_ACCEPT_ENCODING', '')
+        )
+        encoding = None
+        for candidate, suffix, _ in ENCODINGS:
+            if candidate in accepted and os.path.isfile(path + suffix):
+                encoding, served = candidate, path + suffix
+                break
+        else:
+            served = path
+        stat = os.stat(served)
+        etag = f'"{stat.st_mtime_ns:x}-{stat.st_size:x}"'
+        headers = {
+            'ETag': etag,
+            'Cache-Control': IMMUTABLE if name in self.hashed else REVALIDATE,
+            'Vary': 'Accept-Encoding',
+        }
+        if etag in request.META.get('HTTP_IF_NONE_MATCH', ''):
+            response = HttpResponseNotModified()
+        else:
+            content_type = mimetypes.guess_type(path)[0]
+            response = FileResponse(
+                open(served, 'rb'),
+                content_type=content_type or 'application/octet-stream',
+            )
+            if encoding:
+                response['Content-Encoding'] = encoding
+        for header, value in headers.items():
+            response[header] = value
+        return response
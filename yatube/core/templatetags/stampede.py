@@ -0,0 +1,48 @@
+from django import template
+from django.core.cache.utils import make_template_fragment_key
+
+from core.stampede import fetch
+
+register = template.Library()
+
+
+class StampedeCacheNode(template.Node):
+
+    def __init__(self, nodelist, timeout, fragment_name, key, version):
+        self.nodelist = nodelist
+        self.timeout = timeout
+        self.fragment_name = fragment_name
+        self.key = key
+        self.version = version
+
+    def render(self, context):
+        key = make_template_fragment_key(
+            self.fragment_name, [self.key.resolve(context)]
+        )
+        return fetch(
+            key, lambda: self.nodelist.render(context),
+            int(self.timeout.resolve(context)),
+            self.version.resolve(context),
+        )
+
+
+@register.tag
+def stampede_cache(parser, token):
+    """
+    Как {% cache %}, но через core.stampede: фрагмент прежней версии
+    отдается, пока его пересчитывает другой запрос.
+
+        {% stampede_cache timeout name key version %} ...
+        {% endstampede_cache %}
+    """
+    bits = token.split_contents()
+    if len(bits) != 5:
+        raise template.TemplateSyntaxError(
+            f'{bits[0]} принимает timeout, имя фрагмента, ключ и версию.'
+        )
+    nodelist = parser.parse(('endstampede_cache',))
+    parser.delete_first_token()
+    return StampedeCacheNode(
+        nodelist, parser.compile_filter(bits[1]), bits[2],
+        parser.compile_filter(bits[3]), parser.compile_filter(bits[4]),
+    )
@@ -0,0 +1,106 @@
+import os
+import shutil
+import sqlite3
+import tempfile
+from contextlib import closing
+
+from django.core.cache import cache
+from django.http import HttpResponse
+from django.test import Client, RequestFactory, TestCase, override_settings
+from django.urls import reverse
+
+from posts.models import Post
+
+from .. import db_router, stampede
+from ..management.commands.sync_replicas import copy_sqlite
+
+
+@override_settings(DATABASE_REPLICAS=['replica'], DATABASE_PIN_SECONDS=30)
+class ReplicaRoutingTests(TestCase):
+    def setUp(self):
+        db_router.unpin()
+        self.addCleanup(db_router.pin)
+        self.router = db_router.PrimaryReplicaRouter()
+        self.factory = RequestFactory()
+
+    def handle(self, request, write=False):
+        """Прогоняет запрос через middleware; write — view что-то пишет."""
+        reads = []
+
+        def view(request):
+            if write:
+                self.router.db_for_write(Post)
+            reads.append(self.router.db_for_read(Post))
+            return HttpResponse()
+
+        response = db_router.ReplicaPinMiddleware(view)(request)
+        return response, reads[0]
+
+    def test_reads_go_to_replica_writes_to_primary(self):
+        self.assertEqual(self.router.db_for_read(Post), 'replica')
+        self.assertEqual(self.router.db_for_write(Post), 'default')
+        # После записи поток читает свою запись из основной базы.
+        self.assertEqual(self.router.db_for_read(Post), 'default')
+        self.assertFalse(self.router.allow_migrate('replica', 'posts'))
+        self.assertIsNone(self.router.allow_migrate('default', 'posts'))
+
+    def test_write_pins_client_to_primary(self):
+        """После записи клиент читает основную базу DATABASE_PIN_SECONDS."""
+        response, read = self.handle(self.factory.get('/'))
+        self.assertEqual(read, 'replica')
+        self.assertNotIn(db_router.PIN_COOKIE, response.cookies)
+        response, read = self.handle(self.factory.get('/'), write=True)
+        cookie = response.cookies[db_router.PIN_COOKIE]
+        self.assertEqual(cookie['max-age'], 30)
+        request = self.factory.get('/')
+        request.COOKIES[db_router.PIN_COOKIE] = cookie.value
+        _, read = self.handle(request)
+        self.assertEqual(read, 'default')
+
+    def test_outside_requests_use_primary(self):
+        """Команды и миграции читают основную базу."""
+        self.handle(self.factory.get('/'))
+        self.assertTrue(db_router.is_pinned())
+        self.assertEqual(self.router.db_for_read(Post), 'default')
+
+    def test_unsafe_methods_use_primary(self):
+        response, read = self.handle(self.factory.post('/'))
+        self.assertEqual(read, 'default')
+        self.assertIn(db_router.PIN_COOKIE, response.cookies)
+
+    def test_cache_rebuild_reads_primary(self):
+        """Отстающая реплика не попадает в кеш под новой версией."""
+        cache.clear()
+        # Реплика еще не получила запись, которая сменила версию.
+        rows = {'replica': 'старое', 'default': 'новое'}
+
+        def compute():
+            return rows[self.router.db_for_read(Post)]
+
+        self.assertEqual(stampede.fetch('page', compute, 60, 2), 'новое')
+        self.assertEqual(
+            stampede.fetch('page', lambda: 'пересчет', 60, 2), 'новое'
+        )
+        self.assertEqual(self.router.db_for_read(Post), 'replica')
+
+    @override_settings(DATABASE_REPLICAS=[])
+    def test_without_replicas(self):
+        self.assertEqual(self.router.db_for_read(Post), 'default')
+        response = Client().get(reverse('posts:index'))
+        self.assertNotIn(db_router.PIN_COOKIE, response.cookies)
+
+
+class CopySqliteTests(TestCase):
+    def test_copy(self):
+        """Замена репликации переносит данные во второй файл SQLite."""
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        primary = os.path.join(directory, 'primary.sqlite3')
+        replica = os.path.join(directory, 'replica.sqlite3')
+        with closing(sqlite3.connect(primary)) as db:
+            db.execute('CREATE TABLE t (x)')
+            db.execute('INSERT INTO t VALUES (1)')
+            db.commit()
+        copy_sqlite(primary, replica)
+        with closing(sqlite3.connect(replica)) as db:
+            self.assertEqual(db.execute('SELECT x FROM t').fetchall(), [(1,)])
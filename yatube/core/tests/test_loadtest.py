@@ -0,0 +1,74 @@
+from django.core.cache import cache
+from django.test import TestCase, TransactionTestCase
+
+from .. import loadtest
+from ..management.commands.loadtest import Command as LoadtestCommand
+
+
+class LoadtestTests(TestCase):
+    def test_percentile(self):
+        """Перцентиль по ближайшему рангу, порядок значений не важен."""
+        values = list(range(100, 0, -1))
+        self.assertIsNone(loadtest.percentile([], 50))
+        self.assertEqual(loadtest.percentile(values, 50), 50)
+        self.assertEqual(loadtest.percentile(values, 95), 95)
+        self.assertEqual(loadtest.percentile(values, 100), 100)
+        self.assertEqual(loadtest.percentile([7], 1), 7)
+
+    def test_summarize(self):
+        """Ошибки — статус от 400 и исключения, средние без пропусков."""
+        samples = {'GET posts:index': [
+            (0.25, 200, 3, 1000),
+            (0.5, 500, 5, 3000),
+            (0.125, None, None, None),
+        ]}
+        result = loadtest.summarize(samples, 2.0, 1, 3)
+        self.assertEqual(result['requests'], 3)
+        self.assertEqual(result['rps'], 1.5)
+        self.assertEqual(result['routes']['GET posts:index'], {
+            'requests': 3,
+            'errors': 2,
+            'p50_ms': 250,
+            'p95_ms': 500,
+            'p99_ms': 500,
+            'rps': 1.5,
+            'queries_per_request': 4,
+            'bytes_per_response': 2000,
+        })
+
+
+class LoadtestRunTests(TransactionTestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_smoke_run(self):
+        """Воркеры со своими пользователями проходят маршруты без ошибок."""
+        from yatube.wsgi import application
+        command = LoadtestCommand()
+        command.setup_fixtures('loadtest', 'secret', 2)
+        scenarios = command.scenarios('loadtest', 'secret', 2)
+        self.assertEqual(
+            [credentials for credentials, _ in scenarios],
+            [('loadtest', 'secret'), ('loadtest-1', 'secret')],
+        )
+        # Тестовая база в памяти не ждет блокировок: воркеры по очереди.
+        for credentials, routes in scenarios:
+            with self.subTest(user=credentials[0]):
+                result = loadtest.run(
+                    loadtest.WSGITransport(application),
+                    [(credentials, routes)], 2,
+                )
+                self.assertEqual(result['requests'], len(routes) * 2)
+                failed = {
+                    name: route['errors']
+                    for name, route in result['routes'].items()
+                    if route['errors']
+                }
+                self.assertEqual(failed, {})
+                self.assertIn('GET users:logout', result['routes'])
+                self.assertGreater(
+                    result['routes']['GET posts:index'][
+                        'queries_per_request'
+                    ],
+                    0,
+                )
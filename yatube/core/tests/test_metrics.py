@@ -0,0 +1,75 @@
+from django.contrib.auth import get_user_model
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from posts.models import Post
+
+from ..metrics import Histogram, registry
+
+User = get_user_model()
+
+
+class HistogramTests(TestCase):
+    def test_cumulative_buckets(self):
+        """Корзины накопительные, последняя — +Inf."""
+        histogram = Histogram((1, 5))
+        for value in (0.5, 1, 3, 10):
+            histogram.observe(value)
+        self.assertEqual(
+            list(histogram.cumulative()), [(1, 2), (5, 3), ('+Inf', 4)]
+        )
+        self.assertEqual(histogram.count, 4)
+        self.assertEqual(histogram.sum, 14.5)
+
+
+@override_settings(METRICS_SAMPLE_RATE=1)
+class MetricsMiddlewareTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        author = User.objects.create_user(username='author')
+        Post.objects.create(author=author, text='Пост')
+
+    def setUp(self):
+        registry.clear()
+        self.client = Client()
+
+    def test_server_timing_header(self):
+        """Выбранный запрос получает Server-Timing со всеми отрезками."""
+        response = self.client.get(reverse('posts:index'))
+        timing = response['Server-Timing']
+        for part in ('db;dur=', 'queries"', 'template;dur=', 'total;dur='):
+            with self.subTest(part=part):
+                self.assertIn(part, timing)
+
+    def test_metrics_endpoint(self):
+        """/metrics отдает гистограммы по имени view."""
+        self.client.get(reverse('posts:index'))
+        self.client.get(reverse('posts:index'))
+        response = self.client.get(reverse('metrics'))
+        self.assertTrue(response['Content-Type'].startswith('text/plain'))
+        body = response.content.decode()
+        self.assertIn('# TYPE yatube_db_queries histogram', body)
+        self.assertIn(
+            'yatube_request_duration_seconds_count{view="posts:index"} 2',
+            body,
+        )
+        self.assertIn(
+            'yatube_template_duration_seconds_bucket'
+            '{view="posts:index",le="+Inf"} 2',
+            body,
+        )
+
+    def test_metrics_forbidden_for_remote_visitors(self):
+        """С чужого адреса метрики видит только персонал."""
+        response = self.client.get(
+            reverse('metrics'), REMOTE_ADDR='10.0.0.1'
+        )
+        self.assertEqual(response.status_code, 403)
+
+    @override_settings(METRICS_SAMPLE_RATE=0)
+    def test_sampling_off(self):
+        """При нулевой доле нет ни заголовка, ни наблюдений."""
+        response = Client().get(reverse('posts:index'))
+        self.assertFalse(response.has_header('Server-Timing'))
+        self.assertEqual(registry.histograms, {})
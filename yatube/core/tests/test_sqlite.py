@@ -0,0 +1,94 @@
+from django.db import OperationalError, connection, transaction
+from django.http import HttpResponse
+from django.test import RequestFactory, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+
+from posts.models import Post
+
+from ..sqlite import apply_pragmas, immediate_atomic, retry_on_lock
+
+
+class SqliteTests(TransactionTestCase):
+    def view(self, *errors):
+        """View, которая сначала падает с errors, затем отвечает 200."""
+        errors = list(errors)
+        calls = []
+
+        @retry_on_lock
+        def view(request):
+            calls.append(request)
+            if errors:
+                raise errors.pop(0)
+            return HttpResponse()
+        return view, calls
+
+    @override_settings(SQLITE_PRAGMAS={'cache_size': -1000})
+    def test_pragmas(self):
+        apply_pragmas(None, connection)
+        with connection.cursor() as cursor:
+            cursor.execute('PRAGMA cache_size')
+            self.assertEqual(cursor.fetchone()[0], -1000)
+
+    @override_settings(SQLITE_WRITE_RETRIES=2, SQLITE_RETRY_DELAY=0)
+    def test_retry_on_lock(self):
+        """Запись повторяется при блокировке и только при ней."""
+        request = RequestFactory().post('/')
+        locked = OperationalError('database is locked')
+        view, calls = self.view(locked, locked)
+        self.assertEqual(view(request).status_code, 200)
+        self.assertEqual(len(calls), 3)
+        view, calls = self.view(locked, locked, locked)
+        with self.assertRaises(OperationalError):
+            view(request)
+        view, calls = self.view(OperationalError('no such table: x'))
+        with self.assertRaises(OperationalError):
+            view(request)
+        self.assertEqual(len(calls), 1)
+
+    def test_immediate_atomic(self):
+        """Внешняя транзакция — BEGIN IMMEDIATE, следующая — снова BEGIN."""
+        with CaptureQueriesContext(connection) as queries:
+            with immediate_atomic():
+                with immediate_atomic():
+                    Post.objects.exists()
+            with transaction.atomic():
+                Post.objects.exists()
+        statements = [query['sql'] for query in queries]
+        self.assertEqual(statements[0], 'BEGIN IMMEDIATE')
+        self.assertEqual(statements.count('BEGIN IMMEDIATE'), 1)
+        self.assertIn('BEGIN', statements[1:])
+
+    @override_settings(SQLITE_WRITE_TRANSACTIONS=False)
+    def test_write_transactions_off(self):
+        """Без SQLITE_WRITE_TRANSACTIONS view идет в автокоммите."""
+        @retry_on_lock
+        def view(request):
+            return HttpResponse(str(connection.in_atomic_block))
+
+        response = view(RequestFactory().post('/'))
+        self.assertEqual(response.content, b'False')
+
+    def test_production_settings_keep_base_databases(self):
+        """Импорт профиля settings_production не меняет настройки процесса."""
+        from yatube import settings as base, settings_production
+
+        self.assertIsNot(
+            settings_production.DATABASES['default'],
+            base.DATABASES['default'],
+        )
+        self.assertNotEqual(base.DATABASES['default']['CONN_MAX_AGE'], 600)
+
+    def test_safe_methods_skip_write_lock(self):
+        """GET формы не берет блокировку записи, если view не просит."""
+        def view(request):
+            return HttpResponse(str(connection.in_atomic_block))
+
+        cases = (
+            (retry_on_lock(view), 'get', b'False'),
+            (retry_on_lock(view), 'post', b'True'),
+            (retry_on_lock(safe_methods=True)(view), 'get', b'True'),
+        )
+        for wrapped, method, expected in cases:
+            with self.subTest(method=method, expected=expected):
+                request = getattr(RequestFactory(), method)('/')
+                self.assertEqual(wrapped(request).content, expected)
@@ -0,0 +1,98 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from unittest import mock
+
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+
+from .. import stampede
+from ..metrics import registry
+
+
+@override_settings(CACHE_LOCK_WAIT=0.5)
+class StampedeTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        registry.clear()
+        self.calls = 0
+
+    def compute(self, value='value'):
+        def compute():
+            self.calls += 1
+            return value
+        return compute
+
+    def events(self):
+        return {
+            label: count for (name, label), count in registry.counters.items()
+            if name == stampede.COUNTER
+        }
+
+    def test_hit_and_miss(self):
+        """Первое чтение считает значение, второе берет из кеша."""
+        self.assertEqual(stampede.fetch('key', self.compute(), 60), 'value')
+        self.assertEqual(stampede.fetch('key', self.compute(), 60), 'value')
+        self.assertEqual(self.calls, 1)
+        self.assertEqual(self.events(), {'miss': 1, 'hit': 1})
+        self.assertIn(
+            'yatube_cache_events_total{event="hit"} 1', registry.render()
+        )
+
+    def test_new_version_recomputes(self):
+        """Значение прежней версии пересчитывается."""
+        stampede.fetch('key', self.compute('old'), 60, version=1)
+        self.assertEqual(
+            stampede.fetch('key', self.compute('new'), 60, version=2), 'new'
+        )
+
+    def test_stale_while_revalidate(self):
+        """Пока другой запрос пересчитывает ключ, отдается прежнее значение."""
+        stampede.fetch('key', self.compute('old'), 60, version=1)
+        cache.add('key:lock', 1)
+        self.assertEqual(
+            stampede.fetch('key', self.compute('new'), 60, version=2), 'old'
+        )
+        self.assertEqual(self.events()['stale'], 1)
+        self.assertEqual(
+            stampede.fetch_state('key', self.compute('new'), 60, version=2),
+            ('old', True),
+        )
+        self.assertEqual(
+            stampede.fetch_state('key', self.compute('new'), 60, version=1),
+            ('old', False),
+        )
+
+    def test_lock_wait(self):
+        """Без прежнего значения запрос ждет чужой пересчет."""
+        cache.add('key:lock', 1)
+        timer = threading.Timer(
+            0.1, stampede._compute, ('key', self.compute('other'), 60, None)
+        )
+        timer.start()
+        self.addCleanup(timer.join)
+        self.assertEqual(stampede.fetch('key', self.compute(), 60), 'other')
+        self.assertEqual(self.events(), {'lock_wait': 1})
+
+    def test_early_recompute(self):
+        """Долгий расчет близко к сроку пересчитывается заранее."""
+        cache.set('key', ('old', None, time.time() + 1, 10.0), 60)
+        with mock.patch('core.stampede.random.random', return_value=0.5):
+            self.assertEqual(
+                stampede.fetch('key', self.compute('new'), 60), 'new'
+            )
+        self.assertEqual(self.events(), {'early': 1})
+
+    def test_single_flight(self):
+        """Одновременные промахи по одному ключу считают его один раз."""
+        def slow():
+            time.sleep(0.1)
+            return self.compute()()
+
+        with ThreadPoolExecutor(8) as executor:
+            results = list(executor.map(
+                lambda _: stampede.fetch('key', slow, 60), range(8)
+            ))
+        self.assertEqual(results, ['value'] * 8)
+        self.assertEqual(self.calls, 1)
+        self.assertEqual(self.events(), {'miss': 1, 'lock_wait': 7})
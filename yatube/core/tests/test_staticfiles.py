@@ -0,0 +1,104 @@
+import shutil
+import tempfile
+from unittest import skipUnless
+
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.core.management import call_command
+from django.http import HttpResponse
+from django.test import RequestFactory, TestCase, override_settings
+
+from .. import staticfiles
+from ..staticfiles import IMMUTABLE, REVALIDATE, StaticFilesMiddleware
+
+
+class StaticFilesTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.root = tempfile.mkdtemp()
+        cls.settings = override_settings(
+            STATIC_ROOT=cls.root,
+            STATICFILES_STORAGE=(
+                'core.staticfiles.CompressedManifestStaticFilesStorage'
+            ),
+            STATICFILES_FINDERS=[
+                'django.contrib.staticfiles.finders.FileSystemFinder',
+            ],
+        )
+        cls.settings.enable()
+        call_command('collectstatic', interactive=False, verbosity=0)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.settings.disable()
+        shutil.rmtree(cls.root, ignore_errors=True)
+        super().tearDownClass()
+
+    def setUp(self):
+        self.middleware = StaticFilesMiddleware(
+            lambda request: HttpResponse('view')
+        )
+        self.css = staticfiles_storage.stored_name('css/bootstrap.min.css')
+
+    def get(self, path, **headers):
+        return self.middleware(RequestFactory().get(path, **headers))
+
+    def test_collectstatic_compresses(self):
+        """collectstatic кладет рядом с CSS сжатую копию с тем же хешем."""
+        self.assertRegex(self.css, r'^css/bootstrap\.min\.\w{12}\.css$')
+        self.assertTrue(staticfiles_storage.exists(self.css + '.gz'))
+        # PNG уже сжат.
+        self.assertFalse(staticfiles_storage.exists(
+            staticfiles_storage.stored_name('img/logo.png') + '.gz'
+        ))
+
+    def test_hashed_file_is_immutable(self):
+        """Файл с хешем кешируется навсегда и отдается сжатым."""
+        response = self.get(
+            f'/static/{self.css}', HTTP_ACCEPT_ENCODING='gzip, deflate'
+        )
+        self.assertEqual(response['Cache-Control'], IMMUTABLE)
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(response['Content-Type'], 'text/css')
+        self.assertEqual(response['Vary'], 'Accept-Encoding')
+        with staticfiles_storage.open(self.css + '.gz') as compressed:
+            self.assertEqual(
+                b''.join(response.streaming_content), compressed.read()
+            )
+
+    @skipUnless(staticfiles.brotli, 'пакет brotli не установлен')
+    def test_brotli_preferred(self):
+        """Если клиент понимает br, отдается копия brotli."""
+        response = self.get(
+            f'/static/{self.css}', HTTP_ACCEPT_ENCODING='gzip, br'
+        )
+        self.assertEqual(response['Content-Encoding'], 'br')
+
+    def test_content_negotiation(self):
+        """Без gzip в Accept-Encoding отдается исходный файл."""
+        for header in ('', 'gzip;q=0, identity'):
+            with self.subTest(header=header):
+                response = self.get(
+                    f'/static/{self.css}', HTTP_ACCEPT_ENCODING=header
+                )
+                self.assertFalse(response.has_header('Content-Encoding'))
+                self.assertEqual(
+                    int(response['Content-Length']),
+                    staticfiles_storage.size(self.css),
+                )
+
+    def test_unhashed_file_revalidates(self):
+        """Файл без хеша кешируется ненадолго и проверяется по ETag."""
+        response = self.get('/static/css/bootstrap.min.css')
+        self.assertEqual(response['Cache-Control'], REVALIDATE)
+        response = self.get(
+            '/static/css/bootstrap.min.css',
+            HTTP_IF_NONE_MATCH=response['ETag'],
+        )
+        self.assertEqual(response.status_code, 304)
+
+    def test_other_paths_pass_through(self):
+        """Чужие и выходящие за STATIC_ROOT пути доходят до view."""
+        for path in ('/', '/static/missing.css', '/static/../secret'):
+            with self.subTest(path=path):
+                self.assertEqual(self.get(path).content, b'view')
@@ -1,5 +1,10 @@
+from django.conf import settings
+from django.core.exceptions import PermissionDenied
+from django.http import HttpResponse
 from django.shortcuts import render
 
+from .metrics import registry
+
 
 def page_not_found(request, exception):
     return render(request, 'core/404.html', {'path': request.path}, status=404)
@@ -11,3 +16,16 @@ def permission_denied_view(request, exception):
 
 def server_error(request):
     return render(request, 'core/500.html', status=500)
+
+
+def metrics(request):
+    """Гистограммы процесса для Prometheus: локальным адресам и персоналу."""
+    allowed = getattr(settings, 'METRICS_ALLOWED_IPS', ('127.0.0.1',))
+    if (
+        request.META.get('REMOTE_ADDR') not in allowed
+        and not request.user.is_staff
+    ):
+        raise PermissionDenied
+    return HttpResponse(
+        registry.render(), content_type='text/plain; version=0.0.4'
+    )
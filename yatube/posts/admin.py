@@ -1,16 +1,36 @@
 from django.contrib import admin
 
-from .models import Group, Post
+from . import search
+from .models import AuthorStats, Group, Post
 
 
 class PostAdmin(admin.ModelAdmin):
 
-    list_display = ('pk', 'text', 'pub_date', 'author', 'group',)
+    list_display = (
+        'pk', 'text', 'pub_date', 'author', 'group', 'comments_count',
+    )
     search_fields = ('text',)
     list_filter = ('pub_date',)
     list_editable = ('group',)
     empty_value_display = '-пусто-'
 
+    def get_search_results(self, request, queryset, search_term):
+        # Поиск идет по полнотекстовому индексу вместо LIKE по таблице.
+        if not search_term:
+            return queryset, False
+        return search.get_backend().filter(queryset, search_term), False
+
+
+class AuthorStatsAdmin(admin.ModelAdmin):
+
+    list_display = (
+        'user', 'posts_count', 'followers_count', 'following_count',
+    )
+    search_fields = ('user__username',)
+    readonly_fields = (
+        'user', 'posts_count', 'followers_count', 'following_count',
+    )
+
 
 class GroupAdmin(admin.ModelAdmin):
 
@@ -22,3 +42,4 @@ class GroupAdmin(admin.ModelAdmin):
 
 admin.site.register(Post, PostAdmin)
 admin.site.register(Group, GroupAdmin)
+admin.site.register(AuthorStats, AuthorStatsAdmin)
@@ -0,0 +1,198 @@
+"""
+JSON API только для чтения: посты, группы, комментарии и лента подписок.
+
+Списки листаются курсором (keyset, как CursorPaginator в HTML), строки
+выбираются через values() без создания объектов моделей. Параметр
+fields=id,author,pub_date оставляет в ответе только нужные поля, и
+ненужные колонки (например, text в списке) не читаются из базы.
+Ответы сжимаются gzip, если клиент его принимает.
+"""
+from functools import wraps
+from urllib.parse import urlencode
+
+from django.core.files.storage import default_storage
+from django.http import JsonResponse
+from django.views.decorators.gzip import gzip_page
+from django.views.decorators.http import require_GET
+
+from . import timeline
+from .models import Comment, Group, Post
+from .paginators import CursorPaginator
+from .post_settings import API_MAX_PAGE_SIZE, API_PAGE_SIZE
+
+# Имя поля в ответе -> колонка для values().
+POST_FIELDS = {
+    'id': 'id',
+    'author': 'author__username',
+    'group': 'group__slug',
+    'pub_date': 'pub_date',
+    'text': 'text',
+    'image': 'image',
+    'comments_count': 'comments_count',
+}
+GROUP_FIELDS = {
+    'id': 'id',
+    'slug': 'slug',
+    'title': 'title',
+    'description': 'description',
+}
+COMMENT_FIELDS = {
+    'id': 'id',
+    'post': 'post_id',
+    'author': 'author__username',
+    'created': 'created',
+    'text': 'text',
+}
+COMMENT_ORDERING = ('-created', '-id')
+GROUP_ORDERING = ('id',)
+JSON_PARAMS = {'ensure_ascii': False, 'separators': (',', ':')}
+
+
+class ApiError(ValueError):
+    """Ошибка запроса, которая отдается клиенту с кодом status."""
+
+    def __init__(self, message, status=400):
+        super().__init__(message)
+        self.status = status
+
+
+def _media_url(name):
+    return default_storage.url(name) if name else None
+
+
+CONVERTERS = {'image': _media_url}
+
+
+def _selected(request, available):
+    """Поля из параметра fields (по умолчанию все) в порядке available."""
+    value = request.GET.get('fields')
+    if not value:
+        return list(available)
+    requested = [name.strip() for name in value.split(',') if name.strip()]
+    unknown = [name for name in requested if name not in available]
+    if unknown:
+        raise ApiError(f'Неизвестные поля: {", ".join(unknown)}')
+    return [name for name in available if name in requested]
+
+
+def _limit(request):
+    value = request.GET.get('limit')
+    if value is None:
+        return API_PAGE_SIZE
+    try:
+        limit = int(value)
+    except ValueError:
+        raise ApiError('limit должен быть целым числом')
+    return max(1, min(limit, API_MAX_PAGE_SIZE))
+
+
+def _columns(fields, available, ordering=()):
+    columns = {available[name] for name in fields}
+    columns.update(name.lstrip('-') for name in ordering)
+    return sorted(columns)
+
+
+def _serialize(row, fields, available):
+    item = {}
+    for name in fields:
+        value = row[available[name]]
+        converter = CONVERTERS.get(name)
+        item[name] = converter(value) if converter else value
+    return item
+
+
+def _page_url(request, cursor):
+    if cursor is None:
+        return None
+    query = request.GET.copy()
+    query['cursor'] = cursor
+    return f'{request.path}?{urlencode(sorted(query.items()))}'
+
+
+def _listing(request, queryset, available, ordering):
+    """Страница списка: results и ссылки next/previous."""
+    fields = _selected(request, available)
+    paginator = CursorPaginator(
+        queryset.values(*_columns(fields, available, ordering)),
+        _limit(request), ordering,
+    )
+    page = paginator.get_page(request.GET.get('cursor'))
+    return {
+        'results': [_serialize(row, fields, available) for row in page],
+        'next': _page_url(request, page.next_cursor),
+        'previous': _page_url(request, page.previous_cursor),
+    }
+
+
+def api_view(view):
+    """GET, gzip и JSON-ответ; ApiError превращается в {"detail": ...}."""
+    @wraps(view)
+    @gzip_page
+    @require_GET
+    def wrapper(request, *args, **kwargs):
+        try:
+            data = view(request, *args, **kwargs)
+        except ApiError as error:
+            return JsonResponse(
+                {'detail': str(error)}, status=error.status,
+                json_dumps_params=JSON_PARAMS,
+            )
+        return JsonResponse(data, json_dumps_params=JSON_PARAMS)
+    return wrapper
+
+
+@api_view
+def posts(request):
+    """Посты, новые первыми; group=<slug> и author=<username> фильтруют."""
+    queryset = Post.objects.all()
+    if request.GET.get('group'):
+        queryset = queryset.filter(group__slug=request.GET['group'])
+    if request.GET.get('author'):
+        queryset = queryset.filter(author__username=request.GET['author'])
+    return _listing(request, queryset, POST_FIELDS, ('-pub_date', '-id'))
+
+
+@api_view
+def post(request, post_id):
+    """Один пост."""
+    fields = _selected(request, POST_FIELDS)
+    row = Post.objects.filter(pk=post_id).values(
+        *_columns(fields, POST_FIELDS)
+    ).first()
+    if row is None:
+        raise ApiError('Пост не найден', status=404)
+    return _serialize(row, fields, POST_FIELDS)
+
+
+@api_view
+def comments(request, post_id):
+    """Комментарии поста, новые первыми."""
+    data = _listing(
+        request, Comment.objects.filter(post_id=post_id), COMMENT_FIELDS,
+        COMMENT_ORDERING,
+    )
+    # Пустая первая страница: отличаем пост без комментариев от
+    # несуществующего поста лишним запросом только в этом случае.
+    if not data['results'] and not request.GET.get('cursor'):
+        if not Post.objects.filter(pk=post_id).exists():
+            raise ApiError('Пост не найден', status=404)
+    return data
+
+
+@api_view
+def groups(request):
+    """Группы в порядке создания."""
+    return _listing(
+        request, Group.objects.all(), GROUP_FIELDS, GROUP_ORDERING
+    )
+
+
+@api_view
+def follow(request):
+    """Лента подписок текущего пользователя."""
+    if not request.user.is_authenticated:
+        raise ApiError('Нужна авторизация', status=401)
+    return _listing(
+        request, timeline.feed(request.user), POST_FIELDS,
+        timeline.FEED_ORDERING,
+    )
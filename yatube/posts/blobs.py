@@ -0,0 +1,92 @@
+"""
+Подсчет ссылок постов на файлы хранилища картинок.
+
+Ссылку берет пост, которому досталась картинка, и отдает пост, который
+ее сменил или удален. Одинаковые картинки разных постов — один файл,
+поэтому и миниатюра у них одна: sorl находит ее по имени файла.
+
+Файл без ссылок сразу не удаляется: ту же картинку может в этот момент
+загружать другой запрос, который нашел файл в хранилище, но еще не
+закоммитил ссылку. Строка Blob остается с refs=0 и временем released,
+а sweep (команда sweep_blobs) удаляет файлы, которые пробыли без
+ссылок дольше BLOB_GRACE секунд и с тех пор не загружались заново.
+"""
+from collections import Counter
+from datetime import timedelta
+
+from django.core.files.storage import default_storage
+from django.db.models import F
+from django.utils import timezone
+from sorl.thumbnail import delete as delete_thumbnails
+
+from . import renditions
+from .models import Blob, Post
+from .post_settings import BLOB_GRACE
+
+
+def acquire(name, count=1):
+    if not name:
+        return
+    rows = Blob.objects.filter(name=name)
+    if not rows.update(refs=F('refs') + count, released=None):
+        blob, created = Blob.objects.get_or_create(
+            name=name, defaults={'refs': count}
+        )
+        if not created:
+            rows.update(refs=F('refs') + count, released=None)
+
+
+def acquire_many(names):
+    for name, count in Counter(name for name in names if name).items():
+        acquire(name, count)
+
+
+def release(name):
+    if not name:
+        return
+    Blob.objects.filter(name=name, refs__gt=0).update(refs=F('refs') - 1)
+    Blob.objects.filter(name=name, refs=0, released=None).update(
+        released=timezone.now()
+    )
+
+
+def _storage():
+    return Post._meta.get_field('image').storage
+
+
+def sweep(grace=BLOB_GRACE, now=None):
+    """
+    Удаляет файлы, у которых нет ссылок дольше grace секунд. Возвращает
+    число удаленных файлов.
+    """
+    cutoff = (now or timezone.now()) - timedelta(seconds=grace)
+    names = list(
+        Blob.objects.filter(refs=0, released__lt=cutoff).values_list(
+            'name', flat=True
+        )
+    )
+    removed = 0
+    for name in names:
+        storage = _storage()
+        if storage.exists(name) and storage.get_modified_time(name) > cutoff:
+            # Файл недавно загрузили снова: ссылка на него еще в пути.
+            continue
+        if Blob.objects.filter(
+            name=name, refs=0, released__lt=cutoff
+        ).delete()[0]:
+            remove(name)
+            removed += 1
+    return removed
+
+
+def remove(name):
+    """Удаляет файл без ссылок вместе с копиями и миниатюрами."""
+    # Строку могли завести заново между выборкой и удалением.
+    if Blob.objects.filter(name=name).exists():
+        return
+    delete_thumbnails(name, delete_file=False)
+    directory = renditions.rendition_directory(name)
+    if default_storage.exists(directory):
+        for filename in default_storage.listdir(directory)[1]:
+            default_storage.delete(f'{directory}/{filename}')
+    _storage().delete(name)
@@ -0,0 +1,117 @@
+"""
+Условный GET для HTML-страниц постов.
+
+ETag страницы складывается из поколения кеша лент (меняется при любой
+записи в посты и комментарии), даты самого нового поста или
+комментария, версии страниц (подписки меняют счетчики на страницах
+авторов, правка группы — ее описание) и зрителя: аноним или
+пользователь с версией его подписок, сессией и CSRF-cookie (после
+нового входа форма страницы несла бы устаревший CSRF-токен). Все части
+берутся из кеша, так что ответ 304 не рендерит шаблон, а анониму не
+стоит ни одного запроса к базе. Last-Modified не отдается: дата
+новейшего поста не меняется при правке текста или группы.
+"""
+import hashlib
+from functools import wraps
+
+from django.core.cache import cache
+from django.db.models import Max
+from django.utils.cache import patch_cache_control, patch_vary_headers
+from django.views.decorators.http import condition
+
+from core.stampede import fetch
+
+from . import page_cache
+from .listing_cache import generation, latest_pub_date
+from .models import Post
+from .post_settings import LISTING_CACHE_TIMEOUT
+
+VIEWER_KEY = 'posts:viewer:{}'
+
+
+def viewer_version(user_id):
+    return cache.get_or_set(VIEWER_KEY.format(user_id), 0, None)
+
+
+def bump_viewer(user_id):
+    """Подписки пользователя изменились: его страницы устарели."""
+    try:
+        cache.incr(VIEWER_KEY.format(user_id))
+    except ValueError:
+        cache.set(VIEWER_KEY.format(user_id), 1, None)
+
+
+def _viewer(request):
+    if not request.user.is_authenticated:
+        return f'anonymous:{page_cache.version()}'
+    pk = request.user.pk
+    return ':'.join((
+        str(pk), str(viewer_version(pk)), str(page_cache.version()),
+        request.session.session_key or '',
+        request.META.get('CSRF_COOKIE', ''),
+    ))
+
+
+def post_latest(post_id):
+    """Дата публикации поста или его последнего комментария."""
+    def compute():
+        row = Post.objects.filter(pk=post_id).annotate(
+            latest_comment=Max('comments__created')
+        ).values_list('pub_date', 'latest_comment').first()
+        return max(filter(None, row)) if row else None
+
+    return fetch(
+        f'posts:detail:{post_id}', compute, LISTING_CACHE_TIMEOUT,
+        generation(),
+    )
+
+
+def conditional_page(latest):
+    """
+    Декоратор view: latest(**kwargs) возвращает дату самого нового
+    поста или комментария страницы (None — отдать страницу как есть).
+    """
+    def etag(request, **kwargs):
+        value = latest(**kwargs)
+        if value is None:
+            return None
+        state = ':'.join((
+            request.resolver_match.view_name,
+            str(sorted(kwargs.items())),
+            str(generation()),
+            value.isoformat(),
+            _viewer(request),
+        ))
+        return hashlib.sha1(state.encode()).hexdigest()
+
+    def decorator(view):
+        conditional_view = condition(etag_func=etag)(view)
+
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            response = conditional_view(request, *args, **kwargs)
+            if getattr(response, 'stale', False):
+                # Устаревшая страница из кеша (page_cache): с ETag текущей
+                # версии браузер держал бы ее до следующей записи.
+                del response['ETag']
+            # Браузер и прокси хранят страницу, но сверяются перед показом;
+            # страницы пользователя не попадают в общие кеши.
+            patch_vary_headers(response, ('Cookie',))
+            patch_cache_control(response, no_cache=True)
+            if request.user.is_authenticated:
+                patch_cache_control(response, private=True)
+            return response
+        return wrapper
+    return decorator
+
+
+def index_latest():
+    return latest_pub_date('index')
+
+
+def group_latest(slug):
+    return latest_pub_date('group', group__slug=slug)
+
+
+def profile_latest(username):
+    return latest_pub_date('profile', author__username=username)
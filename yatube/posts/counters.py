@@ -0,0 +1,100 @@
+from django.apps import apps as global_apps
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, F, IntegerField, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+from .models import AuthorStats, Post
+
+STATS_FIELDS = {
+    # поле AuthorStats: (модель, поле связи с пользователем)
+    'posts_count': ('Post', 'author'),
+    'followers_count': ('Follow', 'author'),
+    'following_count': ('Follow', 'user'),
+}
+
+
+def _count(model, field):
+    """Подзапрос: число строк model, ссылающихся полем field на строку."""
+    rows = model.objects.filter(**{field: OuterRef('pk')}).order_by()
+    return Coalesce(
+        Subquery(
+            rows.values(field).annotate(total=Count('pk')).values('total'),
+            output_field=IntegerField(),
+        ),
+        0,
+    )
+
+
+def stats_for(user_id, apps=global_apps):
+    """Счетчики пользователя; отсутствующая строка считается с нуля."""
+    AuthorStats = apps.get_model('posts', 'AuthorStats')
+    stats = AuthorStats.objects.filter(user_id=user_id).first()
+    if stats is not None:
+        return stats
+    defaults = {
+        name: apps.get_model('posts', model).objects.filter(
+            **{field: user_id}
+        ).count()
+        for name, (model, field) in STATS_FIELDS.items()
+    }
+    stats, _ = AuthorStats.objects.get_or_create(
+        user_id=user_id, defaults=defaults
+    )
+    return stats
+
+
+def user_stats(user):
+    """Счетчики пользователя, загруженные через select_related('stats')."""
+    try:
+        return user.stats
+    except AuthorStats.DoesNotExist:
+        return stats_for(user.pk)
+
+
+def adjust_stats(user_id, field, delta):
+    """Атомарно сдвигает счетчик пользователя на delta."""
+    rows = AuthorStats.objects.filter(user_id=user_id)
+    if delta < 0:
+        # Счетчик с дрейфом (bulk_create без сигналов) не уходит в минус.
+        rows = rows.filter(**{f'{field}__gte': -delta})
+    updated = rows.update(**{field: F(field) + delta})
+    # Строку, которой еще нет, создаем только при росте: при удалении
+    # пользователя каскад не должен воскрешать его счетчики.
+    if not updated and delta > 0:
+        stats_for(user_id)
+
+
+def move_stats(old_user_id, new_user_id, field):
+    """Объект сменил пользователя: счетчик переходит к новому."""
+    adjust_stats(old_user_id, field, -1)
+    adjust_stats(new_user_id, field, 1)
+
+
+def adjust_comments(post_id, delta):
+    rows = Post.objects.filter(pk=post_id)
+    if delta < 0:
+        rows = rows.filter(comments_count__gte=-delta)
+    rows.update(comments_count=F('comments_count') + delta)
+
+
+def recount(apps=global_apps):
+    """Пересчитывает все счетчики пакетными UPDATE, исправляя дрейф."""
+    User = apps.get_model(settings.AUTH_USER_MODEL)
+    Post = apps.get_model('posts', 'Post')
+    Comment = apps.get_model('posts', 'Comment')
+    AuthorStats = apps.get_model('posts', 'AuthorStats')
+    with transaction.atomic():
+        missing = User.objects.exclude(
+            pk__in=AuthorStats.objects.values('user_id')
+        ).values_list('pk', flat=True)
+        AuthorStats.objects.bulk_create(
+            (AuthorStats(user_id=pk) for pk in missing.iterator()),
+            batch_size=1000,
+            ignore_conflicts=True,
+        )
+        AuthorStats.objects.update(**{
+            name: _count(apps.get_model('posts', model), field)
+            for name, (model, field) in STATS_FIELDS.items()
+        })
+        Post.objects.update(comments_count=_count(Comment, 'post'))
@@ -0,0 +1,289 @@
+"""
+Выгрузка данных пользователя: группы его постов, посты, комментарии
+и подписки в формате импорта (posts/importer.py).
+
+Строки читаются QuerySet.iterator() порциями и сразу отдаются потоком,
+поэтому память не зависит от объема истории. ZIP с картинками
+дополнительно сохраняется в POSTS_EXPORT_DIR: прерванную загрузку
+можно продолжить запросом Range с If-Range по ETag архива.
+"""
+import glob
+import hashlib
+import json
+import logging
+import os
+import re
+import tempfile
+import time
+import zipfile
+
+from django.core.files.storage import default_storage
+from django.db.models import Count, Max
+from django.http import FileResponse, HttpResponse, StreamingHttpResponse
+
+from .listing_cache import generation
+from .models import Comment, Follow, Group
+from .post_settings import EXPORT_DIR, EXPORT_MAX_AGE
+
+logger = logging.getLogger(__name__)
+
+CHUNK_SIZE = 2000
+BUFFER_SIZE = 64 * 1024
+# Одинаковая дата у всех файлов архива: одинаковые данные дают
+# побайтно одинаковый архив.
+ZIP_DATE_TIME = (1980, 1, 1, 0, 0, 0)
+RANGE_RE = re.compile(r'^bytes=(\d*)-(\d*)$')
+ETAG_RE = re.compile(r'^"?([0-9a-f]{16})"?$')
+
+
+def records(user):
+    """Записи выгрузки по одной, в порядке, пригодном для импорта."""
+    groups = Group.objects.filter(posts__author=user).distinct().order_by(
+        'pk'
+    )
+    for slug, title, description in groups.values_list(
+        'slug', 'title', 'description'
+    ).iterator(CHUNK_SIZE):
+        yield {
+            'type': 'group', 'slug': slug, 'title': title,
+            'description': description,
+        }
+    posts = user.posts.order_by('pk').values_list(
+        'pk', 'text', 'pub_date', 'group__slug', 'image'
+    )
+    for pk, text, pub_date, group, image in posts.iterator(CHUNK_SIZE):
+        yield {
+            'type': 'post', 'id': pk, 'author': user.username, 'text': text,
+            'pub_date': pub_date.isoformat(), 'group': group,
+            'image': image,
+        }
+    comments = Comment.objects.filter(author=user).order_by('pk')
+    for pk, post_id, text, created in comments.values_list(
+        'pk', 'post_id', 'text', 'created'
+    ).iterator(CHUNK_SIZE):
+        yield {
+            'type': 'comment', 'id': pk, 'post': post_id,
+            'author': user.username, 'text': text,
+            'created': created.isoformat(),
+        }
+    follows = Follow.objects.filter(user=user).order_by('pk')
+    for author in follows.values_list(
+        'author__username', flat=True
+    ).iterator(CHUNK_SIZE):
+        yield {'type': 'follow', 'user': user.username, 'author': author}
+
+
+def _buffered(chunks):
+    """Склеивает мелкие куски в блоки около BUFFER_SIZE байт."""
+    buffer = []
+    size = 0
+    for chunk in chunks:
+        buffer.append(chunk)
+        size += len(chunk)
+        if size >= BUFFER_SIZE:
+            yield b''.join(buffer)
+            buffer, size = [], 0
+    if buffer:
+        yield b''.join(buffer)
+
+
+def jsonl(user):
+    """Выгрузка в JSONL блоками байтов."""
+    return _buffered(
+        (json.dumps(record, ensure_ascii=False) + '\n').encode()
+        for record in records(user)
+    )
+
+
+class _Sink:
+    """
+    Поток без seek для zipfile: копит записанное до drain().
+    Без seek zipfile пишет размеры файлов после их содержимого.
+    """
+
+    def __init__(self):
+        self.chunks = []
+        self.position = 0
+
+    def write(self, data):
+        self.chunks.append(bytes(data))
+        self.position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self.position
+
+    def flush(self):
+        pass
+
+    def drain(self):
+        data = b''.join(self.chunks)
+        self.chunks = []
+        return data
+
+
+def zip_archive(user):
+    """ZIP с data.jsonl и картинками постов блоками байтов."""
+    sink = _Sink()
+    with zipfile.ZipFile(sink, 'w') as archive:
+        info = zipfile.ZipInfo('data.jsonl', ZIP_DATE_TIME)
+        info.compress_type = zipfile.ZIP_DEFLATED
+        with archive.open(info, 'w', force_zip64=True) as entry:
+            for chunk in jsonl(user):
+                entry.write(chunk)
+                yield sink.drain()
+        images = user.posts.exclude(image='').order_by('pk').values_list(
+            'image', flat=True
+        )
+        for name in images.iterator(CHUNK_SIZE):
+            # Картинки уже сжаты: кладем как есть.
+            info = zipfile.ZipInfo(name, ZIP_DATE_TIME)
+            try:
+                source = default_storage.open(name)
+            except OSError:
+                logger.warning('Нет файла картинки %s', name)
+                continue
+            with source, archive.open(info, 'w', force_zip64=True) as entry:
+                for chunk in source.chunks():
+                    entry.write(chunk)
+                    yield sink.drain()
+    yield sink.drain()
+
+
+def archive_etag(user):
+    """
+    Версия данных пользователя. Посты и комментарии меняют поколение
+    кеша лент, подписки учитываются отдельно.
+    """
+    follows = Follow.objects.filter(user=user).aggregate(
+        count=Count('pk'), last=Max('pk')
+    )
+    state = f'{user.pk}:{generation()}:{follows["count"]}:{follows["last"]}'
+    return hashlib.sha1(state.encode()).hexdigest()[:16]
+
+
+def _archive_path(user, etag):
+    return os.path.join(EXPORT_DIR, f'{user.pk}-{etag}.zip')
+
+
+def _remove_stale(user):
+    """Удаляет архивы пользователя старше EXPORT_MAX_AGE."""
+    deadline = time.time() - EXPORT_MAX_AGE
+    for path in glob.glob(os.path.join(EXPORT_DIR, f'{user.pk}-*.zip')):
+        try:
+            if os.path.getmtime(path) < deadline:
+                os.remove(path)
+        except OSError:
+            pass
+
+
+def _tee(chunks, path):
+    """
+    Отдает архив клиенту и пишет его в path. Если клиент отключился,
+    архив дописывается до конца, чтобы загрузку можно было продолжить.
+    """
+    os.makedirs(EXPORT_DIR, exist_ok=True)
+    handle, temporary = tempfile.mkstemp(dir=EXPORT_DIR, suffix='.part')
+    try:
+        with os.fdopen(handle, 'wb') as output:
+            try:
+                for chunk in chunks:
+                    output.write(chunk)
+                    yield chunk
+            except GeneratorExit:
+                for chunk in chunks:
+                    output.write(chunk)
+        os.replace(temporary, path)
+    finally:
+        if os.path.exists(temporary):
+            os.remove(temporary)
+
+
+def _file_chunks(path, start, length):
+    with open(path, 'rb') as source:
+        source.seek(start)
+        while length > 0:
+            chunk = source.read(min(BUFFER_SIZE, length))
+            if not chunk:
+                return
+            length -= len(chunk)
+            yield chunk
+
+
+def _parse_range(header, size):
+    """(начало, конец) для одного диапазона bytes=; None — не разобран."""
+    match = RANGE_RE.match(header.strip())
+    if match is None or match.groups() == ('', ''):
+        return None
+    first, last = match.groups()
+    if not first:
+        start, end = max(0, size - int(last)), size - 1
+    else:
+        start = int(first)
+        end = min(int(last), size - 1) if last else size - 1
+    if start > end:
+        return None
+    return start, end
+
+
+def _file_response(request, path, etag, filename):
+    size = os.path.getsize(path)
+    header = request.META.get('HTTP_RANGE')
+    if header is not None:
+        byte_range = _parse_range(header, size)
+        if byte_range is None:
+            response = HttpResponse(status=416)
+            response['Content-Range'] = f'bytes */{size}'
+            return response
+        start, end = byte_range
+        response = StreamingHttpResponse(
+            _file_chunks(path, start, end - start + 1),
+            status=206, content_type='application/zip',
+        )
+        response['Content-Range'] = f'bytes {start}-{end}/{size}'
+        response['Content-Length'] = end - start + 1
+    else:
+        response = FileResponse(
+            open(path, 'rb'), content_type='application/zip'
+        )
+    response['Content-Disposition'] = f'attachment; filename="{filename}"'
+    response['Accept-Ranges'] = 'bytes'
+    response['ETag'] = f'"{etag}"'
+    return response
+
+
+def zip_response(request, user):
+    """
+    Ответ с архивом. Готовый архив отдается файлом с поддержкой Range;
+    Range с If-Range на прежний ETag продолжает загрузку той версии,
+    пока она хранится. Иначе архив строится потоком.
+    """
+    filename = f'{user.username}.zip'
+    if_range = ETAG_RE.match(request.META.get('HTTP_IF_RANGE', ''))
+    if if_range:
+        path = _archive_path(user, if_range.group(1))
+        if os.path.exists(path):
+            return _file_response(request, path, if_range.group(1), filename)
+        # Прежней версии нет — по RFC 7233 отдаем архив целиком.
+        request.META.pop('HTTP_RANGE', None)
+    etag = archive_etag(user)
+    path = _archive_path(user, etag)
+    if os.path.exists(path):
+        return _file_response(request, path, etag, filename)
+    _remove_stale(user)
+    response = StreamingHttpResponse(
+        _tee(zip_archive(user), path), content_type='application/zip'
+    )
+    response['Content-Disposition'] = f'attachment; filename="{filename}"'
+    response['ETag'] = f'"{etag}"'
+    return response
+
+
+def jsonl_response(user):
+    response = StreamingHttpResponse(
+        jsonl(user), content_type='application/x-ndjson; charset=utf-8'
+    )
+    response['Content-Disposition'] = (
+        f'attachment; filename="{user.username}.jsonl"'
+    )
+    return response
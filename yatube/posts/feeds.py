@@ -0,0 +1,128 @@
+"""
+RSS и Atom ленты: главная, группа, автор.
+
+ETag ленты складывается из даты самого нового поста, закешированной до
+следующей записи в посты, поколения кеша лент (правка и удаление любого
+поста) и версии страниц (правка группы), как у HTML-страниц
+(conditional), поэтому опрос неизменившейся ленты получает 304 без
+запросов к базе. По If-Modified-Since ответ 304 не отдается: дата
+новейшего поста не меняется при правке и удалении остальных.
+"""
+import hashlib
+
+from django.contrib.syndication.views import Feed
+from django.shortcuts import get_object_or_404
+from django.urls import reverse
+from django.utils.feedgenerator import Atom1Feed
+from django.views.decorators.http import condition
+
+from . import page_cache
+from .conditional import group_latest, index_latest, profile_latest
+from .listing_cache import generation
+from .models import Group, Post, User
+from .post_settings import FEED_SIZE
+
+
+class LatestPostsFeed(Feed):
+    title = 'Yatube: последние записи'
+    description = 'Последние обновления на сайте'
+
+    def link(self, obj=None):
+        return reverse('posts:index')
+
+    def items(self, obj=None):
+        return Post.objects.select_related('author', 'group')[:FEED_SIZE]
+
+    def item_title(self, item):
+        return item.text[:50]
+
+    def item_description(self, item):
+        return item.text
+
+    def item_link(self, item):
+        return reverse('posts:post_detail', args=[item.pk])
+
+    def item_pubdate(self, item):
+        return item.pub_date
+
+    def item_author_name(self, item):
+        return item.author.get_full_name() or item.author.username
+
+
+class GroupPostsFeed(LatestPostsFeed):
+
+    def get_object(self, request, slug):
+        return get_object_or_404(Group, slug=slug)
+
+    def title(self, obj):
+        return f'Yatube: записи сообщества {obj.title}'
+
+    def description(self, obj):
+        return obj.description
+
+    def link(self, obj):
+        return reverse('posts:group_posts', args=[obj.slug])
+
+    def items(self, obj):
+        return obj.posts.select_related('author', 'group')[:FEED_SIZE]
+
+
+class AuthorPostsFeed(LatestPostsFeed):
+
+    def get_object(self, request, username):
+        return get_object_or_404(User, username=username)
+
+    def title(self, obj):
+        return f'Yatube: записи {obj.get_full_name() or obj.username}'
+
+    def description(self, obj):
+        return self.title(obj)
+
+    def link(self, obj):
+        return reverse('posts:profile', args=[obj.username])
+
+    def items(self, obj):
+        return obj.posts.select_related('author', 'group')[:FEED_SIZE]
+
+
+class LatestPostsAtomFeed(LatestPostsFeed):
+    feed_type = Atom1Feed
+    subtitle = LatestPostsFeed.description
+
+
+class GroupPostsAtomFeed(GroupPostsFeed):
+    feed_type = Atom1Feed
+    subtitle = GroupPostsFeed.description
+
+
+class AuthorPostsAtomFeed(AuthorPostsFeed):
+    feed_type = Atom1Feed
+    subtitle = AuthorPostsFeed.description
+
+
+def _conditional(feed, latest):
+    """
+    Оборачивает ленту в условный GET. latest(**kwargs) — дата самого
+    нового поста ленты или None для пустой ленты.
+    """
+    kind = feed.feed_type.__name__
+
+    def etag(request, **kwargs):
+        value = latest(**kwargs)
+        if value is None:
+            return None
+        state = ':'.join((
+            kind, str(sorted(kwargs.items())), str(generation()),
+            str(page_cache.version()), value.isoformat(),
+        ))
+        return hashlib.sha1(state.encode()).hexdigest()
+
+    return condition(etag_func=etag)(feed)
+
+
+index_rss = _conditional(LatestPostsFeed(), index_latest)
+index_atom = _conditional(LatestPostsAtomFeed(), index_latest)
+group_rss = _conditional(GroupPostsFeed(), group_latest)
+group_atom = _conditional(GroupPostsAtomFeed(), group_latest)
+author_rss = _conditional(AuthorPostsFeed(), profile_latest)
+author_atom = _conditional(AuthorPostsAtomFeed(), profile_latest)
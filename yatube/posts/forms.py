@@ -8,6 +8,14 @@ class PostForm(forms.ModelForm):
         model = Post
         fields = ('group', 'text', 'image')
 
+    def save(self, commit=True):
+        # Новая картинка: старые миниатюра и копии больше не годятся,
+        # post_save поставит обработку новой в фоновый пул.
+        if 'image' in self.changed_data:
+            self.instance.thumbnail = ''
+            self.instance.renditions = ''
+        return super().save(commit)
+
 
 class CommentForm(forms.ModelForm):
     class Meta:
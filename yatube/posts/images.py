@@ -0,0 +1,149 @@
+"""
+Обработка загруженных картинок постов.
+
+Картинка уменьшается до POSTS_IMAGE_MAX_SIDE, теряет метаданные и
+пересохраняется в WebP и прогрессивный JPEG нескольких ширин
+(POSTS_IMAGE_WIDTHS) в renditions.DIRECTORY. Итоговый JPEG заменяет
+исходный файл в Post.image, ширины записываются в Post.renditions.
+Перекодирование идет в пуле процессов (POSTS_IMAGE_WORKERS) вне потока
+запроса, после него строится миниатюра уже из уменьшенной картинки.
+"""
+import logging
+import multiprocessing
+import posixpath
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import connection, transaction
+
+from . import blobs, renditions, thumbnails
+from .listing_cache import bump_generation
+from .models import Post
+from .post_settings import IMAGE_MAX_SIDE, IMAGE_WIDTHS, IMAGE_WORKERS
+
+logger = logging.getLogger(__name__)
+
+WEBP_QUALITY = 80
+JPEG_QUALITY = 82
+
+_executor = None
+_pool = None
+
+
+def encode(data):
+    """Перекодирование в текущем процессе."""
+    return renditions.encode(
+        data, IMAGE_MAX_SIDE, IMAGE_WIDTHS, WEBP_QUALITY, JPEG_QUALITY
+    )
+
+
+def _encode_in_pool(data):
+    return _get_pool().submit(
+        renditions.encode, data, IMAGE_MAX_SIDE, IMAGE_WIDTHS,
+        WEBP_QUALITY, JPEG_QUALITY,
+    ).result()
+
+
+def _save_rendition(name, content):
+    # Имя копии выводится из хеша картинки: готовая копия та же самая.
+    if not default_storage.exists(name):
+        default_storage.save(name, ContentFile(content))
+
+
+def process_post(post_id, encode=encode):
+    """
+    Перекодирует картинку поста. Возвращает (байт было, байт в основной
+    картинке, байт в копиях) или None, если обрабатывать нечего.
+
+    Если картинку успели заменить, результат отбрасывается: новая
+    картинка поставит в очередь свою обработку.
+    """
+    post = Post.objects.filter(pk=post_id).only(
+        'image', 'renditions'
+    ).first()
+    if post is None or not post.image or post.renditions:
+        return None
+    original = post.image.name
+    with post.image.storage.open(original) as source:
+        data = source.read()
+    encoded = encode(data)
+    widths = [width for width, _, _ in encoded]
+    full_width = widths[-1]
+    # Имя задает хеш содержимого: важны только каталог и расширение.
+    main = post.image.storage.save(
+        posixpath.join(post.image.field.upload_to, 'image.jpg'),
+        ContentFile(next(
+            content for width, fmt, content in encoded
+            if width == full_width and fmt == renditions.JPEG
+        )),
+    )
+    # Полноразмерный JPEG — сама картинка поста.
+    copies = 0
+    for width, fmt, content in encoded:
+        if (width, fmt) != (full_width, renditions.JPEG):
+            _save_rendition(
+                renditions.rendition_name(main, width, fmt), content
+            )
+            copies += len(content)
+    with transaction.atomic():
+        blobs.acquire(main)
+        updated = Post.objects.filter(pk=post_id, image=original).update(
+            image=main,
+            renditions=' '.join(str(width) for width in sorted(set(widths))),
+            thumbnail='',
+        )
+        # Проигравший гонку отдает ссылку на свой результат обратно.
+        blobs.release(original if updated else main)
+    if not updated:
+        return None
+    return len(data), post.image.storage.size(main), copies
+
+
+def process(post_id, encode=encode):
+    """Перекодирует картинку и строит по ней миниатюру."""
+    result = process_post(post_id, encode)
+    if result is not None:
+        thumbnails.make_thumbnail(post_id)
+        bump_generation()
+    return result
+
+
+def _run(post_id):
+    try:
+        process(post_id, _encode_in_pool)
+    except Exception:
+        logger.exception('Не удалось обработать картинку поста %s', post_id)
+    finally:
+        connection.close()
+
+
+def _get_executor():
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(
+            max_workers=IMAGE_WORKERS, thread_name_prefix='images'
+        )
+    return _executor
+
+
+def _get_pool():
+    global _pool
+    if _pool is None:
+        # spawn: дочерние процессы не наследуют потоки и соединения.
+        _pool = ProcessPoolExecutor(
+            max_workers=IMAGE_WORKERS,
+            mp_context=multiprocessing.get_context('spawn'),
+        )
+    return _pool
+
+
+def schedule(post_id):
+    """
+    Ставит обработку картинки в фоновый пул после коммита.
+    При IMAGE_WORKERS = 0 картинка обрабатывается сразу.
+    """
+    if not IMAGE_WORKERS:
+        process(post_id)
+        return
+    transaction.on_commit(lambda: _get_executor().submit(_run, post_id))
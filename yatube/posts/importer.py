@@ -0,0 +1,440 @@
+"""
+Потоковый импорт групп, постов, комментариев и подписок.
+
+Записи читаются из JSONL или CSV по одной, копятся порциями и
+вставляются через bulk_create, каждая порция — в своей транзакции.
+Поле type записи — group, post, comment или follow:
+
+    {"type": "group", "slug": "cats", "title": "Коты", "description": ""}
+    {"type": "post", "id": 10, "author": "leo", "text": "...",
+     "pub_date": "2020-01-01T10:00:00+00:00", "group": "cats",
+     "image": "old/10.jpg"}
+    {"type": "comment", "post": 10, "author": "tom", "text": "...",
+     "created": "2020-01-02T10:00:00+00:00"}
+    {"type": "follow", "user": "tom", "author": "leo"}
+
+Id старой платформы хранится в legacy_id постов и комментариев, а
+первичные ключи назначает база: с уже существующими записями они не
+пересекаются. Комментарии ссылаются на пост по его legacy_id, записи с
+уже загруженным legacy_id пропускаются. Комментарии без id при
+повторном запуске вставляются заново, поэтому после сбоя импорт
+продолжают с --resume. bulk_create
+не шлет сигналов, поэтому поиск, ленты подписок и ссылки на картинки
+дополняются по порциям, а счетчики пересчитываются в конце (finish).
+"""
+import csv
+import json
+import os
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+
+from django.contrib.auth.hashers import make_password
+from django.core.files import File
+from django.core.exceptions import ValidationError
+from django.core.validators import validate_slug
+from django.db import transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from . import blobs, counters, search, timeline
+from .listing_cache import bump_generation, bump_posts_generation
+from .models import Comment, Follow, Group, Post, Timeline, User
+from .storage import media_storage
+
+RECORD_TYPES = ('group', 'post', 'comment', 'follow')
+# Верхняя граница PositiveIntegerField (legacy_id) в поддерживаемых базах.
+MAX_ID = 2147483647
+# Сколько имен пользователей и slug групп держать в кеше поиска.
+CACHE_LIMIT = 100000
+
+
+class RecordError(ValueError):
+    """Запись не прошла проверку и пропускается."""
+
+
+def read_records(path, fmt=None):
+    """
+    Генератор записей файла. Формат — 'jsonl' или 'csv', по умолчанию
+    по расширению; пустые поля CSV не передаются. Вместо строки JSONL,
+    которая не разбирается в объект, отдается RecordError: импорт
+    записывает ее в ошибки и идет дальше.
+    """
+    fmt = fmt or ('csv' if path.endswith('.csv') else 'jsonl')
+    with open(path, encoding='utf-8', newline='') as source:
+        if fmt == 'csv':
+            for row in csv.DictReader(source):
+                yield {key: value for key, value in row.items() if value}
+            return
+        for line in source:
+            line = line.strip()
+            if line:
+                yield _parse_line(line)
+
+
+def _parse_line(line):
+    try:
+        record = json.loads(line)
+    except ValueError as error:
+        return RecordError(f'неверный JSON: {error}')
+    if not isinstance(record, dict):
+        return RecordError('запись должна быть объектом JSON')
+    return record
+
+
+@contextmanager
+def keep_dates():
+    """Отключает auto_now_add, чтобы сохранить даты старой платформы."""
+    fields = [
+        Post._meta.get_field('pub_date'), Comment._meta.get_field('created')
+    ]
+    for field in fields:
+        field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field in fields:
+            field.auto_now_add = True
+
+
+def _required(record, name):
+    value = record.get(name)
+    if value is None or not str(value).strip():
+        raise RecordError(f'нет поля {name}')
+    return value
+
+
+def _datetime(record, name):
+    value = record.get(name)
+    if not value:
+        return timezone.now()
+    parsed = parse_datetime(str(value))
+    if parsed is None:
+        raise RecordError(f'неверная дата {name}: {value}')
+    if timezone.is_naive(parsed):
+        parsed = timezone.make_aware(parsed, timezone.utc)
+    return parsed
+
+
+def _integer(record, name):
+    try:
+        value = int(_required(record, name))
+    except (TypeError, ValueError):
+        raise RecordError(f'{name} должно быть целым числом')
+    if not 0 <= value <= MAX_ID:
+        raise RecordError(f'{name} вне диапазона 0..{MAX_ID}: {value}')
+    return value
+
+
+class BoundedCache(dict):
+    """Словарь, который очищается целиком при переполнении."""
+
+    def __setitem__(self, key, value):
+        if len(self) >= CACHE_LIMIT:
+            self.clear()
+        super().__setitem__(key, value)
+
+
+class Importer:
+    """
+    Вставляет порции записей. create_users — заводить отсутствующих
+    авторов без пароля, images_dir — откуда копировать картинки
+    в MEDIA_ROOT/posts/ (в image_workers потоков).
+    """
+
+    def __init__(self, create_users=False, images_dir=None,
+                 image_workers=4):
+        self.create_users = create_users
+        self.images_dir = images_dir
+        self.image_workers = image_workers
+        self.users = BoundedCache()
+        self.groups = BoundedCache()
+        self.processed = defaultdict(int)
+        self.skipped = 0
+        self.errors = []
+
+    def _resolve_users(self, usernames):
+        missing = {name for name in usernames if name not in self.users}
+        if not missing:
+            return
+        found = dict(
+            User.objects.filter(username__in=missing).values_list(
+                'username', 'pk'
+            )
+        )
+        if self.create_users and len(found) < len(missing):
+            User.objects.bulk_create(
+                [
+                    User(username=name, password=make_password(None))
+                    for name in missing - set(found)
+                ],
+                ignore_conflicts=True,
+            )
+            found = dict(
+                User.objects.filter(username__in=missing).values_list(
+                    'username', 'pk'
+                )
+            )
+        for name, pk in found.items():
+            self.users[name] = pk
+
+    def _user(self, record, name):
+        username = _required(record, name)
+        if username not in self.users:
+            raise RecordError(f'нет пользователя {username}')
+        return self.users[username]
+
+    def _resolve_groups(self, slugs):
+        missing = {slug for slug in slugs if slug not in self.groups}
+        if missing:
+            for slug, pk in Group.objects.filter(
+                slug__in=missing
+            ).values_list('slug', 'pk'):
+                self.groups[slug] = pk
+
+    def _copy_image(self, number, name):
+        try:
+            with open(os.path.join(self.images_dir, name), 'rb') as source:
+                return media_storage.save(
+                    'posts/' + os.path.basename(name), File(source)
+                )
+        except OSError as error:
+            self.errors.append((number, f'картинка {name}: {error}'))
+            return ''
+
+    def _copy_images(self, records):
+        """Копирует картинки постов порции параллельно, до транзакции."""
+        with_images = [
+            (number, record) for number, record in records
+            if record.get('type') == 'post' and record.get('image')
+        ]
+        if not with_images or not self.images_dir:
+            return
+        with ThreadPoolExecutor(self.image_workers) as executor:
+            names = executor.map(
+                lambda item: self._copy_image(item[0], item[1]['image']),
+                with_images,
+            )
+            for (_, record), name in zip(with_images, names):
+                record['image'] = name
+
+    def _build(self, record):
+        kind = record.get('type')
+        if kind == 'group':
+            slug = _required(record, 'slug')
+            try:
+                validate_slug(slug)
+            except ValidationError:
+                raise RecordError(f'неверный slug {slug}')
+            if len(slug) > 50:
+                raise RecordError(f'slug длиннее 50 символов: {slug}')
+            return Group(
+                slug=slug,
+                title=str(_required(record, 'title'))[:200],
+                description=record.get('description', ''),
+            )
+        if kind == 'post':
+            group = record.get('group')
+            if group and group not in self.groups:
+                raise RecordError(f'нет группы {group}')
+            return Post(
+                legacy_id=_integer(record, 'id'),
+                author_id=self._user(record, 'author'),
+                text=_required(record, 'text'),
+                pub_date=_datetime(record, 'pub_date'),
+                group_id=self.groups.get(group) if group else None,
+                image=record.get('image', ''),
+            )
+        if kind == 'comment':
+            comment = Comment(
+                legacy_id=_integer(record, 'id') if record.get('id') else None,
+                author_id=self._user(record, 'author'),
+                text=_required(record, 'text'),
+                created=_datetime(record, 'created'),
+            )
+            comment.legacy_post_id = _integer(record, 'post')
+            return comment
+        if kind == 'follow':
+            user_id = self._user(record, 'user')
+            author_id = self._user(record, 'author')
+            if user_id == author_id:
+                raise RecordError('подписка на самого себя')
+            return Follow(user_id=user_id, author_id=author_id)
+        raise RecordError(f'неизвестный тип записи {kind}')
+
+    def _build_all(self, records, kinds):
+        built = defaultdict(list)
+        for number, record in records:
+            if record.get('type') not in kinds:
+                continue
+            try:
+                obj = self._build(record)
+            except RecordError as error:
+                self.errors.append((number, str(error)))
+                continue
+            obj.number = number
+            built[record['type']].append(obj)
+        return built
+
+    def _valid(self, records):
+        """Записи порции без строк, которые read_records не разобрал."""
+        valid = []
+        for number, record in records:
+            if isinstance(record, RecordError):
+                self.errors.append((number, str(record)))
+            else:
+                valid.append((number, record))
+        return valid
+
+    def import_chunk(self, records):
+        """
+        Вставляет порцию [(номер записи, запись)]. Группы вставляются
+        первыми: на них ссылаются посты той же порции.
+        """
+        records = self._valid(records)
+        self._resolve_users({
+            record.get(name) for _, record in records
+            for name in ('author', 'user') if record.get(name)
+        })
+        self._copy_images(records)
+        with transaction.atomic(), keep_dates():
+            groups = self._build_all(records, ('group',))['group']
+            Group.objects.bulk_create(groups, ignore_conflicts=True)
+            self._resolve_groups({
+                record['group'] for _, record in records
+                if record.get('type') == 'post' and record.get('group')
+            })
+            built = self._build_all(records, ('post', 'comment', 'follow'))
+            posts = self._new_posts(built['post'])
+            Post.objects.bulk_create(posts)
+            self._assign_pks(posts)
+            blobs.acquire_many(post.image.name for post in posts)
+            comments = self._new_comments(built['comment'])
+            Comment.objects.bulk_create(comments)
+            Follow.objects.bulk_create(
+                built['follow'], ignore_conflicts=True
+            )
+            self._index(posts)
+            self._fan_out(posts, built['follow'])
+        self.processed['group'] += len(groups)
+        self.processed['post'] += len(posts)
+        self.processed['comment'] += len(comments)
+        self.processed['follow'] += len(built['follow'])
+
+    def _new_posts(self, posts):
+        """
+        Посты, чьих legacy_id еще нет в базе. Уже загруженные (повторный
+        запуск) не вставляются и не переиндексируются.
+        """
+        existing = set(
+            Post.objects.filter(
+                legacy_id__in=[post.legacy_id for post in posts]
+            ).values_list('legacy_id', flat=True)
+        )
+        new = {}
+        for post in posts:
+            if post.legacy_id in existing or post.legacy_id in new:
+                self.skipped += 1
+            else:
+                new[post.legacy_id] = post
+        return list(new.values())
+
+    def _assign_pks(self, posts):
+        """bulk_create в SQLite не возвращает ключи: читаем их по legacy_id."""
+        pks = dict(
+            Post.objects.filter(
+                legacy_id__in=[post.legacy_id for post in posts]
+            ).values_list('legacy_id', 'pk')
+        )
+        for post in posts:
+            post.pk = pks[post.legacy_id]
+
+    def _new_comments(self, comments):
+        """
+        Комментарии с постами по их legacy_id. Комментарии к постам,
+        которых нет в базе, отбрасываются, уже загруженные пропускаются.
+        """
+        post_ids = dict(
+            Post.objects.filter(
+                legacy_id__in={comment.legacy_post_id for comment in comments}
+            ).values_list('legacy_id', 'pk')
+        )
+        existing = set(
+            Comment.objects.filter(
+                legacy_id__in=[
+                    comment.legacy_id for comment in comments
+                    if comment.legacy_id is not None
+                ]
+            ).values_list('legacy_id', flat=True)
+        )
+        new = []
+        for comment in comments:
+            if comment.legacy_post_id not in post_ids:
+                self.errors.append(
+                    (comment.number, f'нет поста {comment.legacy_post_id}')
+                )
+            elif comment.legacy_id not in existing:
+                comment.post_id = post_ids[comment.legacy_post_id]
+                if comment.legacy_id is not None:
+                    existing.add(comment.legacy_id)
+                new.append(comment)
+        return new
+
+    def _index(self, posts):
+        titles = dict(
+            Group.objects.filter(
+                pk__in={post.group_id for post in posts if post.group_id}
+            ).values_list('pk', 'title')
+        )
+        search.get_backend().index_many([
+            (post.pk, post.text, titles.get(post.group_id))
+            for post in posts
+        ])
+
+    def _fan_out(self, posts, follows):
+        """
+        Дополняет ленты подписок: новые посты — подписчикам авторов,
+        новые подписки — последними постами авторов. Длину лент
+        ограничивает finish.
+        """
+        pulled = timeline.pull_authors()
+        entries = []
+        authors = {post.author_id for post in posts} - pulled
+        followers = defaultdict(list)
+        for user_id, author_id in Follow.objects.filter(
+            author_id__in=authors
+        ).values_list('user_id', 'author_id'):
+            followers[author_id].append(user_id)
+        for post in posts:
+            for user_id in followers.get(post.author_id, ()):
+                entries.append(Timeline(
+                    user_id=user_id, post_id=post.pk, pub_date=post.pub_date
+                ))
+        readers = defaultdict(list)
+        for follow in follows:
+            if follow.author_id not in pulled:
+                readers[follow.author_id].append(follow.user_id)
+        for author_id, user_ids in readers.items():
+            recent = list(
+                Post.objects.filter(author_id=author_id).order_by(
+                    '-pub_date', '-id'
+                ).values_list('id', 'pub_date')[:timeline.TIMELINE_SIZE]
+            )
+            entries.extend(
+                Timeline(user_id=user_id, post_id=post_id, pub_date=pub_date)
+                for user_id in user_ids
+                for post_id, pub_date in recent
+            )
+        Timeline.objects.bulk_create(
+            entries, batch_size=1000, ignore_conflicts=True
+        )
+
+    def finish(self):
+        """
+        Пересчитывает счетчики, обрезает ленты подписок и сбрасывает кеш
+        лент после импорта.
+        """
+        counters.recount()
+        timeline.trim_all()
+        bump_generation()
+        bump_posts_generation()
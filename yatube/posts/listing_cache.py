@@ -0,0 +1,91 @@
+import time
+
+from django.core.cache import cache
+from django.db.models import Max
+
+from core.stampede import fetch
+
+from .models import Post
+from .post_settings import LISTING_CACHE_TIMEOUT
+
+GENERATION_KEY = 'posts:listing:generation'
+# Поколение самих постов: комментарии его не меняют, поэтому число
+# постов и дата новейшего из них не пересчитываются после комментария.
+POSTS_GENERATION_KEY = 'posts:listing:posts:generation'
+
+
+def generation(key=GENERATION_KEY):
+    """
+    Текущее поколение кеша лент (или другого счетчика key).
+
+    При потере ключа поколение начинается с метки времени, чтобы
+    не совпасть с одним из прежних значений.
+    """
+    value = cache.get(key)
+    if value is None:
+        cache.add(key, int(time.time() * 1000), None)
+        value = cache.get(key)
+    return value
+
+
+def bump_generation(key=GENERATION_KEY):
+    """Делает все закешированные фрагменты лент устаревшими."""
+    try:
+        cache.incr(key)
+    except ValueError:
+        generation(key)
+
+
+def posts_generation():
+    return generation(POSTS_GENERATION_KEY)
+
+
+def bump_posts_generation():
+    """Посты добавлены, удалены или перенесены в другую группу."""
+    bump_generation(POSTS_GENERATION_KEY)
+
+
+def listing_cache(listing, page_obj, *parts):
+    """
+    Контекст для {% stampede_cache %} фрагмента ленты: ключ зависит от
+    типа ленты, её объекта (группа, автор) и страницы или курсора,
+    версия — поколение кеша.
+    """
+    page = getattr(page_obj, 'cursor', None)
+    if page is None:
+        page = getattr(page_obj, 'number', '')
+    return {
+        'timeout': LISTING_CACHE_TIMEOUT,
+        'key': ':'.join(str(part) for part in (listing, *parts, page)),
+        'version': generation(),
+    }
+
+
+def cached_count(queryset, listing, *parts, version=None):
+    """
+    Число объектов ленты из кеша. Версия записи — поколение постов (или
+    version), поэтому после записи в посты его пересчитывает один из
+    запросов, а комментарии его не трогают.
+    """
+    key = 'posts:count:' + ':'.join(str(part) for part in (listing, *parts))
+    return fetch(
+        key, queryset.count, LISTING_CACHE_TIMEOUT,
+        posts_generation() if version is None else version,
+    )
+
+
+def latest_pub_date(listing, **filters):
+    """
+    Дата самого нового поста ленты (filters сужают ее до группы или
+    автора) из кеша. Без записей в посты повторный вызов не ходит в базу.
+    """
+    key = 'posts:latest:' + ':'.join(
+        str(part) for part in (listing, *filters.values())
+    )
+    return fetch(
+        key,
+        lambda: Post.objects.filter(**filters).aggregate(
+            latest=Max('pub_date')
+        )['latest'],
+        LISTING_CACHE_TIMEOUT, posts_generation(),
+    )
@@ -0,0 +1,42 @@
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+
+from posts import export
+from posts.models import User
+
+
+class Command(BaseCommand):
+    help = (
+        'Выгружает посты, комментарии и подписки пользователя в JSONL '
+        'или ZIP с картинками, не загружая историю в память.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('username')
+        parser.add_argument(
+            '--format', choices=('jsonl', 'zip'), default='jsonl',
+        )
+        parser.add_argument(
+            '--output', default='-',
+            help='Файл выгрузки; по умолчанию — стандартный вывод.',
+        )
+
+    def handle(self, *args, **options):
+        user = User.objects.filter(username=options['username']).first()
+        if user is None:
+            raise CommandError(f'Нет пользователя {options["username"]}')
+        if options['format'] == 'zip':
+            chunks = export.zip_archive(user)
+        else:
+            chunks = export.jsonl(user)
+        if options['output'] == '-':
+            output = sys.stdout.buffer
+            for chunk in chunks:
+                output.write(chunk)
+            output.flush()
+            return
+        with open(options['output'], 'wb') as output:
+            for chunk in chunks:
+                output.write(chunk)
+        self.stderr.write(f'Выгрузка записана в {options["output"]}.')
@@ -0,0 +1,57 @@
+import os
+import time
+from multiprocessing import Pool
+
+from django.core.management.base import BaseCommand
+from django.db import connection, connections
+
+from posts.listing_cache import bump_generation
+from posts.models import Post
+from posts.thumbnails import make_thumbnail
+
+
+def _generate(post_id):
+    try:
+        return make_thumbnail(post_id)
+    finally:
+        connection.close()
+
+
+class Command(BaseCommand):
+    help = (
+        'Строит недостающие миниатюры картинок постов '
+        'в пуле процессов по числу ядер.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--workers', type=int, default=os.cpu_count(),
+            help='Число процессов (по умолчанию — число ядер).',
+        )
+        parser.add_argument(
+            '--chunk-size', type=int, default=16,
+            help='Сколько постов отдавать процессу за раз.',
+        )
+
+    def handle(self, *args, **options):
+        post_ids = list(
+            Post.objects.exclude(image='').filter(thumbnail='').values_list(
+                'pk', flat=True
+            )
+        )
+        if not post_ids:
+            self.stdout.write('Все миниатюры уже построены.')
+            return
+        started = time.monotonic()
+        # Дочерние процессы не должны наследовать открытые соединения.
+        connections.close_all()
+        with Pool(options['workers']) as pool:
+            done = sum(pool.imap_unordered(
+                _generate, post_ids, options['chunk_size']
+            ))
+        bump_generation()
+        elapsed = time.monotonic() - started
+        self.stdout.write(self.style.SUCCESS(
+            f'Построено миниатюр: {done} из {len(post_ids)} '
+            f'за {elapsed:.1f} с.'
+        ))
@@ -0,0 +1,100 @@
+import os
+import time
+from itertools import islice
+
+from django.core.management.base import BaseCommand, CommandError
+
+from posts.importer import Importer, RECORD_TYPES, read_records
+
+
+class Command(BaseCommand):
+    help = (
+        'Загружает группы, посты, комментарии и подписки из JSONL или CSV '
+        'порциями через bulk_create. Формат записей описан в '
+        'posts/importer.py.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='Файл .jsonl или .csv.')
+        parser.add_argument(
+            '--format', choices=('jsonl', 'csv'),
+            help='Формат файла (по умолчанию — по расширению).',
+        )
+        parser.add_argument(
+            '--chunk-size', type=int, default=5000,
+            help='Сколько записей вставлять в одной транзакции.',
+        )
+        parser.add_argument(
+            '--create-users', action='store_true',
+            help='Заводить отсутствующих авторов без пароля.',
+        )
+        parser.add_argument(
+            '--images-dir',
+            help='Каталог картинок: они копируются в MEDIA_ROOT/posts/.',
+        )
+        parser.add_argument(
+            '--image-workers', type=int, default=4,
+            help='Сколько картинок копировать параллельно.',
+        )
+        parser.add_argument(
+            '--resume', action='store_true',
+            help='Продолжить с последней сохраненной порции.',
+        )
+        parser.add_argument(
+            '--state',
+            help='Файл прогресса (по умолчанию <path>.progress).',
+        )
+
+    def handle(self, *args, **options):
+        path = options['path']
+        if not os.path.exists(path):
+            raise CommandError(f'Нет файла {path}')
+        state = options['state'] or path + '.progress'
+        done = 0
+        if options['resume'] and os.path.exists(state):
+            with open(state) as progress:
+                done = int(progress.read().strip() or 0)
+            self.stdout.write(f'Продолжаем с записи {done + 1}.')
+        importer = Importer(
+            create_users=options['create_users'],
+            images_dir=options['images_dir'],
+            image_workers=options['image_workers'],
+        )
+        records = enumerate(
+            read_records(path, options['format']), start=1
+        )
+        records = islice(records, done, None)
+        started = time.monotonic()
+        count = errors = 0
+        while True:
+            chunk = list(islice(records, options['chunk_size']))
+            if not chunk:
+                break
+            importer.import_chunk(chunk)
+            errors += len(importer.errors)
+            for number, message in importer.errors:
+                self.stderr.write(f'Запись {number}: {message}')
+            importer.errors.clear()
+            done = chunk[-1][0]
+            count += len(chunk)
+            # Прогресс пишется только после коммита порции.
+            with open(state, 'w') as progress:
+                progress.write(str(done))
+            elapsed = time.monotonic() - started
+            self.stdout.write(
+                f'Записей: {done}, ошибок: {errors}, '
+                f'{count / elapsed if elapsed else 0:.0f} записей/с'
+            )
+        importer.finish()
+        if os.path.exists(state):
+            os.remove(state)
+        totals = ', '.join(
+            f'{kind}: {importer.processed[kind]}' for kind in RECORD_TYPES
+        )
+        elapsed = time.monotonic() - started
+        self.stdout.write(self.style.SUCCESS(
+            f'Импорт завершен за {elapsed:.1f} с ({totals}; '
+            f'уже были в базе: {importer.skipped}, '
+            f'ошибок: {errors}). '
+            f'Миниатюры строит generate_thumbnails.'
+        ))
@@ -0,0 +1,32 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from posts import search
+
+
+class Command(BaseCommand):
+    help = (
+        'Перестраивает полнотекстовый индекс постов в теневой таблице, '
+        'читая посты порциями по первичному ключу, и подменяет им '
+        'рабочий индекс.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--chunk-size', type=int, default=1000,
+            help='Сколько постов читать и индексировать за раз.',
+        )
+
+    def handle(self, *args, **options):
+        started = time.monotonic()
+        done = 0
+        # Каждая порция — своя транзакция; поиск до подмены читает
+        # прежний индекс.
+        for done in search.rebuild(options['chunk_size']):
+            if options['verbosity'] > 1:
+                self.stdout.write(f'Проиндексировано: {done}')
+        elapsed = time.monotonic() - started
+        self.stdout.write(self.style.SUCCESS(
+            f'Проиндексировано постов: {done} за {elapsed:.1f} с.'
+        ))
@@ -0,0 +1,34 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from posts.blobs import sweep
+from posts.post_settings import BLOB_GRACE
+
+
+class Command(BaseCommand):
+    help = (
+        'Удаляет картинки постов, на которые нет ссылок дольше '
+        'POSTS_BLOB_GRACE секунд, вместе с копиями и миниатюрами.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--grace', type=float, default=BLOB_GRACE,
+            help='Сколько секунд файл должен пробыть без ссылок.',
+        )
+        parser.add_argument(
+            '--interval', type=float,
+            help='Повторять каждые N секунд. Без него проходит '
+                 'один раз (например, из cron).',
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            removed = sweep(options['grace'])
+            self.stdout.write(self.style.SUCCESS(
+                f'Удалено файлов без ссылок: {removed}.'
+            ))
+            if not options['interval']:
+                return
+            time.sleep(options['interval'])
@@ -0,0 +1,29 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from posts.timeline import TIMELINE_SIZE, trim_all
+
+
+class Command(BaseCommand):
+    help = (
+        'Обрезает ленты подписок длиннее POSTS_TIMELINE_SIZE записей '
+        'порциями по нескольку лент в транзакции.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--interval', type=float,
+            help='Повторять каждые N секунд. Без него обрезает '
+                 'один раз (например, из cron).',
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            trimmed = trim_all()
+            self.stdout.write(self.style.SUCCESS(
+                f'Обрезано лент: {trimmed} (до {TIMELINE_SIZE} записей).'
+            ))
+            if not options['interval']:
+                return
+            time.sleep(options['interval'])
@@ -0,0 +1,28 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from posts.trending import compute
+
+
+class Command(BaseCommand):
+    help = 'Пересчитывает рейтинг «В тренде» по свежим комментариям.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--interval', type=float,
+            help='Пересчитывать каждые N секунд. Без него считает '
+                 'один раз (например, из cron).',
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            started = time.monotonic()
+            ranked = compute()
+            elapsed = time.monotonic() - started
+            self.stdout.write(self.style.SUCCESS(
+                f'В тренде {ranked} постов, посчитано за {elapsed:.2f} с.'
+            ))
+            if not options['interval']:
+                return
+            time.sleep(options['interval'])
@@ -0,0 +1,59 @@
+# Generated by Django 2.2.16 on 2026-10-18 02:24
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+TIMELINE_SIZE = 800
+
+
+def backfill_timelines(apps, schema_editor):
+    Follow = apps.get_model('posts', 'Follow')
+    Post = apps.get_model('posts', 'Post')
+    Timeline = apps.get_model('posts', 'Timeline')
+    follows = Follow.objects.values_list('user_id', 'author_id').distinct()
+    for user_id, author_id in follows.iterator():
+        posts = Post.objects.filter(author_id=author_id).order_by(
+            '-pub_date', '-id'
+        ).values_list('id', 'pub_date')[:TIMELINE_SIZE]
+        Timeline.objects.bulk_create(
+            [
+                Timeline(user_id=user_id, post_id=post_id, pub_date=pub_date)
+                for post_id, pub_date in posts
+            ],
+            ignore_conflicts=True,
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('posts', '0010_follow'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Timeline',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('pub_date', models.DateTimeField(verbose_name='Дата публикации')),
+                ('post', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='timeline', to='posts.Post', verbose_name='Пост')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='timeline', to=settings.AUTH_USER_MODEL, verbose_name='Читатель')),
+            ],
+            options={
+                'ordering': ['-pub_date', '-id'],
+            },
+        ),
+        migrations.AddIndex(
+            model_name='timeline',
+            index=models.Index(fields=['user', '-pub_date'], name='timeline_user_pub_idx'),
+        ),
+        migrations.AlterUniqueTogether(
+            name='timeline',
+            unique_together={('user', 'post')},
+        ),
+        migrations.RunPython(
+            backfill_timelines, migrations.RunPython.noop
+        ),
+    ]
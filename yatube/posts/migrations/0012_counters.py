@@ -0,0 +1,71 @@
+# Generated by Django 2.2.16 on 2026-10-18 02:28
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models.functions import Coalesce
+import django.db.models.deletion
+
+# Поле AuthorStats: (модель, поле связи с пользователем) на момент
+# миграции.
+STATS_FIELDS = {
+    'posts_count': ('Post', 'author'),
+    'followers_count': ('Follow', 'author'),
+    'following_count': ('Follow', 'user'),
+}
+
+
+def _count(model, field):
+    rows = model.objects.filter(**{field: models.OuterRef('pk')}).order_by()
+    return Coalesce(
+        models.Subquery(
+            rows.values(field).annotate(
+                total=models.Count('pk')
+            ).values('total'),
+            output_field=models.IntegerField(),
+        ),
+        0,
+    )
+
+
+def recount_counters(apps, schema_editor):
+    User = apps.get_model(settings.AUTH_USER_MODEL)
+    Post = apps.get_model('posts', 'Post')
+    Comment = apps.get_model('posts', 'Comment')
+    AuthorStats = apps.get_model('posts', 'AuthorStats')
+    AuthorStats.objects.bulk_create(
+        (AuthorStats(user_id=pk) for pk in User.objects.values_list(
+            'pk', flat=True
+        ).iterator()),
+        batch_size=1000,
+    )
+    AuthorStats.objects.update(**{
+        name: _count(apps.get_model('posts', model), field)
+        for name, (model, field) in STATS_FIELDS.items()
+    })
+    Post.objects.update(comments_count=_count(Comment, 'post'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth', '0011_update_proxy_permissions'),
+        ('posts', '0011_timeline'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AuthorStats',
+            fields=[
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='stats', serialize=False, to=settings.AUTH_USER_MODEL, verbose_name='Пользователь')),
+                ('posts_count', models.PositiveIntegerField(default=0, verbose_name='Постов')),
+                ('followers_count', models.PositiveIntegerField(default=0, verbose_name='Подписчиков')),
+                ('following_count', models.PositiveIntegerField(default=0, verbose_name='Подписок')),
+            ],
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='comments_count',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Количество комментариев'),
+        ),
+        migrations.RunPython(recount_counters, migrations.RunPython.noop),
+    ]
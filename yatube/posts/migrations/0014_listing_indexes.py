@@ -0,0 +1,66 @@
+# Generated by Django 2.2.16 on 2026-10-18 02:33
+
+from django.db import migrations, models
+import django.db.models.expressions
+
+
+def remove_duplicate_follows(apps, schema_editor):
+    Follow = apps.get_model('posts', 'Follow')
+    Follow.objects.filter(user=models.F('author')).delete()
+    keep = Follow.objects.values('user', 'author').annotate(
+        keep_id=models.Min('id')
+    ).values('keep_id')
+    Follow.objects.exclude(id__in=keep).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0013_post_thumbnail'),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name='post',
+            options={'ordering': ['-pub_date', '-id']},
+        ),
+        migrations.AlterModelOptions(
+            name='timeline',
+            options={'ordering': ['-pub_date', '-post']},
+        ),
+        migrations.RemoveIndex(
+            model_name='timeline',
+            name='timeline_user_pub_idx',
+        ),
+        migrations.AddIndex(
+            model_name='comment',
+            index=models.Index(fields=['post', 'created'], name='comment_post_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='post',
+            index=models.Index(fields=['pub_date'], name='post_pub_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='post',
+            index=models.Index(fields=['author', 'pub_date'], name='post_author_pub_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='post',
+            index=models.Index(fields=['group', 'pub_date'], name='post_group_pub_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='timeline',
+            index=models.Index(fields=['user', 'pub_date', 'post'], name='timeline_user_pub_post_idx'),
+        ),
+        migrations.RunPython(
+            remove_duplicate_follows, migrations.RunPython.noop
+        ),
+        migrations.AddConstraint(
+            model_name='follow',
+            constraint=models.UniqueConstraint(fields=('user', 'author'), name='unique_follow'),
+        ),
+        migrations.AddConstraint(
+            model_name='follow',
+            constraint=models.CheckConstraint(check=models.Q(_negated=True, user=django.db.models.expressions.F('author')), name='follow_not_self'),
+        ),
+    ]
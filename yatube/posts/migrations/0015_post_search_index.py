@@ -0,0 +1,45 @@
+from django.db import migrations
+
+FTS_TABLE = 'posts_post_fts'
+
+
+def create_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    # Основы слов должны совпадать с основами запросов, поэтому берется
+    # стеммер проекта: чистая функция без моделей.
+    from posts.stemmer import stem_words
+    Post = apps.get_model('posts', 'Post')
+    rows = Post.objects.values_list('pk', 'text', 'group__title').order_by()
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute(
+            f'CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING '
+            f"fts5(text, title, tokenize='unicode61 remove_diacritics 2')"
+        )
+        cursor.executemany(
+            f'INSERT INTO {FTS_TABLE} (rowid, text, title) '
+            f'VALUES (%s, %s, %s)',
+            [
+                (pk, ' '.join(stem_words(text)),
+                 ' '.join(stem_words(title or '')))
+                for pk, text, title in rows.iterator()
+            ],
+        )
+
+
+def drop_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute(f'DROP TABLE IF EXISTS {FTS_TABLE}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0014_listing_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_index, drop_index),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 2.2.16 on 2026-10-18 02:59
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0015_post_search_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='post',
+            name='renditions',
+            field=models.CharField(blank=True, editable=False, max_length=255, verbose_name='Ширины копий картинки'),
+        ),
+    ]
@@ -0,0 +1,42 @@
+# Generated by Django 2.2.16 on 2026-10-18 03:04
+
+from django.db import migrations, models
+import posts.storage
+
+
+def count_references(apps, schema_editor):
+    """Ссылки уже загруженных картинок: их имена остаются прежними."""
+    Blob = apps.get_model('posts', 'Blob')
+    Post = apps.get_model('posts', 'Post')
+    references = Post.objects.exclude(image='').values('image').annotate(
+        refs=models.Count('id')
+    ).order_by()
+    Blob.objects.bulk_create(
+        [Blob(name=row['image'], refs=row['refs']) for row in references],
+        batch_size=500,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0016_post_renditions'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Blob',
+            fields=[
+                ('name', models.CharField(max_length=255, primary_key=True, serialize=False, verbose_name='Имя файла')),
+                ('refs', models.PositiveIntegerField(default=0, verbose_name='Число ссылок')),
+            ],
+        ),
+        migrations.AlterField(
+            model_name='post',
+            name='image',
+            field=models.ImageField(blank=True, storage=posts.storage.ContentAddressedStorage(), upload_to='posts/', verbose_name='Картинка'),
+        ),
+        migrations.RunPython(
+            count_references, migrations.RunPython.noop
+        ),
+    ]
@@ -0,0 +1,26 @@
+# Generated by Django 2.2.16 on 2026-10-18 03:14
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0017_blob'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TrendingPost',
+            fields=[
+                ('rank', models.PositiveIntegerField(primary_key=True, serialize=False, verbose_name='Место')),
+                ('score', models.FloatField(verbose_name='Рейтинг')),
+                ('computed', models.DateTimeField(verbose_name='Посчитан')),
+                ('post', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='trending', to='posts.Post', verbose_name='Пост')),
+            ],
+            options={
+                'ordering': ['rank'],
+            },
+        ),
+    ]
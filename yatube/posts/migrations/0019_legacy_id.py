@@ -0,0 +1,23 @@
+# Generated by Django 2.2.16 on 2026-10-18 03:23
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0018_trendingpost'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='comment',
+            name='legacy_id',
+            field=models.PositiveIntegerField(blank=True, editable=False, null=True, unique=True, verbose_name='Id на старой платформе'),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='legacy_id',
+            field=models.PositiveIntegerField(blank=True, editable=False, null=True, unique=True, verbose_name='Id на старой платформе'),
+        ),
+    ]
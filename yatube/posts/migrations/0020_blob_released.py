@@ -0,0 +1,18 @@
+# Generated by Django 2.2.16 on 2026-10-18 03:31
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0019_legacy_id'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='blob',
+            name='released',
+            field=models.DateTimeField(blank=True, db_index=True, null=True, verbose_name='Последняя ссылка отдана'),
+        ),
+    ]
@@ -1,9 +1,16 @@
 from django.contrib.auth import get_user_model
+from django.core.files.storage import default_storage
 from django.db import models
-from core.models import CreatedModel
+from django.templatetags.static import static
+from core.models import AtomicSaveMixin, CreatedModel, StoredFieldsMixin
+
+from . import renditions
+from .storage import media_storage
 
 User = get_user_model()
 
+THUMBNAIL_PLACEHOLDER = 'img/thumbnail_placeholder.svg'
+
 
 class Group(models.Model):
 
@@ -15,7 +22,8 @@ class Group(models.Model):
         return self.title
 
 
-class Post(models.Model):
+class Post(StoredFieldsMixin, AtomicSaveMixin, models.Model):
+    stored_fields = ('author_id',)
 
     text = models.TextField(
         verbose_name='Текст поста',
@@ -41,17 +49,102 @@ class Post(models.Model):
     image = models.ImageField(
         'Картинка',
         upload_to='posts/',
+        storage=media_storage,
         blank=True
     )
+    thumbnail = models.CharField(
+        'Миниатюра',
+        max_length=255,
+        blank=True,
+        editable=False,
+    )
+    renditions = models.CharField(
+        'Ширины копий картинки',
+        max_length=255,
+        blank=True,
+        editable=False,
+    )
+    comments_count = models.PositiveIntegerField(
+        'Количество комментариев',
+        default=0,
+        editable=False,
+    )
+    legacy_id = models.PositiveIntegerField(
+        'Id на старой платформе',
+        unique=True,
+        null=True,
+        blank=True,
+        editable=False,
+    )
 
     class Meta:
-        ordering = ['-pub_date']
+        ordering = ['-pub_date', '-id']
+        indexes = [
+            models.Index(fields=['pub_date'], name='post_pub_idx'),
+            models.Index(
+                fields=['author', 'pub_date'], name='post_author_pub_idx'
+            ),
+            models.Index(
+                fields=['group', 'pub_date'], name='post_group_pub_idx'
+            ),
+        ]
 
     def __str__(self):
         return self.text[:15]
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Имя картинки в базе: по нему post_save замечает ее замену.
+        instance.stored_image = instance.__dict__.get('image')
+        return instance
+
+    def _srcset(self, fmt):
+        widths = self.renditions.split()
+        sources = []
+        for width in widths:
+            if fmt == renditions.JPEG and width == widths[-1]:
+                # Полноразмерный JPEG хранится в самом поле image.
+                url = self.image.url
+            else:
+                url = default_storage.url(
+                    renditions.rendition_name(self.image.name, width, fmt)
+                )
+            sources.append(f'{url} {width}w')
+        return ', '.join(sources)
+
+    @property
+    def webp_srcset(self):
+        """srcset копий картинки в WebP (пусто, пока их нет)."""
+        return self._srcset(renditions.WEBP)
+
+    @property
+    def jpeg_srcset(self):
+        return self._srcset(renditions.JPEG)
+
+    @property
+    def thumbnail_url(self):
+        """Готовая миниатюра или заглушка, пока она строится."""
+        if self.thumbnail:
+            return default_storage.url(self.thumbnail)
+        return static(THUMBNAIL_PLACEHOLDER)
+
+
+class Blob(models.Model):
+    """Файл хранилища картинок и число постов, которые на него ссылаются."""
+    name = models.CharField('Имя файла', max_length=255, primary_key=True)
+    refs = models.PositiveIntegerField('Число ссылок', default=0)
+    released = models.DateTimeField(
+        'Последняя ссылка отдана', null=True, blank=True, db_index=True
+    )
+
+    def __str__(self):
+        return self.name
+
+
+class Comment(StoredFieldsMixin, AtomicSaveMixin, CreatedModel):
+    stored_fields = ('post_id',)
 
-class Comment(CreatedModel):
     post = models.ForeignKey(
         Post,
         related_name='comments',
@@ -69,15 +162,29 @@ class Comment(CreatedModel):
         verbose_name='Текст комментария',
         help_text='Введите Ваш комментарий'
     )
+    legacy_id = models.PositiveIntegerField(
+        'Id на старой платформе',
+        unique=True,
+        null=True,
+        blank=True,
+        editable=False,
+    )
 
     class Meta:
         ordering = ['-created']
+        indexes = [
+            models.Index(
+                fields=['post', 'created'], name='comment_post_created_idx'
+            ),
+        ]
 
     def __str__(self):
         return self.text[:15]
 
 
-class Follow(models.Model):
+class Follow(StoredFieldsMixin, AtomicSaveMixin, models.Model):
+    stored_fields = ('user_id', 'author_id')
+
     user = models.ForeignKey(
         User,
         on_delete=models.CASCADE,
@@ -89,4 +196,80 @@ class Follow(models.Model):
         on_delete=models.CASCADE,
         related_name='following',
         verbose_name='Подписан на',
-    )
\ No newline at end of file
+    )
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'author'], name='unique_follow'
+            ),
+            models.CheckConstraint(
+                check=~models.Q(user=models.F('author')),
+                name='follow_not_self',
+            ),
+        ]
+
+
+class Timeline(models.Model):
+    """Материализованная лента подписок: запись на пару (читатель, пост)."""
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='timeline',
+        verbose_name='Читатель',
+    )
+    post = models.ForeignKey(
+        Post,
+        on_delete=models.CASCADE,
+        related_name='timeline',
+        verbose_name='Пост',
+    )
+    pub_date = models.DateTimeField(
+        verbose_name='Дата публикации',
+    )
+
+    class Meta:
+        ordering = ['-pub_date', '-post']
+        unique_together = ('user', 'post')
+        indexes = [
+            models.Index(
+                fields=['user', 'pub_date', 'post'],
+                name='timeline_user_pub_post_idx',
+            ),
+        ]
+
+
+class TrendingPost(models.Model):
+    """Строка рейтинга «В тренде», которую пакетно пишет posts.trending."""
+    rank = models.PositiveIntegerField('Место', primary_key=True)
+    post = models.OneToOneField(
+        Post,
+        on_delete=models.CASCADE,
+        related_name='trending',
+        verbose_name='Пост',
+    )
+    score = models.FloatField('Рейтинг')
+    computed = models.DateTimeField('Посчитан')
+
+    class Meta:
+        ordering = ['rank']
+
+    def __str__(self):
+        return f'{self.rank}: {self.post_id}'
+
+
+class AuthorStats(models.Model):
+    """Денормализованные счетчики пользователя."""
+    user = models.OneToOneField(
+        User,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='stats',
+        verbose_name='Пользователь',
+    )
+    posts_count = models.PositiveIntegerField('Постов', default=0)
+    followers_count = models.PositiveIntegerField('Подписчиков', default=0)
+    following_count = models.PositiveIntegerField('Подписок', default=0)
+
+    def __str__(self):
+        return str(self.user)
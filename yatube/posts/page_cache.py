@@ -0,0 +1,141 @@
+"""
+Кеш целых страниц для анонимных читателей.
+
+Страница анонима одна на всех: в шапке нет имени, нет формы комментария
+и кнопки подписки. Поэтому ответ на GET без входа хранится целиком под
+ключом из пути и параметров страницы (page_key); версия записи —
+поколение кеша лент (записи в посты и комментарии) и версия страниц
+(подписки и группы, см. signals). Устаревшую страницу перерисовывает
+один запрос, остальные тем временем получают прежнюю (core.stampede)
+с пометкой stale и без права хранить ее у себя.
+Пользователи со входом кеш обходят: общие части их страниц кешируются
+фрагментами. Ответ, который выдал CSRF-токен или ставит cookie, не
+кешируется.
+"""
+import hashlib
+import re
+from functools import partial, wraps
+from urllib.parse import urlencode
+
+from django.core import signing
+from django.http import HttpResponse
+from django.utils.cache import patch_cache_control
+
+from core.stampede import fetch_state
+
+from .listing_cache import bump_generation, generation
+from .paginators import CURSOR_SALT
+from .post_settings import PAGE_CACHE_TIMEOUT
+
+VERSION_KEY = 'posts:page:version'
+# Параметры, которые читают кешируемые view: номер страницы и курсоры
+# ленты и комментариев.
+PAGE_PARAM = 'page'
+CURSOR_PARAMS = ('cursor', 'comments')
+PAGE_NUMBER = re.compile(r'[1-9][0-9]{0,8}')
+
+
+def version():
+    """Версия страниц: меняется при записях, которых нет в лентах."""
+    return generation(VERSION_KEY)
+
+
+def bump():
+    bump_generation(VERSION_KEY)
+
+
+def _valid_cursor(value):
+    try:
+        signing.loads(value, salt=CURSOR_SALT)
+    except signing.BadSignature:
+        return False
+    return True
+
+
+def page_key(request):
+    """
+    Ключ страницы или None, если ее не кешировать.
+
+    Другие параметры (utm_* и любой мусор) страницу не меняют и в ключ не
+    входят, как и битые курсоры (view их не замечает): иначе копиями
+    одной страницы можно забить кеш. Номер страницы не в каноническом
+    виде кеш обходит.
+    """
+    params = []
+    page = request.GET.get(PAGE_PARAM)
+    if page is not None:
+        if not PAGE_NUMBER.fullmatch(page):
+            return None
+        params.append((PAGE_PARAM, page))
+    for name in CURSOR_PARAMS:
+        value = request.GET.get(name)
+        if value and _valid_cursor(value):
+            params.append((name, value))
+    path = hashlib.sha1(
+        f'{request.path}?{urlencode(params)}'.encode()
+    ).hexdigest()
+    return f'posts:page:{path}'
+
+
+def cacheable(request, response):
+    return (
+        response.status_code == 200
+        and not response.streaming
+        and not response.cookies
+        and not request.META.get('CSRF_COOKIE_USED')
+    )
+
+
+class Uncacheable(Exception):
+    """Ответ view нельзя класть в общий кеш."""
+
+    def __init__(self, response):
+        super().__init__()
+        self.response = response
+
+
+def anonymous_page(view=None, *, extra_version=None):
+    """
+    Декоратор view: GET анонима отдается из кеша целиком.
+    extra_version() — дополнительная версия страницы, например поколение
+    ленты «В тренде».
+    """
+    if view is None:
+        return partial(anonymous_page, extra_version=extra_version)
+
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        if (
+            not PAGE_CACHE_TIMEOUT
+            or request.method != 'GET'
+            or request.user.is_authenticated
+        ):
+            return view(request, *args, **kwargs)
+        key = page_key(request)
+        if key is None:
+            return view(request, *args, **kwargs)
+
+        def render():
+            response = view(request, *args, **kwargs)
+            if not cacheable(request, response):
+                raise Uncacheable(response)
+            return response.content, response['Content-Type']
+
+        try:
+            (content, content_type), stale = fetch_state(
+                key, render, PAGE_CACHE_TIMEOUT,
+                (
+                    generation(), version(),
+                    extra_version() if extra_version else None,
+                ),
+            )
+        except Uncacheable as error:
+            return error.response
+        response = HttpResponse(content, content_type=content_type)
+        if stale:
+            # Прежняя версия страницы: валидаторы текущей версии к ней не
+            # подходят (conditional_page их снимает), хранить ее нельзя.
+            response.stale = True
+            patch_cache_control(response, no_store=True)
+        return response
+    return wrapper
@@ -0,0 +1,219 @@
+from collections.abc import Sequence
+
+from django.core import signing
+from django.core.exceptions import FieldDoesNotExist, ValidationError
+from django.core.paginator import Page, Paginator
+from django.db.models import Q
+from django.utils.functional import cached_property
+
+from .post_settings import PAGINATOR_WINDOW
+
+CURSOR_SALT = 'posts.cursor'
+NEXT = 'n'
+PREVIOUS = 'p'
+
+
+class WindowedPage(Page):
+
+    def page_window(self):
+        return self.paginator.page_window(self.number)
+
+
+class WindowedPaginator(Paginator):
+    """
+    Паджинатор с окном номеров страниц вокруг текущей.
+
+    count — готовое число объектов или функция, которая его вернет
+    (например, из кеша или денормализованного счетчика); без него
+    выполняется COUNT(*).
+    """
+
+    def __init__(self, object_list, per_page, count=None,
+                 window=PAGINATOR_WINDOW, **kwargs):
+        super().__init__(object_list, per_page, **kwargs)
+        self.known_count = count
+        self.window = window
+
+    @cached_property
+    def count(self):
+        if self.known_count is None:
+            return super().count
+        if callable(self.known_count):
+            return self.known_count()
+        return self.known_count
+
+    def page_window(self, number):
+        """
+        Номера страниц для навигации: первая, последняя и window соседей
+        текущей. None обозначает пропуск; пропуск в одну страницу
+        заменяется самой страницей.
+        """
+        last = self.num_pages
+        pages = {1, last}
+        pages.update(range(
+            max(1, number - self.window),
+            min(last, number + self.window) + 1,
+        ))
+        window = []
+        previous = 0
+        for page in sorted(pages):
+            if page - previous == 2:
+                window.append(page - 1)
+            elif page - previous > 2:
+                window.append(None)
+            window.append(page)
+            previous = page
+        return window
+
+    def _get_page(self, *args, **kwargs):
+        return WindowedPage(*args, **kwargs)
+
+
+class CursorPage(Sequence):
+    """Страница keyset-паджинации, совместимая с шаблонами Page."""
+
+    def __init__(self, object_list, paginator, next_cursor=None,
+                 previous_cursor=None, cursor=None):
+        self.object_list = object_list
+        self.paginator = paginator
+        self.cursor = cursor
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+
+    def __repr__(self):
+        return '<CursorPage of %s objects>' % len(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __getitem__(self, index):
+        return self.object_list[index]
+
+    def has_next(self):
+        return self.next_cursor is not None
+
+    def has_previous(self):
+        return self.previous_cursor is not None
+
+    def has_other_pages(self):
+        return self.has_next() or self.has_previous()
+
+
+class CursorPaginator:
+    """
+    Паджинатор по ключу сортировки вместо OFFSET.
+
+    Страница выбирается условием по последнему показанному ключу
+    (по умолчанию (pub_date, id)), поэтому глубокие страницы стоят
+    столько же, сколько первая, а COUNT(*) не выполняется.
+    """
+    cursor = True
+
+    def __init__(self, queryset, per_page, ordering=('-pub_date', '-id')):
+        self.queryset = queryset
+        self.per_page = int(per_page)
+        self.ordering = tuple(ordering)
+        self.descending = self.ordering[0].startswith('-')
+        self.fields = [name.lstrip('-') for name in self.ordering]
+
+    def _reversed_ordering(self):
+        if self.descending:
+            return self.fields
+        return ['-' + name for name in self.fields]
+
+    def _key(self, obj):
+        # Строки values() — словари.
+        if isinstance(obj, dict):
+            return [obj[name] for name in self.fields]
+        return [getattr(obj, name) for name in self.fields]
+
+    def _field(self, name):
+        """Поле модели или аннотации queryset, по которому идет сортировка."""
+        annotation = self.queryset.query.annotations.get(name)
+        if annotation is not None:
+            return annotation.output_field
+        return self.queryset.model._meta.get_field(name)
+
+    def encode_cursor(self, direction, obj):
+        values = [
+            value.isoformat() if hasattr(value, 'isoformat') else value
+            for value in self._key(obj)
+        ]
+        return signing.dumps([direction, values], salt=CURSOR_SALT)
+
+    def decode_cursor(self, cursor):
+        """Возвращает (направление, ключ) или None для битого курсора."""
+        try:
+            direction, values = signing.loads(cursor, salt=CURSOR_SALT)
+            if direction not in (NEXT, PREVIOUS):
+                return None
+            if len(values) != len(self.fields):
+                return None
+            key = [
+                self._field(name).to_python(value)
+                for name, value in zip(self.fields, values)
+            ]
+        except (signing.BadSignature, TypeError, ValueError,
+                ValidationError, FieldDoesNotExist):
+            return None
+        return direction, key
+
+    def _seek(self, key, after):
+        """
+        Условие «строго после ключа» в порядке сортировки (after=True)
+        или «строго до ключа» (after=False).
+        """
+        lookup = 'lt' if self.descending == after else 'gt'
+        condition = Q()
+        for position, name in enumerate(self.fields):
+            step = Q(**{f'{name}__{lookup}': key[position]})
+            for prev_name, prev_value in zip(
+                self.fields[:position], key[:position]
+            ):
+                step &= Q(**{prev_name: prev_value})
+            condition |= step
+        # Избыточная граница по первому полю делает условие диапазоном
+        # по индексу: без неё OR заставляет читать индекс с начала.
+        bound = Q(**{f'{self.fields[0]}__{lookup}e': key[0]})
+        return bound & condition
+
+    def get_page(self, cursor=None):
+        """Возвращает страницу; битый или пустой курсор — первая страница."""
+        decoded = self.decode_cursor(cursor) if cursor else None
+        if decoded is None:
+            rows = list(
+                self.queryset.order_by(*self.ordering)[:self.per_page + 1]
+            )
+            has_more = len(rows) > self.per_page
+            rows = rows[:self.per_page]
+            return self._make_page(rows, has_next=has_more, has_previous=False)
+        direction, key = decoded
+        if direction == NEXT:
+            rows = list(
+                self.queryset.filter(self._seek(key, after=True))
+                .order_by(*self.ordering)[:self.per_page + 1]
+            )
+            has_more = len(rows) > self.per_page
+            rows = rows[:self.per_page]
+            return self._make_page(
+                rows, has_next=has_more, has_previous=True, cursor=cursor
+            )
+        rows = list(
+            self.queryset.filter(self._seek(key, after=False))
+            .order_by(*self._reversed_ordering())[:self.per_page + 1]
+        )
+        has_more = len(rows) > self.per_page
+        rows = rows[:self.per_page][::-1]
+        if not rows:
+            return self.get_page()
+        return self._make_page(
+            rows, has_next=True, has_previous=has_more, cursor=cursor
+        )
+
+    def _make_page(self, rows, has_next, has_previous, cursor=None):
+        next_cursor = previous_cursor = None
+        if rows and has_next:
+            next_cursor = self.encode_cursor(NEXT, rows[-1])
+        if rows and has_previous:
+            previous_cursor = self.encode_cursor(PREVIOUS, rows[0])
+        return CursorPage(rows, self, next_cursor, previous_cursor, cursor)
@@ -1,3 +1,32 @@
+import os
+
 from django.conf import settings
 
 PAGINATOR_SET = getattr(settings, 'POSTS_PAGINATOR_SET', 10)
+COMMENTS_PAGE_SIZE = getattr(settings, 'POSTS_COMMENTS_PAGE_SIZE', 20)
+PAGINATOR_WINDOW = getattr(settings, 'POSTS_PAGINATOR_WINDOW', 2)
+PAGINATION_MODE = getattr(settings, 'POSTS_PAGINATION_MODE', 'page')
+TIMELINE_SIZE = getattr(settings, 'POSTS_TIMELINE_SIZE', 800)
+TIMELINE_FANOUT_LIMIT = getattr(settings, 'POSTS_TIMELINE_FANOUT_LIMIT', 10000)
+LISTING_CACHE_TIMEOUT = getattr(
+    settings, 'POSTS_LISTING_CACHE_TIMEOUT', 60 * 60 * 4
+)
+PAGE_CACHE_TIMEOUT = getattr(settings, 'POSTS_PAGE_CACHE_TIMEOUT', 60 * 10)
+FEED_SIZE = getattr(settings, 'POSTS_FEED_SIZE', 20)
+THUMBNAIL_WORKERS = getattr(settings, 'POSTS_THUMBNAIL_WORKERS', 2)
+IMAGE_MAX_SIDE = getattr(settings, 'POSTS_IMAGE_MAX_SIDE', 2048)
+IMAGE_WIDTHS = getattr(settings, 'POSTS_IMAGE_WIDTHS', (480, 960, 1600))
+IMAGE_WORKERS = getattr(settings, 'POSTS_IMAGE_WORKERS', 2)
+BLOB_GRACE = getattr(settings, 'POSTS_BLOB_GRACE', 60 * 60 * 24)
+TRENDING_WINDOW = getattr(settings, 'POSTS_TRENDING_WINDOW', 72)
+TRENDING_HALF_LIFE = getattr(settings, 'POSTS_TRENDING_HALF_LIFE', 12)
+TRENDING_SIZE = getattr(settings, 'POSTS_TRENDING_SIZE', 200)
+SEARCH_BACKEND = getattr(
+    settings, 'POSTS_SEARCH_BACKEND', 'posts.search.SQLiteFTSBackend'
+)
+EXPORT_DIR = getattr(
+    settings, 'POSTS_EXPORT_DIR', os.path.join(settings.BASE_DIR, 'exports')
+)
+EXPORT_MAX_AGE = getattr(settings, 'POSTS_EXPORT_MAX_AGE', 60 * 60 * 24)
+API_PAGE_SIZE = getattr(settings, 'POSTS_API_PAGE_SIZE', 20)
+API_MAX_PAGE_SIZE = getattr(settings, 'POSTS_API_MAX_PAGE_SIZE', 100)
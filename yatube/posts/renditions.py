@@ -0,0 +1,80 @@
+"""
+Перекодирование загруженных картинок.
+
+Модуль не импортирует Django: encode выполняется в дочерних процессах
+пула, которые не настраивают проект.
+"""
+import os
+from io import BytesIO
+
+from PIL import Image, ImageOps
+
+DIRECTORY = 'posts/renditions'
+WEBP = 'webp'
+JPEG = 'jpeg'
+EXTENSIONS = {WEBP: 'webp', JPEG: 'jpg'}
+# Фон для прозрачных картинок в JPEG.
+BACKGROUND = (255, 255, 255)
+
+
+def rendition_directory(image_name):
+    """Каталог копий картинки поста в хранилище."""
+    stem = os.path.splitext(os.path.basename(image_name))[0]
+    return f'{DIRECTORY}/{stem}'
+
+
+def rendition_name(image_name, width, fmt):
+    """Имя копии картинки поста в хранилище."""
+    return f'{rendition_directory(image_name)}/{width}.{EXTENSIONS[fmt]}'
+
+
+def _flatten(image):
+    if image.mode in ('RGBA', 'LA', 'P'):
+        image = image.convert('RGBA')
+        background = Image.new('RGB', image.size, BACKGROUND)
+        background.paste(image, mask=image.getchannel('A'))
+        return background
+    return image.convert('RGB')
+
+
+def _save(image, fmt, quality):
+    output = BytesIO()
+    if fmt == WEBP:
+        image.save(output, 'WEBP', quality=quality, method=4)
+    else:
+        image.save(
+            output, 'JPEG', quality=quality, optimize=True,
+            progressive=True,
+        )
+    return output.getvalue()
+
+
+def encode(data, max_side, widths, webp_quality, jpeg_quality):
+    """
+    Байты исходной картинки -> [(ширина, формат, байты)].
+
+    Картинка поворачивается по EXIF, уменьшается до max_side по большей
+    стороне и пересохраняется без метаданных в WebP и прогрессивный JPEG
+    для каждой ширины из widths меньше итоговой и для итоговой (она
+    последняя). Анимация не сохраняется: берется первый кадр.
+    """
+    with Image.open(BytesIO(data)) as source:
+        image = ImageOps.exif_transpose(source)
+        image.thumbnail((max_side, max_side), Image.LANCZOS)
+        image = image.convert('RGBA') if image.mode == 'P' else image
+    sizes = sorted({width for width in widths if width < image.width})
+    sizes.append(image.width)
+    renditions = []
+    for width in sizes:
+        if width == image.width:
+            scaled = image
+        else:
+            height = max(1, round(image.height * width / image.width))
+            scaled = image.resize((width, height), Image.LANCZOS)
+        if scaled.mode not in ('RGB', 'RGBA'):
+            scaled = scaled.convert('RGB')
+        renditions.append((width, WEBP, _save(scaled, WEBP, webp_quality)))
+        renditions.append(
+            (width, JPEG, _save(_flatten(scaled), JPEG, jpeg_quality))
+        )
+    return renditions
@@ -0,0 +1,263 @@
+"""
+Полнотекстовый поиск по постам.
+
+Индекс хранит основы слов (стеммер Snowball) текста поста и названия
+его группы и обновляется сигналами при сохранении и удалении постов.
+Бэкенд выбирается настройкой POSTS_SEARCH_BACKEND.
+
+Перестройка (rebuild_search_index) не держит блокировку записи: индекс
+строится в теневой таблице, каждая порция в своей транзакции, а
+рабочий индекс подменяется переименованием. Посты, которые изменились
+за время перестройки, записывают в журнал триггеры SQLite, и перед
+подменой они индексируются заново.
+"""
+from django.db import connection, transaction
+from django.db.models import FloatField, Q, Value
+from django.db.models.expressions import RawSQL
+from django.utils.module_loading import import_string
+
+from core.sqlite import immediate_atomic
+
+from .models import Group, Post
+from .post_settings import SEARCH_BACKEND
+from .stemmer import stem_words
+
+FTS_TABLE = 'posts_post_fts'
+SHADOW_TABLE = f'{FTS_TABLE}_new'
+CHANGES_TABLE = f'{FTS_TABLE}_changes'
+# Триггеры на время перестройки: id постов, чей текст или группа
+# изменились, и постов группы, которую переименовали.
+CHANGE_TRIGGERS = {
+    f'{FTS_TABLE}_post_insert': (
+        f'AFTER INSERT ON {Post._meta.db_table} BEGIN '
+        f'INSERT INTO {CHANGES_TABLE} VALUES (new.id); END'
+    ),
+    f'{FTS_TABLE}_post_update': (
+        f'AFTER UPDATE OF text, group_id ON {Post._meta.db_table} BEGIN '
+        f'INSERT INTO {CHANGES_TABLE} VALUES (new.id); END'
+    ),
+    f'{FTS_TABLE}_post_delete': (
+        f'AFTER DELETE ON {Post._meta.db_table} BEGIN '
+        f'INSERT INTO {CHANGES_TABLE} VALUES (old.id); END'
+    ),
+    f'{FTS_TABLE}_group_update': (
+        f'AFTER UPDATE OF title ON {Group._meta.db_table} BEGIN '
+        f'INSERT INTO {CHANGES_TABLE} SELECT id FROM {Post._meta.db_table} '
+        f'WHERE group_id = new.id; END'
+    ),
+}
+# Вес совпадения в названии группы относительно текста поста.
+TITLE_WEIGHT = 2.0
+
+_backend = None
+
+
+def build_query(query):
+    """Запрос FTS5: все основы слов запроса, каждая в кавычках."""
+    return ' '.join(f'"{word}"' for word in stem_words(query))
+
+
+def post_rows(posts):
+    """(id, текст, название группы) для индексации."""
+    return posts.values_list('pk', 'text', 'group__title').order_by()
+
+
+def post_chunks(chunk_size):
+    """Строки post_rows всех постов порциями по первичному ключу."""
+    last_pk = 0
+    while True:
+        rows = list(
+            post_rows(Post.objects.filter(pk__gt=last_pk)).order_by('pk')[
+                :chunk_size
+            ]
+        )
+        if not rows:
+            return
+        yield rows
+        last_pk = rows[-1][0]
+
+
+class SQLiteFTSBackend:
+    """Инвертированный индекс в виртуальной таблице SQLite FTS5."""
+
+    # bm25 тем меньше, чем релевантнее пост; id разрывает ничьи.
+    ordering = ('rank', 'id')
+
+    @staticmethod
+    def create_table(cursor, table=FTS_TABLE):
+        cursor.execute(
+            f'CREATE VIRTUAL TABLE IF NOT EXISTS {table} USING '
+            f"fts5(text, title, tokenize='unicode61 remove_diacritics 2')"
+        )
+
+    @staticmethod
+    def drop_table(cursor, table=FTS_TABLE):
+        cursor.execute(f'DROP TABLE IF EXISTS {table}')
+
+    @staticmethod
+    def write_rows(cursor, rows, table=FTS_TABLE):
+        """Заменяет записи индекса строками (id, текст, название группы)."""
+        rows = [
+            (pk, ' '.join(stem_words(text)),
+             ' '.join(stem_words(title or '')))
+            for pk, text, title in rows
+        ]
+        if not rows:
+            return
+        cursor.executemany(
+            f'DELETE FROM {table} WHERE rowid = %s',
+            [(pk,) for pk, _, _ in rows],
+        )
+        cursor.executemany(
+            f'INSERT INTO {table} (rowid, text, title) '
+            f'VALUES (%s, %s, %s)',
+            rows,
+        )
+
+    def index_many(self, rows):
+        with connection.cursor() as cursor:
+            self.write_rows(cursor, rows)
+
+    def remove(self, post_id):
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'DELETE FROM {FTS_TABLE} WHERE rowid = %s', [post_id]
+            )
+
+    def clear(self):
+        with connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {FTS_TABLE}')
+
+    @classmethod
+    def drop_rebuild_tables(cls, cursor):
+        """Убирает следы перестройки, в том числе прерванной."""
+        for name in CHANGE_TRIGGERS:
+            cursor.execute(f'DROP TRIGGER IF EXISTS {name}')
+        cursor.execute(f'DROP TABLE IF EXISTS {CHANGES_TABLE}')
+        cls.drop_table(cursor, SHADOW_TABLE)
+
+    def rebuild(self, chunk_size=1000):
+        """
+        Строит индекс в теневой таблице и подменяет им рабочий.
+        Генератор: после каждой порции отдает число проиндексированных.
+        """
+        with connection.cursor() as cursor:
+            self.drop_rebuild_tables(cursor)
+            self.create_table(cursor, SHADOW_TABLE)
+            cursor.execute(
+                f'CREATE TABLE {CHANGES_TABLE} (post_id INTEGER NOT NULL)'
+            )
+            for name, trigger in CHANGE_TRIGGERS.items():
+                cursor.execute(f'CREATE TRIGGER {name} {trigger}')
+        done = 0
+        for rows in post_chunks(chunk_size):
+            with transaction.atomic(), connection.cursor() as cursor:
+                self.write_rows(cursor, rows, SHADOW_TABLE)
+            done += len(rows)
+            yield done
+        self.swap()
+
+    def swap(self):
+        """Догоняет журнал изменений и подменяет рабочий индекс теневым."""
+        changed = RawSQL(f'SELECT post_id FROM {CHANGES_TABLE}', ())
+        with immediate_atomic(), connection.cursor() as cursor:
+            self.write_rows(
+                cursor, post_rows(Post.objects.filter(pk__in=changed)),
+                SHADOW_TABLE,
+            )
+            cursor.execute(
+                f'DELETE FROM {SHADOW_TABLE} WHERE rowid IN '
+                f'(SELECT post_id FROM {CHANGES_TABLE}) AND rowid NOT IN '
+                f'(SELECT id FROM {Post._meta.db_table})'
+            )
+            self.drop_table(cursor)
+            cursor.execute(
+                f'ALTER TABLE {SHADOW_TABLE} RENAME TO {FTS_TABLE}'
+            )
+            self.drop_rebuild_tables(cursor)
+
+    def filter(self, queryset, query):
+        """Посты queryset, подходящие под запрос, без сортировки."""
+        match = build_query(query)
+        if not match:
+            return queryset.none()
+        return queryset.filter(pk__in=RawSQL(
+            f'SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s',
+            (match,),
+        ))
+
+    def search(self, query):
+        """Подходящие под запрос посты с релевантностью в поле rank."""
+        match = build_query(query)
+        if not match:
+            return Post.objects.annotate(
+                rank=Value(0.0, output_field=FloatField())
+            ).none()
+        return Post.objects.extra(
+            tables=[FTS_TABLE],
+            where=[
+                f'{FTS_TABLE}.rowid = {Post._meta.db_table}.id',
+                f'{FTS_TABLE} MATCH %s',
+            ],
+            params=[match],
+        ).annotate(rank=RawSQL(
+            f'bm25({FTS_TABLE}, 1.0, %s)', (TITLE_WEIGHT,),
+            output_field=FloatField(),
+        ))
+
+
+class SimpleBackend:
+    """
+    Запасной бэкенд без индекса: LIKE по тексту и группе, новые посты
+    сначала. Годится для баз без FTS и для небольших данных.
+    """
+
+    ordering = ('-pub_date', '-id')
+
+    def index_many(self, rows):
+        pass
+
+    def remove(self, post_id):
+        pass
+
+    def clear(self):
+        pass
+
+    def rebuild(self, chunk_size=1000):
+        # Индекса нет: перестраивать нечего.
+        return iter(())
+
+    def filter(self, queryset, query):
+        words = query.split()
+        if not words:
+            return queryset.none()
+        for word in words:
+            queryset = queryset.filter(
+                Q(text__icontains=word) | Q(group__title__icontains=word)
+            )
+        return queryset
+
+    def search(self, query):
+        return self.filter(Post.objects.all(), query).annotate(
+            rank=Value(0.0, output_field=FloatField())
+        )
+
+
+def get_backend():
+    global _backend
+    if _backend is None:
+        _backend = import_string(SEARCH_BACKEND)()
+    return _backend
+
+
+def index_posts(posts):
+    """Переиндексирует посты queryset."""
+    get_backend().index_many(post_rows(posts))
+
+
+def rebuild(chunk_size=1000):
+    """
+    Строит индекс заново, читая таблицу постов порциями по первичному
+    ключу. Генератор: после каждой порции отдает число проиндексированных.
+    """
+    return get_backend().rebuild(chunk_size)
@@ -0,0 +1,182 @@
+from django.db.models.signals import post_delete, post_save, pre_delete
+from django.dispatch import receiver
+
+from . import (blobs, conditional, counters, images, page_cache, search,
+               thumbnails, timeline)
+from .listing_cache import bump_generation, bump_posts_generation
+from .models import AuthorStats, Comment, Follow, Group, Post, User
+
+
+@receiver(post_save, sender=Post)
+def post_fan_out(sender, instance, created, **kwargs):
+    """Новый пост попадает в ленты подписчиков автора."""
+    if created:
+        timeline.fan_out(instance)
+
+
+@receiver(post_save, sender=Post)
+def post_blob_acquire(sender, instance, **kwargs):
+    """
+    Новая картинка поста берет ссылку на файл, прежняя — отдает.
+    Подключен раньше обработки картинки, которая передает ссылку дальше.
+    """
+    stored = getattr(instance, 'stored_image', '')
+    if stored is None:
+        # Картинка не загружалась из базы, и сохранение её не меняло.
+        return
+    name = instance.image.name or ''
+    if name != stored:
+        blobs.acquire(name)
+        blobs.release(stored)
+        instance.stored_image = name
+
+
+@receiver(post_save, sender=Post)
+def post_thumbnail(sender, instance, **kwargs):
+    """
+    Новая картинка уходит на перекодирование, после которого строится
+    миниатюра; у обработанной картинки без миниатюры строится только она.
+    """
+    if not instance.image:
+        return
+    if not instance.renditions:
+        images.schedule(instance.pk)
+    elif not instance.thumbnail:
+        thumbnails.schedule(instance.pk)
+
+
+@receiver(post_delete, sender=Post)
+def post_blob_release(sender, instance, **kwargs):
+    blobs.release(instance.image.name)
+
+
+@receiver(post_save, sender=Post)
+@receiver(post_delete, sender=Post)
+@receiver(post_save, sender=Comment)
+@receiver(post_delete, sender=Comment)
+def listing_invalidate(sender, **kwargs):
+    """Любое изменение постов или комментариев сбрасывает кеш лент."""
+    bump_generation()
+
+
+@receiver(post_save, sender=Post)
+@receiver(post_delete, sender=Post)
+def posts_invalidate(sender, **kwargs):
+    """Счетчики постов в лентах пересчитываются только после постов."""
+    bump_posts_generation()
+
+
+@receiver(post_save, sender=Follow)
+def follow_backfill(sender, instance, created, **kwargs):
+    """После подписки в ленту добавляются последние посты автора."""
+    if created:
+        timeline.backfill(instance.user_id, instance.author_id)
+
+
+@receiver(post_delete, sender=Follow)
+def follow_prune(sender, instance, **kwargs):
+    """После отписки посты автора убираются из ленты."""
+    timeline.prune(instance.user_id, instance.author_id)
+
+
+@receiver(post_save, sender=User)
+def user_stats_create(sender, instance, created, **kwargs):
+    if created:
+        AuthorStats.objects.get_or_create(user=instance)
+
+
+@receiver(post_save, sender=Post)
+def post_count_add(sender, instance, created, **kwargs):
+    """Новый пост или смена его автора сдвигают счетчики авторов."""
+    moved = instance.stored_change('author_id', created)
+    if created:
+        counters.adjust_stats(instance.author_id, 'posts_count', 1)
+    elif moved:
+        counters.move_stats(*moved, 'posts_count')
+
+
+@receiver(post_delete, sender=Post)
+def post_count_remove(sender, instance, **kwargs):
+    counters.adjust_stats(instance.author_id, 'posts_count', -1)
+
+
+@receiver(post_save, sender=Comment)
+def comment_count_add(sender, instance, created, **kwargs):
+    """Новый комментарий или перенос к другому посту."""
+    moved = instance.stored_change('post_id', created)
+    if created:
+        counters.adjust_comments(instance.post_id, 1)
+    elif moved:
+        old, new = moved
+        counters.adjust_comments(old, -1)
+        counters.adjust_comments(new, 1)
+
+
+@receiver(post_delete, sender=Comment)
+def comment_count_remove(sender, instance, **kwargs):
+    counters.adjust_comments(instance.post_id, -1)
+
+
+@receiver(post_save, sender=Follow)
+def follow_count_add(sender, instance, created, **kwargs):
+    """Новая подписка или смена ее читателя либо автора."""
+    author_moved = instance.stored_change('author_id', created)
+    user_moved = instance.stored_change('user_id', created)
+    if created:
+        counters.adjust_stats(instance.author_id, 'followers_count', 1)
+        counters.adjust_stats(instance.user_id, 'following_count', 1)
+    if author_moved:
+        counters.move_stats(*author_moved, 'followers_count')
+    if user_moved:
+        counters.move_stats(*user_moved, 'following_count')
+
+
+@receiver(post_delete, sender=Follow)
+def follow_count_remove(sender, instance, **kwargs):
+    counters.adjust_stats(instance.author_id, 'followers_count', -1)
+    counters.adjust_stats(instance.user_id, 'following_count', -1)
+
+
+@receiver(post_save, sender=Post)
+def post_search_index(sender, instance, **kwargs):
+    group = instance.group
+    search.get_backend().index_many(
+        [(instance.pk, instance.text, group.title if group else None)]
+    )
+
+
+@receiver(post_delete, sender=Post)
+def post_search_remove(sender, instance, **kwargs):
+    search.get_backend().remove(instance.pk)
+
+
+@receiver(post_save, sender=Group)
+def group_search_reindex(sender, instance, created, **kwargs):
+    """Название группы индексируется вместе с ее постами."""
+    if not created:
+        search.index_posts(instance.posts.all())
+
+
+@receiver(pre_delete, sender=Group)
+def group_search_forget(sender, instance, **kwargs):
+    """Посты удаляемой группы остаются без группы — и в индексе тоже."""
+    search.get_backend().index_many(
+        (pk, text, None)
+        for pk, text, _ in search.post_rows(instance.posts.all())
+    )
+
+
+@receiver(post_save, sender=Follow)
+@receiver(post_delete, sender=Follow)
+def follow_viewer_bump(sender, instance, **kwargs):
+    """Кнопка подписки на страницах автора меняется у подписчика."""
+    conditional.bump_viewer(instance.user_id)
+
+
+@receiver(post_save, sender=Follow)
+@receiver(post_delete, sender=Follow)
+@receiver(post_save, sender=Group)
+@receiver(post_delete, sender=Group)
+def anonymous_pages_invalidate(sender, **kwargs):
+    """Счетчики подписчиков и описание групп видны и анонимам."""
+    page_cache.bump()
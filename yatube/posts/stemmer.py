@@ -0,0 +1,127 @@
+"""Стеммер Snowball для русского языка."""
+import re
+
+VOWELS = 'аеиоуыэюя'
+
+PERFECTIVE_GERUND = (
+    ('вшись', 'вши', 'в'),
+    ('ившись', 'ывшись', 'ивши', 'ывши', 'ив', 'ыв'),
+)
+ADJECTIVE = (
+    'ими', 'ыми', 'его', 'ого', 'ему', 'ому', 'ее', 'ие', 'ые', 'ое', 'ей',
+    'ий', 'ый', 'ой', 'ем', 'им', 'ым', 'ом', 'их', 'ых', 'ую', 'юю', 'ая',
+    'яя', 'ою', 'ею',
+)
+PARTICIPLE = (
+    ('ем', 'нн', 'вш', 'ющ', 'щ'),
+    ('ивш', 'ывш', 'ующ'),
+)
+REFLEXIVE = ('ся', 'сь')
+VERB = (
+    ('ете', 'йте', 'ешь', 'нно', 'ла', 'на', 'ли', 'ем', 'ло', 'но', 'ет',
+     'ют', 'ны', 'ть', 'й', 'л', 'н'),
+    ('ейте', 'уйте', 'ила', 'ыла', 'ена', 'ите', 'или', 'ыли', 'ило', 'ыло',
+     'ено', 'ует', 'уют', 'ены', 'ить', 'ыть', 'ишь', 'ей', 'уй', 'ил', 'ыл',
+     'им', 'ым', 'ен', 'ят', 'ит', 'ыт', 'ую', 'ю'),
+)
+NOUN = (
+    'иями', 'ями', 'ами', 'ией', 'иям', 'ием', 'иях', 'ев', 'ов', 'ие',
+    'ье', 'еи', 'ии', 'ей', 'ой', 'ий', 'ям', 'ем', 'ам', 'ом', 'ах', 'ях',
+    'ию', 'ью', 'ия', 'ья', 'а', 'е', 'и', 'й', 'о', 'у', 'ы', 'ь', 'ю', 'я',
+)
+SUPERLATIVE = ('ейше', 'ейш')
+DERIVATIONAL = ('ость', 'ост')
+
+WORD_RE = re.compile(r'\w+')
+
+
+def _regions(word):
+    """Начала областей RV и R2 по правилам Snowball."""
+    rv = r1 = r2 = len(word)
+    for i, char in enumerate(word):
+        if char in VOWELS:
+            rv = i + 1
+            break
+    for i in range(1, len(word)):
+        if word[i] not in VOWELS and word[i - 1] in VOWELS:
+            r1 = i + 1
+            break
+    for i in range(r1 + 1, len(word)):
+        if word[i] not in VOWELS and word[i - 1] in VOWELS:
+            r2 = i + 1
+            break
+    return rv, r2
+
+
+def _strip(word, start, endings):
+    """Отрезает первое подходящее окончание, лежащее в области start."""
+    for ending in sorted(endings, key=len, reverse=True):
+        if word.endswith(ending) and len(word) - len(ending) >= start:
+            return word[:-len(ending)]
+    return None
+
+
+def _strip_grouped(word, start, groups):
+    """
+    Окончания первой группы должны идти после «а» или «я», второй —
+    после чего угодно. Из всех выбирается самое длинное.
+    """
+    candidates = []
+    for ending in groups[0]:
+        if (
+            word.endswith(ending)
+            and len(word) - len(ending) - 1 >= start
+            and word[-len(ending) - 1] in 'ая'
+        ):
+            candidates.append(ending)
+    for ending in groups[1]:
+        if word.endswith(ending) and len(word) - len(ending) >= start:
+            candidates.append(ending)
+    if not candidates:
+        return None
+    return word[:-len(max(candidates, key=len))]
+
+
+def _strip_adjectival(word, start):
+    stripped = _strip(word, start, ADJECTIVE)
+    if stripped is None:
+        return None
+    participle = _strip_grouped(stripped, start, PARTICIPLE)
+    return stripped if participle is None else participle
+
+
+def stem(word):
+    word = word.lower().replace('ё', 'е')
+    rv, r2 = _regions(word)
+    stripped = _strip_grouped(word, rv, PERFECTIVE_GERUND)
+    if stripped is None:
+        word = _strip(word, rv, REFLEXIVE) or word
+        for step in (
+            lambda w: _strip_adjectival(w, rv),
+            lambda w: _strip_grouped(w, rv, VERB),
+            lambda w: _strip(w, rv, NOUN),
+        ):
+            stripped = step(word)
+            if stripped is not None:
+                break
+    if stripped is not None:
+        word = stripped
+    if word.endswith('и') and len(word) - 1 >= rv:
+        word = word[:-1]
+    word = _strip(word, r2, DERIVATIONAL) or word
+    if word.endswith('нн') and len(word) - 1 >= rv:
+        return word[:-1]
+    superlative = _strip(word, rv, SUPERLATIVE)
+    if superlative is not None:
+        word = superlative
+        if word.endswith('нн'):
+            word = word[:-1]
+        return word
+    if word.endswith('ь') and len(word) - 1 >= rv:
+        word = word[:-1]
+    return word
+
+
+def stem_words(text):
+    """Список основ всех слов текста."""
+    return [stem(word) for word in WORD_RE.findall(text)]
@@ -0,0 +1,57 @@
+"""
+Контентно-адресуемое хранилище картинок постов.
+
+Загрузка пишется во временный файл, и по мере записи считается её
+SHA-256; файл сохраняется как <каталог>/<ab>/<хеш><расширение>. Одинаковое
+содержимое хранится один раз: повторная загрузка получает имя уже
+сохраненного файла и обновляет его mtime, чтобы sweep_blobs не удалил
+файл, ссылку на который еще не закоммитили. Ссылки постов на файлы
+считает posts.blobs.
+"""
+import hashlib
+import os
+import posixpath
+import tempfile
+
+from django.core.files.storage import FileSystemStorage
+from django.utils.deconstruct import deconstructible
+
+
+@deconstructible
+class ContentAddressedStorage(FileSystemStorage):
+
+    def get_available_name(self, name, max_length=None):
+        # Имя файла определяется содержимым в _save.
+        return name
+
+    def _save(self, name, content):
+        directory = posixpath.dirname(name)
+        extension = posixpath.splitext(name)[1].lower()
+        os.makedirs(self.path(directory), exist_ok=True)
+        descriptor, temporary = tempfile.mkstemp(
+            dir=self.path(directory), suffix='.part'
+        )
+        digest = hashlib.sha256()
+        try:
+            with os.fdopen(descriptor, 'wb') as output:
+                for chunk in content.chunks():
+                    digest.update(chunk)
+                    output.write(chunk)
+            digest = digest.hexdigest()
+            name = posixpath.join(directory, digest[:2], digest + extension)
+            full_path = self.path(name)
+            if os.path.exists(full_path):
+                os.remove(temporary)
+                os.utime(full_path)
+            else:
+                os.makedirs(os.path.dirname(full_path), exist_ok=True)
+                os.chmod(temporary, self.file_permissions_mode or 0o644)
+                os.replace(temporary, full_path)
+        except BaseException:
+            if os.path.exists(temporary):
+                os.remove(temporary)
+            raise
+        return name
+
+
+media_storage = ContentAddressedStorage()
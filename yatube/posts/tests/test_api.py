@@ -0,0 +1,134 @@
+import gzip
+import json
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from ..models import Comment, Follow, Group, Post
+
+User = get_user_model()
+
+
+class ApiTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='author')
+        cls.reader = User.objects.create_user(username='reader')
+        cls.group = Group.objects.create(
+            title='Тестовая группа', slug='test', description='Описание'
+        )
+        Follow.objects.create(user=cls.reader, author=cls.author)
+        cls.posts = [
+            Post.objects.create(
+                author=cls.author, group=cls.group, text=f'Пост {i}'
+            )
+            for i in range(5)
+        ]
+        Post.objects.create(author=cls.reader, text='Свой пост')
+        cls.comment = Comment.objects.create(
+            post=cls.posts[0], author=cls.reader, text='Коммент'
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.guest_client = Client()
+        self.reader_client = Client()
+        self.reader_client.force_login(self.reader)
+
+    def get(self, client, url, **params):
+        response = client.get(url, params)
+        return response, json.loads(response.content)
+
+    def test_cursor_pagination(self):
+        """Курсор проходит все посты группы по порядку без повторов."""
+        url = reverse('posts:api_posts')
+        response, data = self.get(
+            self.guest_client, url, group='test', limit=2
+        )
+        ids = []
+        while True:
+            self.assertEqual(response.status_code, 200)
+            ids.extend(item['id'] for item in data['results'])
+            if data['next'] is None:
+                break
+            response = self.guest_client.get(data['next'])
+            data = json.loads(response.content)
+        self.assertEqual(ids, [post.pk for post in reversed(self.posts)])
+        self.assertIsNotNone(data['previous'])
+
+    def test_field_selection(self):
+        """fields оставляет только перечисленные поля."""
+        _, data = self.get(
+            self.guest_client, reverse('posts:api_posts'),
+            fields='id,author,group',
+        )
+        self.assertEqual(
+            data['results'][-1],
+            {'id': self.posts[0].pk, 'author': 'author', 'group': 'test'},
+        )
+        response, data = self.get(
+            self.guest_client, reverse('posts:api_posts'), fields='id,secret'
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('secret', data['detail'])
+
+    def test_list_queries_do_not_depend_on_page_size(self):
+        """Список постов — один запрос при любом размере страницы."""
+        for limit in (1, 6):
+            with self.subTest(limit=limit):
+                with self.assertNumQueries(1):
+                    self.guest_client.get(
+                        reverse('posts:api_posts'), {'limit': limit}
+                    )
+
+    def test_detail_and_comments(self):
+        """Пост и его комментарии; несуществующий пост — 404."""
+        post = self.posts[0]
+        _, data = self.get(
+            self.guest_client, reverse('posts:api_post', args=[post.pk])
+        )
+        self.assertEqual(data['text'], post.text)
+        self.assertIsNone(data['image'])
+        self.assertEqual(data['comments_count'], 1)
+        _, data = self.get(
+            self.guest_client, reverse('posts:api_comments', args=[post.pk])
+        )
+        self.assertEqual(
+            [item['id'] for item in data['results']], [self.comment.pk]
+        )
+        for name in ('posts:api_post', 'posts:api_comments'):
+            with self.subTest(name=name):
+                response = self.guest_client.get(reverse(name, args=[10 ** 6]))
+                self.assertEqual(response.status_code, 404)
+
+    def test_groups(self):
+        _, data = self.get(self.guest_client, reverse('posts:api_groups'))
+        self.assertEqual(data['results'][0]['slug'], 'test')
+
+    def test_follow_feed(self):
+        """Лента подписок только для авторизованных."""
+        response = self.guest_client.get(reverse('posts:api_follow'))
+        self.assertEqual(response.status_code, 401)
+        _, data = self.get(
+            self.reader_client, reverse('posts:api_follow'), fields='id'
+        )
+        self.assertEqual(
+            [item['id'] for item in data['results']],
+            [post.pk for post in reversed(self.posts)],
+        )
+
+    def test_gzip(self):
+        """Ответ сжимается, если клиент принимает gzip."""
+        response = self.guest_client.get(
+            reverse('posts:api_posts'), HTTP_ACCEPT_ENCODING='gzip'
+        )
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        data = json.loads(gzip.decompress(response.content))
+        self.assertEqual(len(data['results']), 6)
+
+    def test_read_only(self):
+        response = self.reader_client.post(reverse('posts:api_posts'))
+        self.assertEqual(response.status_code, 405)
@@ -0,0 +1,158 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, RequestFactory, TestCase
+from django.urls import reverse
+
+from .. import page_cache
+from ..models import Comment, Follow, Group, Post
+
+User = get_user_model()
+
+
+class ConditionalGetTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='author')
+        cls.reader = User.objects.create_user(username='reader')
+        cls.group = Group.objects.create(
+            title='Тестовая группа', slug='test', description='Описание'
+        )
+        cls.post = Post.objects.create(
+            author=cls.author, group=cls.group, text='Текст'
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.guest_client = Client()
+        self.reader_client = Client()
+        self.reader_client.force_login(self.reader)
+
+    def urls(self):
+        return (
+            reverse('posts:index'),
+            reverse('posts:group_posts', args=[self.group.slug]),
+            reverse('posts:profile', args=[self.author.username]),
+            reverse('posts:post_detail', args=[self.post.pk]),
+        )
+
+    def test_anonymous_revalidation_is_free(self):
+        """Аноним получает 304 без запросов к базе и без шаблонов."""
+        for url in self.urls():
+            with self.subTest(url=url):
+                response = self.guest_client.get(url)
+                self.assertIn('no-cache', response['Cache-Control'])
+                self.assertIn('Cookie', response['Vary'])
+                with self.assertNumQueries(0):
+                    response = self.guest_client.get(
+                        url, HTTP_IF_NONE_MATCH=response['ETag']
+                    )
+                self.assertEqual(response.status_code, 304)
+                self.assertFalse(response.templates)
+
+    def test_validator_depends_on_viewer(self):
+        """У гостя и пользователя разные ETag, ответ пользователю private."""
+        url = reverse('posts:index')
+        guest = self.guest_client.get(url)
+        reader = self.reader_client.get(url)
+        self.assertNotEqual(guest['ETag'], reader['ETag'])
+        self.assertIn('private', reader['Cache-Control'])
+        response = self.reader_client.get(
+            url, HTTP_IF_NONE_MATCH=guest['ETag']
+        )
+        self.assertEqual(response.status_code, 200)
+
+    def test_writes_change_validator(self):
+        """Комментарий, правка поста и подписка дают новый ETag."""
+        detail = reverse('posts:post_detail', args=[self.post.pk])
+        profile = reverse('posts:profile', args=[self.author.username])
+        changes = (
+            (detail, lambda: Comment.objects.create(
+                post=self.post, author=self.reader, text='Коммент')),
+            (detail, lambda: Post.objects.filter(pk=self.post.pk).first()
+                .save()),
+            (profile, lambda: Follow.objects.create(
+                user=self.reader, author=self.author)),
+        )
+        for url, change in changes:
+            with self.subTest(url=url):
+                etag = self.reader_client.get(url)['ETag']
+                change()
+                response = self.reader_client.get(
+                    url, HTTP_IF_NONE_MATCH=etag
+                )
+                self.assertEqual(response.status_code, 200)
+
+    def test_page_version_changes_user_validator(self):
+        """Правка группы и чужая подписка меняют ETag пользователя."""
+        other = User.objects.create_user(username='other')
+        group_url = reverse('posts:group_posts', args=[self.group.slug])
+        profile = reverse('posts:profile', args=[self.author.username])
+
+        def edit_group():
+            self.group.description = 'Новое описание'
+            self.group.save()
+
+        changes = (
+            (group_url, edit_group),
+            (profile, lambda: Follow.objects.create(
+                user=other, author=self.author)),
+        )
+        for url, change in changes:
+            with self.subTest(url=url):
+                etag = self.reader_client.get(url)['ETag']
+                change()
+                response = self.reader_client.get(
+                    url, HTTP_IF_NONE_MATCH=etag
+                )
+                self.assertEqual(response.status_code, 200)
+
+    def test_relogin_changes_validator(self):
+        """После нового входа страница с формой рендерится заново."""
+        url = reverse('posts:post_detail', args=[self.post.pk])
+        etag = self.reader_client.get(url)['ETag']
+        self.reader_client.logout()
+        self.reader_client.force_login(self.reader)
+        response = self.reader_client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+
+    def test_edit_is_not_hidden_by_date(self):
+        """Правка поста не прячется за If-Modified-Since."""
+        url = reverse('posts:post_detail', args=[self.post.pk])
+        response = self.guest_client.get(url)
+        self.assertFalse(response.has_header('Last-Modified'))
+        self.post.text = 'Исправленный текст'
+        self.post.save()
+        response = self.guest_client.get(
+            url, HTTP_IF_MODIFIED_SINCE='Fri, 01 Jan 2100 00:00:00 GMT'
+        )
+        self.assertContains(response, 'Исправленный текст')
+
+    def test_stale_page_has_no_validators(self):
+        """Устаревшая страница из кеша уходит без ETag и не хранится."""
+        url = reverse('posts:index')
+        etag = self.guest_client.get(url)['ETag']
+        Post.objects.filter(pk=self.post.pk).first().save()
+        Post.objects.filter(pk=self.post.pk).update(text='Новый текст')
+        # Страницу как будто перестраивает другой запрос.
+        lock = f'{page_cache.page_key(RequestFactory().get(url))}:lock'
+        cache.add(lock, 1)
+        response = self.guest_client.get(url)
+        self.assertNotContains(response, 'Новый текст')
+        self.assertFalse(response.has_header('ETag'))
+        self.assertIn('no-store', response['Cache-Control'])
+        cache.delete(lock)
+        response = self.guest_client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, 'Новый текст')
+        response = self.guest_client.get(
+            url, HTTP_IF_NONE_MATCH=response['ETag']
+        )
+        self.assertEqual(response.status_code, 304)
+
+    def test_missing_post(self):
+        """Для несуществующего поста валидатора нет, ответ — 404."""
+        response = self.guest_client.get(
+            reverse('posts:post_detail', args=[10 ** 6])
+        )
+        self.assertEqual(response.status_code, 404)
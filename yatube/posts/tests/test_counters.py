@@ -0,0 +1,98 @@
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from ..models import AuthorStats, Comment, Follow, Post
+
+User = get_user_model()
+
+
+class CountersTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='author')
+        cls.reader = User.objects.create_user(username='reader')
+
+    def stats(self, user):
+        return AuthorStats.objects.get(user=user)
+
+    def test_counters_follow_create_and_delete(self):
+        """Счетчики меняются при создании и удалении объектов."""
+        post = Post.objects.create(author=self.author, text='Пост')
+        comment = Comment.objects.create(
+            post=post, author=self.reader, text='Коммент'
+        )
+        follow = Follow.objects.create(user=self.reader, author=self.author)
+        post.refresh_from_db()
+        self.assertEqual(self.stats(self.author).posts_count, 1)
+        self.assertEqual(self.stats(self.author).followers_count, 1)
+        self.assertEqual(self.stats(self.reader).following_count, 1)
+        self.assertEqual(post.comments_count, 1)
+        comment.delete()
+        follow.delete()
+        post.refresh_from_db()
+        self.assertEqual(post.comments_count, 0)
+        self.assertEqual(self.stats(self.author).followers_count, 0)
+        self.assertEqual(self.stats(self.reader).following_count, 0)
+        post.delete()
+        self.assertEqual(self.stats(self.author).posts_count, 0)
+
+    def test_admin_author_change_moves_post_count(self):
+        """Смена автора поста в админке переносит счетчик постов."""
+        post = Post.objects.create(author=self.author, text='Пост')
+        admin = User.objects.create_superuser(
+            'admin', 'admin@example.com', 'password'
+        )
+        client = Client()
+        client.force_login(admin)
+        response = client.post(
+            reverse('admin:posts_post_change', args=[post.pk]),
+            {'text': 'Пост', 'author': self.reader.pk, 'group': ''},
+        )
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(self.stats(self.author).posts_count, 0)
+        self.assertEqual(self.stats(self.reader).posts_count, 1)
+
+    def test_reassignment_moves_counters(self):
+        """Перенос комментария и смена сторон подписки сдвигают счетчики."""
+        first = Post.objects.create(author=self.author, text='Первый')
+        second = Post.objects.create(author=self.author, text='Второй')
+        other = User.objects.create_user(username='other')
+        Comment.objects.create(post=first, author=self.reader, text='К')
+        Follow.objects.create(user=self.reader, author=self.author)
+        comment = Comment.objects.get()
+        comment.post = second
+        comment.save()
+        follow = Follow.objects.get()
+        follow.user, follow.author = self.author, other
+        follow.save()
+        # Повторное сохранение того же объекта ничего не сдвигает.
+        follow.save()
+        self.assertEqual(
+            dict(Post.objects.values_list('text', 'comments_count')),
+            {'Первый': 0, 'Второй': 1},
+        )
+        self.assertEqual(self.stats(self.author).followers_count, 0)
+        self.assertEqual(self.stats(other).followers_count, 1)
+        self.assertEqual(self.stats(self.reader).following_count, 0)
+        self.assertEqual(self.stats(self.author).following_count, 1)
+
+    def test_recount_repairs_drift(self):
+        """Команда recount_counters исправляет расхождения."""
+        Post.objects.bulk_create([
+            Post(author=self.author, text=f'Пост {i}') for i in range(3)
+        ])
+        post = Post.objects.first()
+        Comment.objects.bulk_create([
+            Comment(post=post, author=self.reader, text='Коммент')
+        ])
+        AuthorStats.objects.filter(user=self.reader).delete()
+        call_command('recount_counters', stdout=StringIO())
+        post.refresh_from_db()
+        self.assertEqual(self.stats(self.author).posts_count, 3)
+        self.assertEqual(self.stats(self.reader).posts_count, 0)
+        self.assertEqual(post.comments_count, 1)
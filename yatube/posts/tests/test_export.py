@@ -0,0 +1,123 @@
+import io
+import json
+import os
+import shutil
+import tempfile
+import zipfile
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from .. import export
+from ..models import Comment, Follow, Group, Post
+
+User = get_user_model()
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+SMALL_GIF = (
+    b'\x47\x49\x46\x38\x39\x61\x02\x00'
+    b'\x01\x00\x80\x00\x00\x00\x00\x00'
+    b'\xFF\xFF\xFF\x21\xF9\x04\x00\x00'
+    b'\x00\x00\x00\x2C\x00\x00\x00\x00'
+    b'\x02\x00\x01\x00\x00\x02\x02\x0C'
+    b'\x0A\x00\x3B'
+)
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class ExportTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='leo')
+        cls.other = User.objects.create_user(username='tom')
+        cls.group = Group.objects.create(
+            title='Коты', slug='cats', description='Про котов'
+        )
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        export_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, export_dir)
+        self.addCleanup(setattr, export, 'EXPORT_DIR', export.EXPORT_DIR)
+        export.EXPORT_DIR = export_dir
+        self.post = Post.objects.create(
+            author=self.user, text='Пост', group=self.group,
+            image=SimpleUploadedFile(
+                'small.gif', SMALL_GIF, content_type='image/gif'
+            ),
+        )
+        Comment.objects.create(post=self.post, author=self.user, text='Я')
+        Follow.objects.create(user=self.user, author=self.other)
+        self.client = Client()
+        self.client.force_login(self.user)
+
+    def download(self, **extra):
+        response = self.client.get(
+            reverse('posts:export'), {'format': 'zip'}, **extra
+        )
+        return response, b''.join(response)
+
+    def test_jsonl_export(self):
+        """JSONL содержит записи всех типов в формате импорта."""
+        response = self.client.get(reverse('posts:export'))
+        lines = b''.join(response.streaming_content).decode().splitlines()
+        records = [json.loads(line) for line in lines]
+        self.assertEqual(
+            [record['type'] for record in records],
+            ['group', 'post', 'comment', 'follow'],
+        )
+        self.assertEqual(records[1]['id'], self.post.pk)
+        self.assertEqual(records[1]['group'], 'cats')
+        self.assertEqual(records[3]['author'], 'tom')
+
+    def test_zip_export_with_images(self):
+        """ZIP содержит data.jsonl и картинки постов."""
+        response, content = self.download()
+        self.assertEqual(response.status_code, 200)
+        with zipfile.ZipFile(io.BytesIO(content)) as archive:
+            self.assertEqual(
+                archive.namelist(), ['data.jsonl', self.post.image.name]
+            )
+            self.assertEqual(archive.read(self.post.image.name), SMALL_GIF)
+            self.assertIn(b'"text": "\xd0\x9f', archive.read('data.jsonl'))
+
+    def test_zip_range_resume(self):
+        """Загрузку архива можно продолжить запросом Range."""
+        first, content = self.download()
+        etag = first['ETag']
+        resumed, tail = self.download(
+            HTTP_RANGE='bytes=10-', HTTP_IF_RANGE=etag
+        )
+        self.assertEqual(resumed.status_code, 206)
+        self.assertEqual(
+            resumed['Content-Range'],
+            f'bytes 10-{len(content) - 1}/{len(content)}',
+        )
+        self.assertEqual(tail, content[10:])
+        invalid, _ = self.download(HTTP_RANGE=f'bytes={len(content)}-')
+        self.assertEqual(invalid.status_code, 416)
+
+    def test_zip_stale_if_range_gets_full_archive(self):
+        """Range к неизвестной версии архива отдает архив целиком."""
+        response, content = self.download(
+            HTTP_RANGE='bytes=10-', HTTP_IF_RANGE='"0123456789abcdef"'
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(zipfile.is_zipfile(io.BytesIO(content)))
+
+    def test_export_command(self):
+        """Команда пишет архив в файл."""
+        path = os.path.join(export.EXPORT_DIR, 'out.zip')
+        call_command(
+            'export_user_data', 'leo', format='zip', output=path,
+            stderr=io.StringIO(),
+        )
+        self.assertTrue(zipfile.is_zipfile(path))
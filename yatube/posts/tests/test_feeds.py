@@ -0,0 +1,96 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from ..models import Group, Post
+
+User = get_user_model()
+
+
+class FeedTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='author')
+        cls.group = Group.objects.create(
+            title='Тестовая группа', slug='test', description='Описание'
+        )
+        cls.post = Post.objects.create(
+            author=cls.author, group=cls.group, text='Текст для ленты'
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+
+    def feeds(self):
+        return {
+            'posts:index_rss': (),
+            'posts:index_atom': (),
+            'posts:group_rss': (self.group.slug,),
+            'posts:group_atom': (self.group.slug,),
+            'posts:author_rss': (self.author.username,),
+            'posts:author_atom': (self.author.username,),
+        }
+
+    def test_feeds_list_posts(self):
+        """Ленты отдают посты и валидаторы кеширования."""
+        for name, args in self.feeds().items():
+            with self.subTest(feed=name):
+                response = self.client.get(reverse(name, args=args))
+                self.assertEqual(response.status_code, 200)
+                self.assertContains(response, 'Текст для ленты')
+                self.assertTrue(response.has_header('ETag'))
+                self.assertTrue(response.has_header('Last-Modified'))
+        response = self.client.get(reverse('posts:index_atom'))
+        self.assertTrue(
+            response['Content-Type'].startswith('application/atom+xml')
+        )
+
+    def test_unchanged_feed_is_304_without_queries(self):
+        """Повторный опрос без новых постов — 304 без запросов к базе."""
+        for name, args in self.feeds().items():
+            with self.subTest(feed=name):
+                url = reverse(name, args=args)
+                etag = self.client.get(url)['ETag']
+                with self.assertNumQueries(0):
+                    response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+                self.assertEqual(response.status_code, 304)
+
+    def test_new_post_changes_validators(self):
+        """Новый пост делает прежний ETag устаревшим."""
+        url = reverse('posts:group_rss', args=[self.group.slug])
+        etag = self.client.get(url)['ETag']
+        Post.objects.create(
+            author=self.author, group=self.group, text='Свежий пост'
+        )
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, 'Свежий пост')
+
+    def test_older_post_edit_changes_validators(self):
+        """Правка и удаление не самого нового поста меняют ETag."""
+        url = reverse('posts:index_rss')
+        older = self.post
+        Post.objects.create(author=self.author, text='Новее')
+
+        def edit():
+            older.text = 'Исправленный текст'
+            older.save()
+
+        for change in (edit, older.delete):
+            with self.subTest(change=change.__name__):
+                etag = self.client.get(url)['ETag']
+                change()
+                response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+                self.assertEqual(response.status_code, 200)
+                response = self.client.get(
+                    url, HTTP_IF_MODIFIED_SINCE=response['Last-Modified']
+                )
+                self.assertEqual(response.status_code, 200)
+
+    def test_unknown_group_feed(self):
+        """Лента несуществующей группы — 404."""
+        response = self.client.get(reverse('posts:group_rss', args=['nope']))
+        self.assertEqual(response.status_code, 404)
@@ -0,0 +1,149 @@
+import hashlib
+import shutil
+import tempfile
+from io import BytesIO, StringIO
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.test import Client, TransactionTestCase, override_settings
+from django.urls import reverse
+from PIL import Image
+
+from .. import blobs, images, renditions
+from ..models import Post
+from ..storage import media_storage
+
+User = get_user_model()
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+
+def make_jpeg(width, height):
+    """JPEG с EXIF: поворот на 90° и название камеры."""
+    exif = Image.Exif()
+    exif[0x0112] = 6
+    exif[0x0110] = 'Камера'
+    output = BytesIO()
+    Image.new('RGB', (width, height), (200, 30, 30)).save(
+        output, 'JPEG', quality=100, exif=exif.tobytes()
+    )
+    return output.getvalue()
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class ImagePipelineTests(TransactionTestCase):
+    # Файлы без ссылок удаляются после коммита.
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        self.client = Client()
+        self.client.force_login(User.objects.create_user(username='author'))
+        self.old_workers = images.IMAGE_WORKERS
+        images.IMAGE_WORKERS = 0
+
+    def tearDown(self):
+        images.IMAGE_WORKERS = self.old_workers
+
+    def create_post(self, text='Пост с фото'):
+        uploaded = SimpleUploadedFile(
+            name='photo.jpg', content=make_jpeg(3000, 1000),
+            content_type='image/jpeg',
+        )
+        self.client.post(
+            reverse('posts:post_create'), {'text': text, 'image': uploaded},
+        )
+        return Post.objects.get(text=text)
+
+    def test_image_downscaled_and_stripped(self):
+        """Картинка повернута по EXIF, уменьшена и без метаданных."""
+        post = self.create_post()
+        with default_storage.open(post.image.name) as stored:
+            image = Image.open(stored)
+            image.load()
+        self.assertEqual(image.format, 'JPEG')
+        self.assertEqual(max(image.size), images.IMAGE_MAX_SIDE)
+        self.assertGreater(image.height, image.width)
+        self.assertFalse(image.getexif())
+        self.assertTrue(image.info.get('progressive'))
+
+    def test_renditions_saved(self):
+        """Для каждой ширины есть WebP, для меньших ширин — и JPEG."""
+        post = self.create_post()
+        widths = post.renditions.split()
+        self.assertEqual(widths[-1], str(Image.open(post.image).width))
+        for width in widths:
+            self.assertTrue(default_storage.exists(renditions.rendition_name(
+                post.image.name, width, renditions.WEBP
+            )))
+        for width in widths[:-1]:
+            self.assertTrue(default_storage.exists(renditions.rendition_name(
+                post.image.name, width, renditions.JPEG
+            )))
+        response = self.client.get(
+            reverse('posts:post_detail', args=(post.pk,))
+        )
+        self.assertContains(response, 'type="image/webp"')
+        self.assertContains(response, post.webp_srcset)
+
+    def test_original_replaced(self):
+        """Исходный файл без ссылок удаляется."""
+        output = BytesIO()
+        Image.new('RGBA', (600, 400), (0, 0, 0, 0)).save(output, 'PNG')
+        uploaded = SimpleUploadedFile(
+            name='photo.png', content=output.getvalue(),
+            content_type='image/png',
+        )
+        self.client.post(
+            reverse('posts:post_create'),
+            {'text': 'Прозрачный', 'image': uploaded},
+        )
+        post = Post.objects.get(text='Прозрачный')
+        digest = hashlib.sha256(output.getvalue()).hexdigest()
+        self.assertTrue(post.image.name.endswith('.jpg'))
+        blobs.sweep(grace=0)
+        self.assertFalse(default_storage.exists(
+            f'posts/{digest[:2]}/{digest}.png'
+        ))
+        self.assertEqual(post.renditions, '480 600')
+
+    def test_backfill_command(self):
+        """Команда обрабатывает старые картинки и сообщает об экономии."""
+        # Картинка до конвейера: пост без сигналов, как после импорта.
+        name = media_storage.save(
+            'posts/old.jpg', ContentFile(make_jpeg(3000, 1000))
+        )
+        Post.objects.bulk_create([Post(
+            author=User.objects.get(), text='Старый пост', image=name
+        )])
+        blobs.acquire(name)
+        post = Post.objects.get()
+        before = post.image.size
+        output = StringIO()
+        call_command('process_images', workers=0, stdout=output)
+        post.refresh_from_db()
+        self.assertTrue(post.renditions)
+        self.assertTrue(post.thumbnail)
+        self.assertLess(post.image.size, before)
+        self.assertIn('Обработано картинок: 1 из 1', output.getvalue())
+        # «Стало» учитывает и основную картинку, и копии рядом с ней.
+        directory = renditions.rendition_directory(post.image.name)
+        copies = sum(
+            default_storage.size(f'{directory}/{name}')
+            for name in default_storage.listdir(directory)[1]
+        )
+        self.assertTrue(copies)
+        self.assertIn(
+            f'стало {post.image.size + copies} '
+            f'(картинки {post.image.size}, копии {copies}), '
+            f'сэкономлено {before - post.image.size - copies} байт',
+            output.getvalue(),
+        )
+        call_command('process_images', workers=0, stdout=output)
+        self.assertIn('Все картинки уже обработаны.', output.getvalue())
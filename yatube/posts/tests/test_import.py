@@ -0,0 +1,167 @@
+import json
+import os
+import shutil
+import tempfile
+from io import StringIO
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+
+from .. import search
+from ..models import (AuthorStats, Blob, Comment, Follow, Group, Post,
+                      Timeline)
+
+User = get_user_model()
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+SMALL_GIF = (
+    b'\x47\x49\x46\x38\x39\x61\x02\x00'
+    b'\x01\x00\x80\x00\x00\x00\x00\x00'
+    b'\xFF\xFF\xFF\x21\xF9\x04\x00\x00'
+    b'\x00\x00\x00\x2C\x00\x00\x00\x00'
+    b'\x02\x00\x01\x00\x00\x02\x02\x0C'
+    b'\x0A\x00\x3B'
+)
+RECORDS = [
+    {'type': 'group', 'slug': 'cats', 'title': 'Коты'},
+    {'type': 'post', 'id': 100, 'author': 'leo', 'text': 'Первый',
+     'pub_date': '2015-01-01T10:00:00+00:00', 'group': 'cats',
+     'image': 'old/100.gif'},
+    {'type': 'post', 'id': 101, 'author': 'leo', 'text': 'Второй',
+     'pub_date': '2015-01-02T10:00:00+00:00'},
+    {'type': 'follow', 'user': 'tom', 'author': 'leo'},
+    {'type': 'comment', 'id': 500, 'post': 100, 'author': 'tom',
+     'text': 'Мяу', 'created': '2015-01-03T10:00:00+00:00'},
+    {'type': 'post', 'id': 102, 'author': 'leo'},
+    {'type': 'comment', 'post': 999, 'author': 'tom', 'text': 'Куда?'},
+    {'type': 'follow', 'user': 'leo', 'author': 'leo'},
+]
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class ImportPostsTests(TestCase):
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        self.workdir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.workdir)
+        os.makedirs(os.path.join(self.workdir, 'old'))
+        with open(os.path.join(self.workdir, 'old', '100.gif'), 'wb') as f:
+            f.write(SMALL_GIF)
+        self.path = os.path.join(self.workdir, 'dump.jsonl')
+        with open(self.path, 'w', encoding='utf-8') as dump:
+            for record in RECORDS:
+                dump.write(json.dumps(record, ensure_ascii=False) + '\n')
+
+    def run_import(self, *args, **options):
+        stdout, stderr = StringIO(), StringIO()
+        call_command(
+            'import_posts', self.path, *args,
+            stdout=stdout, stderr=stderr, **options
+        )
+        return stdout.getvalue(), stderr.getvalue()
+
+    def test_import_creates_rows_with_side_data(self):
+        """Импорт вставляет строки, даты, картинки, индекс и ленты."""
+        stdout, stderr = self.run_import(
+            '--create-users', images_dir=self.workdir, chunk_size=3
+        )
+        leo = User.objects.get(username='leo')
+        tom = User.objects.get(username='tom')
+        post = Post.objects.get(legacy_id=100)
+        self.assertEqual(post.author, leo)
+        self.assertEqual(post.group, Group.objects.get(slug='cats'))
+        self.assertEqual(post.pub_date.year, 2015)
+        self.assertRegex(post.image.name, r'^posts/\w\w/\w{64}\.gif$')
+        self.assertEqual(Blob.objects.get(name=post.image.name).refs, 1)
+        self.assertTrue(os.path.exists(post.image.path))
+        self.assertEqual(post.comments_count, 1)
+        comment = Comment.objects.get()
+        self.assertEqual(comment.created.year, 2015)
+        self.assertEqual(comment.legacy_id, 500)
+        self.assertTrue(Follow.objects.filter(user=tom, author=leo).exists())
+        self.assertEqual(AuthorStats.objects.get(user=leo).posts_count, 2)
+        self.assertEqual(
+            set(Timeline.objects.filter(user=tom).values_list(
+                'post__legacy_id', flat=True
+            )),
+            {100, 101},
+        )
+        self.assertEqual(
+            list(search.get_backend().search('коты').values_list(
+                'legacy_id', flat=True
+            )),
+            [100],
+        )
+        self.assertIn('записей/с', stdout)
+        for message in ('нет поля text', 'нет поста 999', 'самого себя'):
+            with self.subTest(message=message):
+                self.assertIn(message, stderr)
+
+    def test_unknown_authors_are_rejected(self):
+        """Без --create-users записи неизвестных авторов отбрасываются."""
+        _, stderr = self.run_import()
+        self.assertFalse(Post.objects.exists())
+        self.assertIn('нет пользователя leo', stderr)
+
+    def test_rerun_and_resume_skip_loaded_rows(self):
+        """Повторный запуск и --resume не дублируют строки."""
+        self.run_import('--create-users')
+        stdout, _ = self.run_import('--create-users')
+        self.assertEqual(Post.objects.count(), 2)
+        self.assertIn('уже были в базе: 2', stdout)
+        with open(self.path + '.progress', 'w') as progress:
+            progress.write('5')
+        stdout, _ = self.run_import('--create-users', '--resume')
+        self.assertIn('Продолжаем с записи 6', stdout)
+        self.assertEqual(Comment.objects.count(), 1)
+        self.assertFalse(os.path.exists(self.path + '.progress'))
+
+    def test_malformed_lines_are_reported(self):
+        """Битая строка, не объект и неверный id не прерывают импорт."""
+        with open(self.path, 'a', encoding='utf-8') as dump:
+            dump.write('{"type": "post", "id": \n')
+            dump.write('[1, 2]\n')
+            dump.write(json.dumps({
+                'type': 'post', 'id': -1, 'author': 'leo', 'text': 'Минус'
+            }) + '\n')
+            dump.write(json.dumps({
+                'type': 'post', 'id': 104, 'author': 'leo', 'text': 'После'
+            }) + '\n')
+        stdout, stderr = self.run_import('--create-users', chunk_size=3)
+        self.assertIn('Импорт завершен', stdout)
+        self.assertEqual(
+            set(Post.objects.values_list('legacy_id', flat=True)),
+            {100, 101, 104},
+        )
+        for message in (
+            'Запись 9: неверный JSON',
+            'Запись 10: запись должна быть объектом JSON',
+            'Запись 11: id вне диапазона',
+        ):
+            with self.subTest(message=message):
+                self.assertIn(message, stderr)
+        self.assertEqual(AuthorStats.objects.get(
+            user__username='leo'
+        ).posts_count, 3)
+
+    def test_import_into_database_with_posts(self):
+        """Id старой платформы не путаются с ключами существующих постов."""
+        author = User.objects.create_user(username='native')
+        Post.objects.create(pk=100, author=author, text='Свой пост')
+        stdout, _ = self.run_import('--create-users')
+        self.assertIn('уже были в базе: 0', stdout)
+        native = Post.objects.get(text='Свой пост')
+        self.assertEqual(native.pk, 100)
+        self.assertIsNone(native.legacy_id)
+        self.assertFalse(native.comments.exists())
+        legacy = Post.objects.get(legacy_id=100)
+        self.assertNotEqual(legacy.pk, native.pk)
+        self.assertEqual(legacy.text, 'Первый')
+        self.assertEqual(
+            list(legacy.comments.values_list('text', flat=True)), ['Мяу']
+        )
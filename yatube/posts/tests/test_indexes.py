@@ -0,0 +1,106 @@
+import re
+from unittest import skipUnless
+
+from django.contrib.auth import get_user_model
+from django.db import IntegrityError, connection
+from django.test import TestCase
+
+from .. import timeline
+from ..models import Comment, Follow, Group, Post
+from ..paginators import CursorPaginator
+from ..views import COMMENTS_ORDERING
+
+User = get_user_model()
+
+
+@skipUnless(connection.vendor == 'sqlite', 'EXPLAIN QUERY PLAN из SQLite')
+class ListingIndexTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='author')
+        cls.reader = User.objects.create_user(username='reader')
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test',
+            description='Тестовое описание',
+        )
+        Follow.objects.create(user=cls.reader, author=cls.author)
+        cls.post = Post.objects.create(
+            author=cls.author, group=cls.group, text='Тестовый пост'
+        )
+        Comment.objects.create(
+            post=cls.post, author=cls.reader, text='Коммент'
+        )
+
+    def plan(self, queryset):
+        sql, params = queryset.query.get_compiler(
+            connection=connection
+        ).as_sql()
+        with connection.cursor() as cursor:
+            cursor.execute('EXPLAIN QUERY PLAN ' + sql, params)
+            return [row[-1] for row in cursor.fetchall()]
+
+    def assertUsesIndexWithoutSort(self, queryset, seek=False):
+        plan = self.plan(queryset)
+        for step in plan:
+            self.assertNotIn('TEMP B-TREE', step, plan)
+            self.assertIsNone(
+                re.match(r'SCAN (TABLE )?\w+$', step),
+                f'Полный просмотр таблицы: {plan}'
+            )
+        if seek:
+            # Курсор должен начинать чтение индекса с ключа, а не сначала.
+            self.assertTrue(
+                any(
+                    re.search(r'(pub_date|created)[<>]\?', step)
+                    for step in plan
+                ),
+                plan
+            )
+
+    def listing_querysets(self):
+        """Запросы страниц всех лент из posts/views.py."""
+        post = ListingIndexTests.post
+        listings = {
+            'index': Post.objects.select_related('author', 'group'),
+            'group_posts': self.group.posts.select_related('author'),
+            'profile': self.author.posts.select_related('group'),
+        }
+        querysets = {}
+        for name, posts in listings.items():
+            querysets[name] = posts[:10]
+            paginator = CursorPaginator(posts, 10)
+            querysets[f'{name} (cursor)'] = posts.filter(
+                paginator._seek([post.pub_date, post.id], after=True)
+            ).order_by(*paginator.ordering)[:11]
+        feed = timeline.feed(self.reader)
+        querysets['follow_index'] = feed[:10]
+        paginator = CursorPaginator(feed, 10, timeline.FEED_ORDERING)
+        querysets['follow_index (cursor)'] = feed.filter(
+            paginator._seek([post.pub_date, post.id], after=True)
+        )[:11]
+        comments = post.comments.select_related('author')
+        querysets['post_detail comments'] = comments.order_by(
+            *COMMENTS_ORDERING
+        )[:21]
+        paginator = CursorPaginator(comments, 20, COMMENTS_ORDERING)
+        querysets['post_detail comments (cursor)'] = comments.filter(
+            paginator._seek([post.pub_date, post.id], after=True)
+        ).order_by(*COMMENTS_ORDERING)[:21]
+        return querysets
+
+    def test_listing_queries_use_indexes(self):
+        """Запросы лент идут по индексу и не сортируют результат."""
+        for name, queryset in self.listing_querysets().items():
+            with self.subTest(listing=name):
+                self.assertUsesIndexWithoutSort(
+                    queryset, seek=name.endswith('(cursor)')
+                )
+
+    def test_follow_is_unique(self):
+        """Повторная подписка и подписка на себя запрещены в базе."""
+        with self.assertRaises(IntegrityError):
+            Follow.objects.create(user=self.reader, author=self.author)
+        with self.assertRaises(IntegrityError):
+            Follow.objects.create(user=self.reader, author=self.reader)
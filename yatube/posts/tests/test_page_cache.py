@@ -0,0 +1,129 @@
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import AnonymousUser
+from django.core.cache import cache
+from django.http import HttpResponse
+from django.middleware.csrf import get_token
+from django.test import Client, RequestFactory, TestCase
+from django.urls import reverse
+
+from ..models import Comment, Follow, Group, Post
+from ..page_cache import anonymous_page
+
+User = get_user_model()
+
+
+class AnonymousPageCacheTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='author')
+        cls.reader = User.objects.create_user(username='reader')
+        cls.group = Group.objects.create(
+            title='Тестовая группа', slug='test', description='Описание'
+        )
+        cls.post = Post.objects.create(
+            author=cls.author, group=cls.group, text='Текст'
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.guest_client = Client()
+        self.reader_client = Client()
+        self.reader_client.force_login(self.reader)
+
+    def urls(self):
+        return (
+            reverse('posts:index'),
+            reverse('posts:group_posts', args=[self.group.slug]),
+            reverse('posts:profile', args=[self.author.username]),
+            reverse('posts:post_detail', args=[self.post.pk]),
+            reverse('posts:post_comments', args=[self.post.pk]),
+        )
+
+    def test_anonymous_page_cached(self):
+        """Повторный GET анонима не ходит в базу и не рендерит шаблон."""
+        for url in self.urls():
+            with self.subTest(url=url):
+                first = self.guest_client.get(url)
+                with self.assertNumQueries(0):
+                    second = self.guest_client.get(url)
+                self.assertFalse(second.templates)
+                self.assertEqual(second.content, first.content)
+                self.assertEqual(second['ETag'], first['ETag'])
+
+    def test_query_string_is_part_of_key(self):
+        """Разные страницы ленты кешируются отдельно."""
+        url = reverse('posts:index')
+        self.guest_client.get(url)
+        response = self.guest_client.get(url, {'page': 2})
+        self.assertTrue(response.templates)
+
+    def test_junk_query_does_not_add_entries(self):
+        """Посторонние параметры и битые курсоры не плодят записи кеша."""
+        url = reverse('posts:index')
+        first = self.guest_client.get(url)
+        for params in (
+            {'utm_source': 'mail'}, {'x': 1}, {'cursor': 'junk'},
+            {'comments': 'junk', 'utm_medium': 'feed'},
+        ):
+            with self.subTest(params=params):
+                with self.assertNumQueries(0):
+                    response = self.guest_client.get(url, params)
+                self.assertEqual(response.content, first.content)
+
+    def test_malformed_page_bypasses_cache(self):
+        """Номер страницы не в каноническом виде не кешируется."""
+        url = reverse('posts:index')
+        for page in ('01', ' 2', 'abc', '9' * 20):
+            with self.subTest(page=page):
+                cache.clear()
+                self.guest_client.get(url, {'page': page})
+                response = self.guest_client.get(url, {'page': page})
+                self.assertTrue(response.templates)
+
+    def test_user_bypasses_cache(self):
+        """Пользователь со входом получает свою шапку и форму комментария."""
+        url = reverse('posts:post_detail', args=[self.post.pk])
+        self.guest_client.get(url)
+        response = self.reader_client.get(url)
+        self.assertContains(response, 'Пользователь: reader')
+        self.assertContains(response, 'csrfmiddlewaretoken')
+        self.assertNotContains(
+            self.guest_client.get(url), 'csrfmiddlewaretoken'
+        )
+
+    def test_writes_invalidate(self):
+        """Комментарии, посты и подписки меняют страницы анонима."""
+        detail = reverse('posts:post_detail', args=[self.post.pk])
+        profile = reverse('posts:profile', args=[self.author.username])
+        self.guest_client.get(detail)
+        Comment.objects.create(
+            post=self.post, author=self.reader, text='Новый комментарий'
+        )
+        self.assertContains(self.guest_client.get(detail), 'Новый комментарий')
+        self.assertContains(self.guest_client.get(profile), 'Подписчиков: 0')
+        Follow.objects.create(user=self.reader, author=self.author)
+        self.assertContains(self.guest_client.get(profile), 'Подписчиков: 1')
+        self.group.description = 'Новое описание'
+        self.group.save()
+        self.assertContains(
+            self.guest_client.get(
+                reverse('posts:group_posts', args=[self.group.slug])
+            ),
+            'Новое описание',
+        )
+
+    def test_csrf_response_not_cached(self):
+        """Ответ, выдавший CSRF-токен, не кешируется."""
+        calls = []
+
+        @anonymous_page
+        def view(request):
+            calls.append(request)
+            return HttpResponse(get_token(request))
+
+        for _ in range(2):
+            request = RequestFactory().get('/csrf/')
+            request.user = AnonymousUser()
+            view(request)
+        self.assertEqual(len(calls), 2)
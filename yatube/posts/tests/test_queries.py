@@ -0,0 +1,118 @@
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from core.query_budget import assert_max_queries
+from .. import trending
+from ..models import Comment, Follow, Group, Post
+from ..urls import urlpatterns
+
+User = get_user_model()
+
+
+class QueryBudgetTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='author')
+        cls.reader = User.objects.create_user(username='reader')
+        cls.stranger = User.objects.create_user(username='stranger')
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test',
+            description='Тестовое описание',
+        )
+        Follow.objects.create(user=cls.reader, author=cls.author)
+
+    def setUp(self):
+        self.author_client = Client()
+        self.author_client.force_login(QueryBudgetTests.author)
+        self.reader_client = Client()
+        self.reader_client.force_login(QueryBudgetTests.reader)
+
+    def add_posts(self, count):
+        for i in range(count):
+            post = Post.objects.create(
+                author=self.author, group=self.group, text=f'Пост {i}'
+            )
+            Comment.objects.create(
+                post=post, author=self.reader, text=f'Коммент {i}'
+            )
+        trending.compute()
+        return post
+
+    def requests(self, post):
+        """Запрос к каждому url из posts/urls.py: имя -> вызов клиента."""
+        return {
+            'index': lambda: self.reader_client.get(reverse('posts:index')),
+            'group_posts': lambda: self.reader_client.get(
+                reverse('posts:group_posts', args=[self.group.slug])),
+            'profile': lambda: self.reader_client.get(
+                reverse('posts:profile', args=[self.author.username])),
+            'post_detail': lambda: self.reader_client.get(
+                reverse('posts:post_detail', args=[post.id])),
+            'post_comments': lambda: self.reader_client.get(
+                reverse('posts:post_comments', args=[post.id])),
+            'post_create': lambda: self.author_client.post(
+                reverse('posts:post_create'), {'text': 'Новый пост'}),
+            'post_edit': lambda: self.author_client.get(
+                reverse('posts:post_edit', args=[post.id])),
+            'add_comment': lambda: self.reader_client.post(
+                reverse('posts:add_comment', args=[post.id]),
+                {'text': 'Коммент'}),
+            'follow_index': lambda: self.reader_client.get(
+                reverse('posts:follow_index')),
+            'trending': lambda: self.reader_client.get(
+                reverse('posts:trending')),
+            'profile_follow': lambda: self.reader_client.get(
+                reverse('posts:profile_follow', args=['stranger'])),
+            'profile_unfollow': lambda: self.reader_client.get(
+                reverse('posts:profile_unfollow', args=['stranger'])),
+            'search': lambda: self.reader_client.get(
+                reverse('posts:search'), {'q': 'пост'}),
+            'export': lambda: b''.join(self.reader_client.get(
+                reverse('posts:export'))),
+            'index_rss': lambda: self.reader_client.get(
+                reverse('posts:index_rss')),
+            'index_atom': lambda: self.reader_client.get(
+                reverse('posts:index_atom')),
+            'group_rss': lambda: self.reader_client.get(
+                reverse('posts:group_rss', args=[self.group.slug])),
+            'group_atom': lambda: self.reader_client.get(
+                reverse('posts:group_atom', args=[self.group.slug])),
+            'author_rss': lambda: self.reader_client.get(
+                reverse('posts:author_rss', args=[self.author.username])),
+            'author_atom': lambda: self.reader_client.get(
+                reverse('posts:author_atom', args=[self.author.username])),
+            'api_posts': lambda: self.reader_client.get(
+                reverse('posts:api_posts'), {'group': self.group.slug}),
+            'api_post': lambda: self.reader_client.get(
+                reverse('posts:api_post', args=[post.id])),
+            'api_comments': lambda: self.reader_client.get(
+                reverse('posts:api_comments', args=[post.id])),
+            'api_groups': lambda: self.reader_client.get(
+                reverse('posts:api_groups')),
+            'api_follow': lambda: self.reader_client.get(
+                reverse('posts:api_follow')),
+        }
+
+    def test_every_url_has_budget(self):
+        """У каждого url из posts/urls.py объявлен бюджет запросов."""
+        for pattern in urlpatterns:
+            with self.subTest(name=pattern.name):
+                self.assertIn(f'posts:{pattern.name}', settings.QUERY_BUDGETS)
+
+    def test_views_stay_within_budget(self):
+        """Число запросов не зависит от размера страницы."""
+        for count in (1, 25):
+            post = self.add_posts(count)
+            for name, request in self.requests(post).items():
+                view_name = f'posts:{name}'
+                with self.subTest(posts=count, view=view_name):
+                    cache.clear()
+                    with assert_max_queries(
+                        settings.QUERY_BUDGETS[view_name], view_name
+                    ):
+                        request()
@@ -0,0 +1,171 @@
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db import connection
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from .. import search
+from ..models import Group, Post
+from ..stemmer import stem
+
+User = get_user_model()
+
+
+class StemmerTests(TestCase):
+    def test_stem(self):
+        """Словоформы сводятся к одной основе."""
+        cases = {
+            'котами': 'кот',
+            'коты': 'кот',
+            'красивейший': 'красив',
+            'красивая': 'красив',
+            'новости': 'новост',
+            'ёлки': 'елк',
+        }
+        for word, expected in cases.items():
+            with self.subTest(word=word):
+                self.assertEqual(stem(word), expected)
+
+
+class SearchTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='author')
+        cls.group = Group.objects.create(
+            title='Путешествия', slug='travel', description='Описание'
+        )
+
+    def setUp(self):
+        self.client = Client()
+
+    def found(self, query):
+        return list(
+            search.get_backend().search(query).order_by(
+                *search.get_backend().ordering
+            ).values_list('pk', flat=True)
+        )
+
+    def test_index_follows_save_and_delete(self):
+        """Индекс обновляется при сохранении и удалении поста."""
+        post = Post.objects.create(author=self.author, text='Рыжие коты')
+        self.assertEqual(self.found('кот'), [post.pk])
+        post.text = 'Собаки'
+        post.save()
+        self.assertEqual(self.found('кот'), [])
+        self.assertEqual(self.found('собака'), [post.pk])
+        post.delete()
+        self.assertEqual(self.found('собака'), [])
+
+    def test_group_title_is_searchable(self):
+        """Пост находится по названию группы, в том числе после правки."""
+        post = Post.objects.create(
+            author=self.author, text='Текст', group=self.group
+        )
+        self.assertEqual(self.found('путешествие'), [post.pk])
+        self.group.title = 'Походы'
+        self.group.save()
+        self.assertEqual(self.found('поход'), [post.pk])
+        self.group.delete()
+        self.assertEqual(self.found('поход'), [])
+
+    def test_results_are_ranked(self):
+        """Пост с большим числом совпадений идет первым."""
+        weak = Post.objects.create(
+            author=self.author, text='Кот и много других слов рядом'
+        )
+        strong = Post.objects.create(author=self.author, text='Кот кот')
+        self.assertEqual(self.found('коты'), [strong.pk, weak.pk])
+
+    def test_search_view_pages_by_cursor(self):
+        """Выдача листается курсором и сохраняет запрос в ссылках."""
+        for i in range(13):
+            Post.objects.create(author=self.author, text=f'Новость {i}')
+        Post.objects.create(author=self.author, text='Другое')
+        url = reverse('posts:search')
+        response = self.client.get(url, {'q': 'новости'})
+        page_obj = response.context['page_obj']
+        self.assertEqual(len(page_obj), 10)
+        self.assertContains(response, '?q=%D0%BD%D0%BE%D0%B2%D0%BE%D1%81')
+        response = self.client.get(
+            url, {'q': 'новости', 'cursor': page_obj.next_cursor}
+        )
+        self.assertEqual(len(response.context['page_obj']), 3)
+        self.assertFalse(response.context['page_obj'].has_next())
+
+    def test_empty_query(self):
+        """Пустой запрос и запрос из одних знаков не ломают выдачу."""
+        url = reverse('posts:search')
+        self.assertIsNone(self.client.get(url).context['page_obj'])
+        response = self.client.get(url, {'q': '"*)'})
+        self.assertEqual(len(response.context['page_obj']), 0)
+
+    def test_rebuild_command(self):
+        """Команда восстанавливает индекс, прочитав таблицу порциями."""
+        posts = [
+            Post.objects.create(author=self.author, text=f'Поход {i}')
+            for i in range(5)
+        ]
+        with connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {search.FTS_TABLE}')
+        self.assertEqual(self.found('поход'), [])
+        call_command(
+            'rebuild_search_index', chunk_size=2, stdout=StringIO()
+        )
+        self.assertEqual(
+            sorted(self.found('поход')), [post.pk for post in posts]
+        )
+
+    def test_rebuild_catches_up_with_writes(self):
+        """Изменения во время перестройки попадают в новый индекс."""
+        group = Group.objects.create(title='Лес', slug='forest')
+        posts = [
+            Post.objects.create(
+                author=self.author, text=f'Поход {i}', group=group
+            )
+            for i in range(4)
+        ]
+        rebuild = search.rebuild(chunk_size=2)
+        self.assertEqual(next(rebuild), 2)
+        # Запросы мимо сигналов: индекс догоняет только журнал триггеров.
+        Post.objects.filter(pk=posts[0].pk).update(text='Рыбалка')
+        Post.objects.filter(pk=posts[3].pk).update(text='Рыбалка')
+        Post.objects.filter(pk=posts[1].pk).delete()
+        created = Post.objects.create(author=self.author, text='Рыбалка')
+        Group.objects.filter(pk=group.pk).update(title='Горы')
+        list(rebuild)
+        self.assertEqual(self.found('поход'), [posts[2].pk])
+        self.assertEqual(
+            sorted(self.found('рыбалка')),
+            [posts[0].pk, posts[3].pk, created.pk],
+        )
+        self.assertEqual(
+            sorted(self.found('горы')),
+            [posts[0].pk, posts[2].pk, posts[3].pk],
+        )
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT name FROM sqlite_master')
+            names = {name for name, in cursor.fetchall()}
+        leftovers = {
+            search.SHADOW_TABLE, search.CHANGES_TABLE,
+            *search.CHANGE_TRIGGERS,
+        }
+        self.assertFalse(names & leftovers)
+
+    def test_admin_search_uses_index(self):
+        """Поиск в админке идет по индексу, включая название группы."""
+        admin = User.objects.create_superuser(
+            'admin', 'admin@example.com', 'password'
+        )
+        self.client.force_login(admin)
+        post = Post.objects.create(
+            author=self.author, text='Текст', group=self.group
+        )
+        response = self.client.get(
+            reverse('admin:posts_post_changelist'), {'q': 'путешествиях'}
+        )
+        self.assertEqual(
+            list(response.context['cl'].result_list), [post]
+        )
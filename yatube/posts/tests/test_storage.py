@@ -0,0 +1,144 @@
+import os
+import shutil
+import tempfile
+import time
+from datetime import timedelta
+from io import StringIO
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.test import Client, TransactionTestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from .. import blobs, images, renditions, thumbnails
+from ..models import Blob, Post
+from ..storage import media_storage
+
+User = get_user_model()
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+SMALL_GIF = (
+    b'\x47\x49\x46\x38\x39\x61\x02\x00'
+    b'\x01\x00\x80\x00\x00\x00\x00\x00'
+    b'\xFF\xFF\xFF\x21\xF9\x04\x00\x00'
+    b'\x00\x00\x00\x2C\x00\x00\x00\x00'
+    b'\x02\x00\x01\x00\x00\x02\x02\x0C'
+    b'\x0A\x00\x3B'
+)
+OTHER_GIF = SMALL_GIF.replace(b'\xFF\xFF\xFF', b'\x00\xFF\x00')
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class ContentAddressedStorageTests(TransactionTestCase):
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        self.client = Client()
+        self.client.force_login(User.objects.create_user(username='author'))
+        self.old_workers = images.IMAGE_WORKERS, thumbnails.THUMBNAIL_WORKERS
+        images.IMAGE_WORKERS = thumbnails.THUMBNAIL_WORKERS = 0
+
+    def tearDown(self):
+        images.IMAGE_WORKERS, thumbnails.THUMBNAIL_WORKERS = self.old_workers
+
+    def create_post(self, text, content=SMALL_GIF):
+        uploaded = SimpleUploadedFile(
+            name='meme.gif', content=content, content_type='image/gif'
+        )
+        self.client.post(
+            reverse('posts:post_create'), {'text': text, 'image': uploaded},
+        )
+        return Post.objects.get(text=text)
+
+    def test_same_content_same_name(self):
+        """Одинаковое содержимое сохраняется один раз под именем-хешем."""
+        first = media_storage.save('posts/a.gif', ContentFile(SMALL_GIF))
+        second = media_storage.save('posts/b.GIF', ContentFile(SMALL_GIF))
+        other = media_storage.save('posts/a.gif', ContentFile(OTHER_GIF))
+        self.assertEqual(first, second)
+        self.assertNotEqual(first, other)
+        self.assertRegex(first, r'^posts/\w\w/\w{64}\.gif$')
+        with media_storage.open(first) as stored:
+            self.assertEqual(stored.read(), SMALL_GIF)
+
+    def test_reposts_share_files(self):
+        """Репосты ссылаются на один файл, его копии и миниатюру."""
+        first = self.create_post('Первый')
+        second = self.create_post('Второй')
+        self.assertEqual(first.image.name, second.image.name)
+        self.assertEqual(first.thumbnail, second.thumbnail)
+        self.assertEqual(Blob.objects.get(name=first.image.name).refs, 2)
+        # Исходная картинка после перекодирования никому не нужна.
+        self.assertEqual(Blob.objects.filter(refs__gt=0).count(), 1)
+
+    def test_file_removed_with_last_reference(self):
+        """Файл удаляется вместе с последним постом, где он есть."""
+        first = self.create_post('Первый')
+        second = self.create_post('Второй')
+        name, thumbnail = first.image.name, first.thumbnail
+        webp = renditions.rendition_name(name, '2', renditions.WEBP)
+        first.delete()
+        self.assertTrue(media_storage.exists(name))
+        self.assertEqual(Blob.objects.get(name=name).refs, 1)
+        second.delete()
+        blob = Blob.objects.get(name=name)
+        self.assertEqual(blob.refs, 0)
+        self.assertIsNotNone(blob.released)
+        # До конца срока файл ждет: его могут загрузить снова.
+        self.assertEqual(blobs.sweep(), 0)
+        self.assertTrue(media_storage.exists(name))
+        output = StringIO()
+        call_command('sweep_blobs', grace=0, stdout=output)
+        # Вместе с JPEG поста удаляется и исходная GIF.
+        self.assertIn('Удалено файлов без ссылок: 2', output.getvalue())
+        self.assertFalse(media_storage.exists(name))
+        self.assertFalse(default_storage.exists(webp))
+        self.assertFalse(default_storage.exists(thumbnail))
+        self.assertFalse(Blob.objects.filter(name=name).exists())
+
+    def test_replaced_image_released(self):
+        """Замененная картинка без других ссылок удаляется."""
+        post = self.create_post('Пост')
+        name = post.image.name
+        self.client.post(
+            reverse('posts:post_edit', args=(post.pk,)),
+            {'text': 'Пост', 'image': SimpleUploadedFile(
+                name='new.gif', content=OTHER_GIF, content_type='image/gif'
+            )},
+        )
+        post.refresh_from_db()
+        self.assertNotEqual(post.image.name, name)
+        self.assertEqual(Blob.objects.get(name=name).refs, 0)
+        blobs.sweep(grace=0)
+        self.assertFalse(media_storage.exists(name))
+        self.assertEqual(Blob.objects.get(name=post.image.name).refs, 1)
+
+    def test_reupload_keeps_released_file(self):
+        """Файл, который загружают снова, не удаляется и после срока."""
+        post = self.create_post('Пост')
+        name = post.image.name
+        post.delete()
+        Blob.objects.filter(name=name).update(
+            released=timezone.now() - timedelta(days=2)
+        )
+        old = time.time() - 2 * 24 * 60 * 60
+        os.utime(media_storage.path(name), (old, old))
+        # Параллельная загрузка нашла файл, ссылку еще не закоммитила.
+        with media_storage.open(name) as stored:
+            self.assertEqual(
+                media_storage.save('posts/again.jpg', stored), name
+            )
+        self.assertEqual(blobs.sweep(), 0)
+        self.assertTrue(media_storage.exists(name))
+        blobs.acquire(name)
+        blob = Blob.objects.get(name=name)
+        self.assertEqual(blob.refs, 1)
+        self.assertIsNone(blob.released)
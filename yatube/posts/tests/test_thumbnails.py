@@ -0,0 +1,69 @@
+import shutil
+import tempfile
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from .. import images, thumbnails
+from ..models import THUMBNAIL_PLACEHOLDER, Post
+
+User = get_user_model()
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+SMALL_GIF = (
+    b'\x47\x49\x46\x38\x39\x61\x02\x00'
+    b'\x01\x00\x80\x00\x00\x00\x00\x00'
+    b'\xFF\xFF\xFF\x21\xF9\x04\x00\x00'
+    b'\x00\x00\x00\x2C\x00\x00\x00\x00'
+    b'\x02\x00\x01\x00\x00\x02\x02\x0C'
+    b'\x0A\x00\x3B'
+)
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class ThumbnailTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='author')
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        self.client = Client()
+        self.client.force_login(ThumbnailTests.user)
+
+    def create_post(self):
+        uploaded = SimpleUploadedFile(
+            name='small.gif', content=SMALL_GIF, content_type='image/gif'
+        )
+        self.client.post(
+            reverse('posts:post_create'),
+            {'text': 'Пост с картинкой', 'image': uploaded},
+        )
+        return Post.objects.get(text='Пост с картинкой')
+
+    def test_placeholder_while_pending(self):
+        """Пока миниатюра строится, в ленте показывается заглушка."""
+        post = self.create_post()
+        self.assertEqual(post.thumbnail, '')
+        response = self.client.get(reverse('posts:index'))
+        self.assertContains(response, THUMBNAIL_PLACEHOLDER)
+
+    def test_thumbnail_generated_on_save(self):
+        """Без фонового пула миниатюра строится при сохранении формы."""
+        old_workers = thumbnails.THUMBNAIL_WORKERS, images.IMAGE_WORKERS
+        thumbnails.THUMBNAIL_WORKERS = images.IMAGE_WORKERS = 0
+        try:
+            post = self.create_post()
+        finally:
+            thumbnails.THUMBNAIL_WORKERS, images.IMAGE_WORKERS = old_workers
+        self.assertTrue(post.thumbnail)
+        response = self.client.get(reverse('posts:index'))
+        self.assertContains(response, post.thumbnail_url)
+        self.assertNotContains(response, THUMBNAIL_PLACEHOLDER)
@@ -0,0 +1,116 @@
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from .. import timeline
+from ..models import Follow, Post, Timeline
+
+User = get_user_model()
+
+
+class TimelineTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.reader = User.objects.create_user(username='reader')
+        cls.author = User.objects.create_user(username='writer')
+        cls.other = User.objects.create_user(username='other')
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+        self.client.force_login(TimelineTests.reader)
+
+    def feed_ids(self):
+        response = self.client.get(reverse('posts:follow_index'))
+        return [post.id for post in response.context['page_obj']]
+
+    def test_new_post_fans_out_to_followers(self):
+        """Новый пост автора появляется в ленте подписчика."""
+        Follow.objects.create(user=self.reader, author=self.author)
+        post = Post.objects.create(author=self.author, text='Новый пост')
+        Post.objects.create(author=self.other, text='Чужой пост')
+        self.assertEqual(self.feed_ids(), [post.id])
+
+    def test_follow_backfills_and_unfollow_prunes(self):
+        """Подписка добавляет старые посты, отписка их убирает."""
+        post = Post.objects.create(author=self.author, text='Старый пост')
+        self.client.get(
+            reverse('posts:profile_follow', args=[self.author.username])
+        )
+        self.assertEqual(self.feed_ids(), [post.id])
+        self.client.get(
+            reverse('posts:profile_unfollow', args=[self.author.username])
+        )
+        self.assertEqual(self.feed_ids(), [])
+        self.assertFalse(Timeline.objects.filter(user=self.reader).exists())
+
+    def test_timeline_is_capped(self):
+        """Лента обрезается командой до TIMELINE_SIZE, чтение не пишет."""
+        Follow.objects.create(user=self.reader, author=self.author)
+        Follow.objects.create(user=self.other, author=self.author)
+        posts = [
+            Post.objects.create(author=self.author, text=f'Пост {i}')
+            for i in range(5)
+        ]
+        old_size = timeline.TIMELINE_SIZE
+        timeline.TIMELINE_SIZE = 3
+        try:
+            with CaptureQueriesContext(connection) as queries:
+                self.feed_ids()
+            self.assertFalse([
+                query for query in queries
+                if not query['sql'].startswith('SELECT')
+            ])
+            self.assertEqual(
+                Timeline.objects.filter(user=self.reader).count(), 5
+            )
+            output = StringIO()
+            call_command('trim_timelines', stdout=output)
+        finally:
+            timeline.TIMELINE_SIZE = old_size
+        self.assertIn('Обрезано лент: 2', output.getvalue())
+        for user in (self.reader, self.other):
+            with self.subTest(user=user.username):
+                self.assertEqual(
+                    list(Timeline.objects.filter(user=user).values_list(
+                        'post_id', flat=True)),
+                    [post.id for post in posts[:1:-1]]
+                )
+
+    def test_pull_author_is_merged_on_read(self):
+        """Посты автора с огромной аудиторией подмешиваются при чтении."""
+        Follow.objects.create(user=self.reader, author=self.author)
+        Follow.objects.create(user=self.reader, author=self.other)
+        old_limit = timeline.TIMELINE_FANOUT_LIMIT
+        timeline.TIMELINE_FANOUT_LIMIT = 0
+        try:
+            cache.clear()
+            pulled = Post.objects.create(author=self.author, text='Звезда')
+        finally:
+            timeline.TIMELINE_FANOUT_LIMIT = old_limit
+        self.assertFalse(Timeline.objects.filter(post=pulled).exists())
+        pushed = Post.objects.create(author=self.other, text='Обычный')
+        self.assertEqual(self.feed_ids(), [pushed.id, pulled.id])
+
+    def test_pull_authors_read_counters(self):
+        """Список pull-авторов строится по счетчикам, одним запросом."""
+        Follow.objects.create(user=self.reader, author=self.author)
+        old_limit = timeline.TIMELINE_FANOUT_LIMIT
+        timeline.TIMELINE_FANOUT_LIMIT = 0
+        cache.clear()
+        try:
+            with CaptureQueriesContext(connection) as queries:
+                authors = timeline.pull_authors()
+                timeline.pull_authors()
+        finally:
+            timeline.TIMELINE_FANOUT_LIMIT = old_limit
+        self.assertEqual(authors, {self.author.pk})
+        self.assertEqual(len(queries), 1)
+        self.assertNotIn('posts_follow', queries[0]['sql'])
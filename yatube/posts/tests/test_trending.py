@@ -0,0 +1,123 @@
+from datetime import timedelta
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import Client, TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from .. import trending
+from ..listing_cache import generation
+from ..models import Comment, Follow, Post, TrendingPost
+
+User = get_user_model()
+
+
+class TrendingTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='author')
+        cls.star = User.objects.create_user(username='star')
+        cls.reader = User.objects.create_user(username='reader')
+
+    def setUp(self):
+        cache.clear()
+        self.now = timezone.now()
+        self.guest_client = Client()
+
+    def create_post(self, text, author=None, hours_ago=0, comments=0,
+                    comments_hours_ago=0):
+        post = Post.objects.create(author=author or self.author, text=text)
+        Post.objects.filter(pk=post.pk).update(
+            pub_date=self.now - timedelta(hours=hours_ago)
+        )
+        for i in range(comments):
+            Comment.objects.create(
+                post=post, author=self.reader, text=f'Коммент {i}'
+            )
+        Comment.objects.filter(post=post).update(
+            created=self.now - timedelta(hours=comments_hours_ago)
+        )
+        return post
+
+    def ranking(self):
+        trending.compute(self.now)
+        return list(TrendingPost.objects.values_list('post__text', flat=True))
+
+    def test_comment_velocity(self):
+        """Свежие комментарии поднимают пост выше старых и их отсутствия."""
+        self.create_post('Тихий')
+        self.create_post('Обсуждали вчера', comments=3, comments_hours_ago=30)
+        self.create_post('Обсуждают сейчас', comments=3)
+        self.assertEqual(
+            self.ranking(), ['Обсуждают сейчас', 'Обсуждали вчера', 'Тихий']
+        )
+
+    def test_post_age_decay(self):
+        """Из одинаково обсуждаемых постов выше новый."""
+        self.create_post('Вчерашний', hours_ago=24, comments=2)
+        self.create_post('Сегодняшний', hours_ago=1, comments=2)
+        self.assertEqual(self.ranking(), ['Сегодняшний', 'Вчерашний'])
+
+    def test_follower_reach(self):
+        """При равном обсуждении выше пост автора с большим охватом."""
+        Follow.objects.create(user=self.reader, author=self.star)
+        Follow.objects.create(user=self.author, author=self.star)
+        self.create_post('Обычный')
+        self.create_post('Звездный', author=self.star)
+        self.assertEqual(self.ranking(), ['Звездный', 'Обычный'])
+
+    def test_window_and_size(self):
+        """Старые посты не попадают в рейтинг, мест не больше TRENDING_SIZE."""
+        self.create_post('Старый', hours_ago=trending.TRENDING_WINDOW + 1)
+        for i in range(3):
+            self.create_post(f'Свежий {i}', comments=i)
+        old_size = trending.TRENDING_SIZE
+        trending.TRENDING_SIZE = 2
+        try:
+            self.assertEqual(self.ranking(), ['Свежий 2', 'Свежий 1'])
+        finally:
+            trending.TRENDING_SIZE = old_size
+
+    def test_compute_bumps_only_trending(self):
+        """Пересчет не сбрасывает кеш лент, а без новых мест — и свой."""
+        self.create_post('Пост', comments=1)
+        listing, before = generation(), trending.version()
+        trending.compute(self.now)
+        ranked = trending.version()
+        self.assertNotEqual(ranked, before)
+        trending.compute(self.now + timedelta(minutes=5))
+        self.assertEqual(trending.version(), ranked)
+        self.assertEqual(generation(), listing)
+
+    def test_feed_pages_ranked_table(self):
+        """Лента показывает посчитанный рейтинг по местам."""
+        url = reverse('posts:trending')
+        self.assertContains(self.guest_client.get(url), 'еще не посчитан')
+        self.create_post('Второй', comments=1)
+        self.create_post('Первый', comments=2)
+        output = StringIO()
+        call_command('update_trending', stdout=output)
+        self.assertIn('В тренде 2 постов', output.getvalue())
+        response = self.guest_client.get(url)
+        self.assertEqual(
+            [entry.post.text for entry in response.context['page_obj']],
+            ['Первый', 'Второй'],
+        )
+        self.assertContains(
+            response, f'href="{url}"\n      >\n        В тренде'
+        )
+
+    def test_switcher_tab(self):
+        """Вкладка «В тренде» есть у всех, «Избранные» — только со входом."""
+        response = self.guest_client.get(reverse('posts:index'))
+        self.assertContains(response, reverse('posts:trending'))
+        self.assertNotContains(response, reverse('posts:follow_index'))
+        reader_client = Client()
+        reader_client.force_login(self.reader)
+        response = reader_client.get(reverse('posts:trending'))
+        self.assertContains(response, reverse('posts:follow_index'))
+        self.assertContains(response, 'nav-link active')
@@ -10,7 +10,9 @@ from django.core.files.uploadedfile import SimpleUploadedFile
 from django.test import Client, TestCase, override_settings
 from django.urls import reverse
 
+from .. import counters, page_cache
 from ..models import Group, Post, Comment, Follow
+from ..paginators import WindowedPaginator
 
 User = get_user_model()
 TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
@@ -85,6 +87,8 @@ class PostTemplatesTests(TestCase):
                  ) for i in range(12, 15)
         ]
         )
+        # bulk_create не шлет сигналов: счетчики — как после импорта.
+        counters.recount()
         Comment.objects.create(
             post=Post.objects.last(),
             author=cls.user_author,
@@ -230,9 +234,13 @@ class PostTemplatesTests(TestCase):
 
     def test_cache_index_page(self):
         """Проверяем кеширование главной страницы."""
+        cache.clear()
         response1 = self.authorized_client.get(reverse('posts:index'))
         test_object1 = response1.content
-        Post.objects.filter(group=PostTemplatesTests.group2).delete()
+        # update() не шлет сигналов: страница отдается из кеша.
+        Post.objects.filter(group=PostTemplatesTests.group2).update(
+            text='Измененный текст'
+        )
         response2 = self.authorized_client.get(reverse('posts:index'))
         test_object2 = response2.content
         self.assertEqual(test_object1, test_object2)
@@ -240,3 +248,222 @@ class PostTemplatesTests(TestCase):
         response3 = self.authorized_client.get(reverse('posts:index'))
         test_object3 = response3.content
         self.assertNotEqual(test_object1, test_object3)
+
+    def test_cache_invalidated_by_signals(self):
+        """Сохранение и удаление поста сразу сбрасывают кеш ленты."""
+        cache.clear()
+        response1 = self.authorized_client.get(reverse('posts:index'))
+        Post.objects.filter(group=PostTemplatesTests.group2).delete()
+        response2 = self.authorized_client.get(reverse('posts:index'))
+        self.assertNotEqual(response1.content, response2.content)
+
+    def test_cache_varies_by_page(self):
+        """Вторая страница не получает закешированную первую."""
+        cache.clear()
+        response1 = self.authorized_client.get(reverse('posts:index'))
+        response2 = self.authorized_client.get(
+            reverse('posts:index'), {'page': 2}
+        )
+        first_post = response1.context['page_obj'][0]
+        self.assertNotIn(
+            reverse('posts:post_detail', args=[first_post.pk]).encode(),
+            response2.content
+        )
+
+
+class PostCursorPaginationTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='cursor')
+        Post.objects.bulk_create([
+            Post(author=cls.user, text=f'Пост {i}') for i in range(25)
+        ])
+
+    def setUp(self):
+        self.guest_client = Client()
+        # Контекст есть только у отрендеренных, а не взятых из кеша страниц.
+        self.page_cache_timeout = page_cache.PAGE_CACHE_TIMEOUT
+        page_cache.PAGE_CACHE_TIMEOUT = 0
+
+    def tearDown(self):
+        page_cache.PAGE_CACHE_TIMEOUT = self.page_cache_timeout
+
+    def test_cursor_pages_cover_feed(self):
+        """Курсорные страницы обходят ленту без пропусков и повторов."""
+        expected = list(
+            Post.objects.order_by('-pub_date', '-id').values_list(
+                'id', flat=True)
+        )
+        seen = []
+        cursor = ''
+        while True:
+            response = self.guest_client.get(
+                reverse('posts:index'), {'cursor': cursor}
+            )
+            page_obj = response.context['page_obj']
+            seen.extend(post.id for post in page_obj)
+            if not page_obj.has_next():
+                break
+            cursor = page_obj.next_cursor
+        self.assertEqual(seen, expected)
+
+    def test_cursor_previous_page(self):
+        """Ссылка «Предыдущая» возвращает на предыдущую страницу."""
+        first = self.guest_client.get(
+            reverse('posts:index'), {'cursor': ''}
+        ).context['page_obj']
+        second = self.guest_client.get(
+            reverse('posts:index'), {'cursor': first.next_cursor}
+        ).context['page_obj']
+        back = self.guest_client.get(
+            reverse('posts:index'), {'cursor': second.previous_cursor}
+        ).context['page_obj']
+        self.assertFalse(first.has_previous())
+        self.assertEqual(list(back), list(first))
+
+    def test_broken_cursor_returns_first_page(self):
+        """Битый курсор отдает первую страницу."""
+        response = self.guest_client.get(
+            reverse('posts:index'), {'cursor': 'broken'}
+        )
+        self.assertEqual(
+            response.context['page_obj'][0],
+            Post.objects.order_by('-pub_date', '-id').first()
+        )
+
+
+class PostWindowedPaginationTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='windowed')
+        Post.objects.bulk_create([
+            Post(author=cls.user, text=f'Пост {i}') for i in range(95)
+        ])
+        counters.recount()
+
+    def setUp(self):
+        cache.clear()
+        self.guest_client = Client()
+        self.page_cache_timeout = page_cache.PAGE_CACHE_TIMEOUT
+        page_cache.PAGE_CACHE_TIMEOUT = 0
+
+    def tearDown(self):
+        page_cache.PAGE_CACHE_TIMEOUT = self.page_cache_timeout
+
+    def test_page_window(self):
+        """Навигация — первая, последняя и соседи текущей страницы."""
+        paginator = WindowedPaginator(range(500), 10, window=2)
+        cases = {
+            1: [1, 2, 3, None, 50],
+            4: [1, 2, 3, 4, 5, 6, None, 50],
+            25: [1, None, 23, 24, 25, 26, 27, None, 50],
+            50: [1, None, 48, 49, 50],
+        }
+        for number, expected in cases.items():
+            with self.subTest(number=number):
+                self.assertEqual(paginator.page_window(number), expected)
+
+    def test_listing_renders_window_only(self):
+        """Страница ленты не выводит ссылки на все страницы подряд."""
+        response = self.guest_client.get(reverse('posts:index'), {'page': 6})
+        self.assertContains(response, '?page=1"')
+        self.assertContains(response, '?page=8"')
+        self.assertNotContains(response, '?page=2"')
+        self.assertContains(response, '&hellip;')
+
+    def test_count_is_cached_until_write(self):
+        """COUNT(*) ленты берется из кеша, пока посты не изменятся."""
+        url = reverse('posts:index')
+        self.guest_client.get(url)
+        # bulk_create не шлет сигналов и поколение кеша не меняет.
+        Post.objects.bulk_create([
+            Post(author=self.user, text=f'Новый {i}') for i in range(5)
+        ])
+        # Комментарий не меняет число постов и не сбрасывает его.
+        Comment.objects.create(
+            post=Post.objects.first(), author=self.user, text='Коммент'
+        )
+        cached = self.guest_client.get(url)
+        self.assertEqual(cached.context['page_obj'].paginator.count, 95)
+        Post.objects.create(author=self.user, text='Еще один')
+        fresh = self.guest_client.get(url)
+        self.assertEqual(fresh.context['page_obj'].paginator.count, 101)
+
+    def test_profile_count_comes_from_stats(self):
+        """Профиль берет число постов из счетчика автора, без COUNT(*)."""
+        url = reverse('posts:profile', args=[self.user.username])
+        Post.objects.bulk_create([Post(author=self.user, text='Мимо')])
+        response = self.guest_client.get(url)
+        self.assertEqual(response.context['page_obj'].paginator.count, 95)
+
+
+class PostCommentsPaginationTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='commenter')
+        cls.post = Post.objects.create(author=cls.user, text='Вирусный пост')
+        Comment.objects.bulk_create([
+            Comment(post=cls.post, author=cls.user, text=f'Коммент {i}')
+            for i in range(45)
+        ])
+
+    def setUp(self):
+        cache.clear()
+        self.guest_client = Client()
+
+    def test_detail_renders_first_page_only(self):
+        """На странице поста только первая порция и кнопка догрузки."""
+        response = self.guest_client.get(
+            reverse('posts:post_detail', args=[self.post.pk])
+        )
+        comments = response.context['comments']
+        self.assertEqual(len(comments), 20)
+        self.assertEqual(
+            comments[0], Comment.objects.order_by('-created', '-id').first()
+        )
+        self.assertContains(response, 'js-more-comments')
+
+    def test_fragments_cover_all_comments(self):
+        """Фрагменты по курсору отдают все комментарии без повторов."""
+        expected = list(
+            Comment.objects.order_by('-created', '-id').values_list(
+                'id', flat=True)
+        )
+        response = self.guest_client.get(
+            reverse('posts:post_detail', args=[self.post.pk])
+        )
+        comments = response.context['comments']
+        seen = [comment.id for comment in comments]
+        while comments.has_next():
+            response = self.guest_client.get(
+                reverse('posts:post_comments', args=[self.post.pk]),
+                {'cursor': comments.next_cursor},
+            )
+            self.assertTemplateUsed(
+                response, 'posts/includes/comment_page.html'
+            )
+            self.assertTemplateNotUsed(response, 'base.html')
+            comments = response.context['comments']
+            seen.extend(comment.id for comment in comments)
+        self.assertEqual(seen, expected)
+        self.assertNotContains(response, 'js-more-comments')
+
+    def test_no_js_fallback(self):
+        """Без скриптов следующая порция открывается на странице поста."""
+        first = self.guest_client.get(
+            reverse('posts:post_detail', args=[self.post.pk])
+        ).context['comments']
+        second = self.guest_client.get(
+            reverse('posts:post_detail', args=[self.post.pk]),
+            {'comments': first.next_cursor},
+        ).context['comments']
+        self.assertEqual(second[0].pk, first[-1].pk - 1)
+
+    def test_missing_post(self):
+        response = self.guest_client.get(
+            reverse('posts:post_comments', args=[10 ** 6])
+        )
+        self.assertEqual(response.status_code, 404)
@@ -0,0 +1,73 @@
+import logging
+from concurrent.futures import ThreadPoolExecutor
+
+from django.db import connection, transaction
+from sorl.thumbnail import get_thumbnail
+
+from core.metrics import timed
+
+from .listing_cache import bump_generation
+from .models import Post
+from .post_settings import THUMBNAIL_WORKERS
+
+logger = logging.getLogger(__name__)
+
+GEOMETRY = '960x339'
+OPTIONS = {'crop': 'center', 'upscale': True}
+
+_executor = None
+
+
+def render(name):
+    """Строит миниатюру файла хранилища и возвращает её имя."""
+    with timed('thumbnail'):
+        return get_thumbnail(name, GEOMETRY, **OPTIONS).name
+
+
+def make_thumbnail(post_id):
+    """
+    Генерирует миниатюру картинки поста и сохраняет её имя.
+
+    Если картинку успели заменить, результат отбрасывается: новая
+    картинка поставит в очередь свою миниатюру.
+    """
+    post = Post.objects.filter(pk=post_id).only('image').first()
+    if post is None or not post.image:
+        return False
+    name = render(post.image.name)
+    return bool(
+        Post.objects.filter(pk=post_id, image=post.image.name).update(
+            thumbnail=name
+        )
+    )
+
+
+def _run(post_id):
+    try:
+        if make_thumbnail(post_id):
+            bump_generation()
+    except Exception:
+        logger.exception('Не удалось построить миниатюру поста %s', post_id)
+    finally:
+        connection.close()
+
+
+def _get_executor():
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(
+            max_workers=THUMBNAIL_WORKERS, thread_name_prefix='thumbnails'
+        )
+    return _executor
+
+
+def schedule(post_id):
+    """
+    Ставит генерацию миниатюры в фоновый пул после коммита.
+    При THUMBNAIL_WORKERS = 0 миниатюра строится сразу.
+    """
+    if not THUMBNAIL_WORKERS:
+        if make_thumbnail(post_id):
+            bump_generation()
+        return
+    transaction.on_commit(lambda: _get_executor().submit(_run, post_id))
@@ -0,0 +1,147 @@
+from django.db import transaction
+from django.db.models import Count, F
+
+from core.stampede import fetch
+
+from .listing_cache import bump_generation, generation
+from .models import AuthorStats, Follow, Post, Timeline
+from .post_settings import TIMELINE_FANOUT_LIMIT, TIMELINE_SIZE
+
+PULL_AUTHORS_KEY = 'posts:timeline:pull_authors'
+PULL_AUTHORS_VERSION_KEY = 'posts:timeline:pull_authors:version'
+PULL_AUTHORS_TIMEOUT = 60 * 10
+# Сколько лент обрезать в одной транзакции trim_all.
+TRIM_BATCH_SIZE = 100
+FEED_ORDERING = ('-feed_date', '-feed_post')
+
+
+def pull_authors():
+    """
+    Множество авторов, чьи посты не раскладываются по лентам, а
+    подмешиваются при чтении (слишком много подписчиков). Берется из
+    счетчиков подписчиков; пересчитывает его один запрос (core.stampede).
+    """
+    return fetch(
+        PULL_AUTHORS_KEY,
+        lambda: set(
+            AuthorStats.objects.filter(
+                followers_count__gt=TIMELINE_FANOUT_LIMIT
+            ).values_list('user_id', flat=True)
+        ),
+        PULL_AUTHORS_TIMEOUT, generation(PULL_AUTHORS_VERSION_KEY),
+    )
+
+
+def _mark_pull_author(author_id):
+    if author_id not in pull_authors():
+        bump_generation(PULL_AUTHORS_VERSION_KEY)
+
+
+def trim(user_id):
+    """Оставляет в ленте читателя не больше TIMELINE_SIZE записей."""
+    cutoff = Timeline.objects.filter(user_id=user_id).values_list(
+        'pub_date', 'post_id'
+    ).order_by('-pub_date', '-post_id')[TIMELINE_SIZE:TIMELINE_SIZE + 1]
+    cutoff = list(cutoff)
+    if cutoff:
+        pub_date, post_id = cutoff[0]
+        Timeline.objects.filter(user_id=user_id).exclude(
+            pub_date__gt=pub_date
+        ).exclude(
+            pub_date=pub_date, post_id__gt=post_id
+        ).delete()
+
+
+def trim_all(batch_size=TRIM_BATCH_SIZE):
+    """
+    Обрезает все ленты длиннее TIMELINE_SIZE, по batch_size лент в
+    транзакции. Возвращает число обрезанных лент.
+    """
+    user_ids = list(
+        Timeline.objects.values('user_id').annotate(
+            entries=Count('id')
+        ).filter(
+            entries__gt=TIMELINE_SIZE
+        ).order_by().values_list('user_id', flat=True)
+    )
+    for start in range(0, len(user_ids), batch_size):
+        with transaction.atomic():
+            for user_id in user_ids[start:start + batch_size]:
+                trim(user_id)
+    return len(user_ids)
+
+
+def fan_out(post):
+    """
+    Раскладывает новый пост по лентам подписчиков автора.
+
+    Ленты здесь не обрезаются, чтобы запись поста стоила постоянное
+    число запросов независимо от числа подписчиков: их периодически
+    обрезает команда trim_timelines.
+    """
+    followers = list(
+        Follow.objects.filter(author_id=post.author_id).values_list(
+            'user_id', flat=True
+        ).distinct()[:TIMELINE_FANOUT_LIMIT + 1]
+    )
+    if len(followers) > TIMELINE_FANOUT_LIMIT:
+        _mark_pull_author(post.author_id)
+        return
+    Timeline.objects.bulk_create(
+        [
+            Timeline(user_id=user_id, post=post, pub_date=post.pub_date)
+            for user_id in followers
+        ],
+        ignore_conflicts=True,
+    )
+
+
+def backfill(user_id, author_id):
+    """Добавляет в ленту последние посты автора после подписки."""
+    if author_id in pull_authors():
+        return
+    posts = Post.objects.filter(author_id=author_id).order_by(
+        '-pub_date', '-id'
+    ).values_list('id', 'pub_date')[:TIMELINE_SIZE]
+    Timeline.objects.bulk_create(
+        [
+            Timeline(user_id=user_id, post_id=post_id, pub_date=pub_date)
+            for post_id, pub_date in posts
+        ],
+        ignore_conflicts=True,
+    )
+    trim(user_id)
+
+
+def prune(user_id, author_id):
+    """Убирает из ленты посты автора после отписки."""
+    Timeline.objects.filter(
+        user_id=user_id, post__author_id=author_id
+    ).delete()
+
+
+def feed(user):
+    """
+    Посты ленты подписок: материализованная часть плюс pull-авторы.
+
+    Лента сортируется по FEED_ORDERING: без pull-авторов это порядок
+    индекса ленты (user, pub_date, post), и сортировка не нужна.
+    Только читает: ленты обрезаются при записи и командой trim_timelines.
+    """
+    pulled = list(
+        Follow.objects.filter(
+            user=user, author_id__in=pull_authors()
+        ).values_list('author_id', flat=True)
+    )
+    if pulled:
+        materialized = Timeline.objects.filter(user=user).values('post_id')
+        posts = (
+            Post.objects.filter(id__in=materialized)
+            | Post.objects.filter(author_id__in=pulled)
+        ).annotate(feed_date=F('pub_date'), feed_post=F('id'))
+    else:
+        posts = Post.objects.filter(timeline__user=user).annotate(
+            feed_date=F('timeline__pub_date'),
+            feed_post=F('timeline__post_id'),
+        )
+    return posts.select_related('author', 'group').order_by(*FEED_ORDERING)
@@ -0,0 +1,97 @@
+"""
+Рейтинг «В тренде».
+
+Считать его на каждый запрос по Comment и Follow слишком дорого,
+поэтому compute() запускается периодически (команда update_trending).
+Кандидаты — посты за последние TRENDING_WINDOW часов. Их комментарии
+база сворачивает в число за каждый час, а вес часа затухает вдвое
+каждые TRENDING_HALF_LIFE часов — это скорость обсуждения. Охват —
+логарифм числа подписчиков автора из AuthorStats. Сумма затухает с
+возрастом самого поста. Лучшие TRENDING_SIZE постов переписываются в
+TrendingPost одной транзакцией, и лента листает готовую маленькую
+таблицу. Кеш ленты сбрасывает свое поколение GENERATION_KEY, и только
+если порядок постов изменился: общий кеш лент пересчет не трогает.
+"""
+import heapq
+import math
+from collections import defaultdict
+from datetime import timedelta
+
+from django.db import transaction
+from django.db.models import Count
+from django.db.models.functions import TruncHour
+from django.utils import timezone
+
+from .listing_cache import bump_generation, generation
+from .models import Comment, Post, TrendingPost
+from .post_settings import TRENDING_HALF_LIFE, TRENDING_SIZE, TRENDING_WINDOW
+
+GENERATION_KEY = 'posts:trending:generation'
+CHUNK_SIZE = 2000
+# Вес охвата: log(1 + подписчики) против одного свежего комментария.
+REACH_WEIGHT = 0.5
+
+
+def version():
+    """Поколение ленты «В тренде»: меняется, когда меняется порядок."""
+    return generation(GENERATION_KEY)
+
+
+def decay(age, half_life):
+    """Вес события возраста age: 1 сейчас и вдвое меньше за half_life."""
+    return 0.5 ** (max(age.total_seconds(), 0) / half_life.total_seconds())
+
+
+def velocity(since, now, half_life):
+    """{id поста: сумма затухающих весов его комментариев}."""
+    hours = Comment.objects.filter(
+        created__gte=since, post__pub_date__gte=since
+    ).annotate(
+        hour=TruncHour('created')
+    ).values('post_id', 'hour').annotate(
+        comments=Count('id')
+    ).order_by().values_list('post_id', 'hour', 'comments')
+    totals = defaultdict(float)
+    for post_id, hour, comments in hours.iterator(CHUNK_SIZE):
+        # Середина часа: комментарии в нем в среднем на полчаса моложе.
+        age = now - hour - timedelta(minutes=30)
+        totals[post_id] += comments * decay(age, half_life)
+    return totals
+
+
+def scores(now=None):
+    """[(рейтинг, id поста)] кандидатов в порядке убывания рейтинга."""
+    now = now or timezone.now()
+    since = now - timedelta(hours=TRENDING_WINDOW)
+    half_life = timedelta(hours=TRENDING_HALF_LIFE)
+    comments = velocity(since, now, half_life)
+    posts = Post.objects.filter(pub_date__gte=since).order_by().values_list(
+        'pk', 'pub_date', 'author__stats__followers_count'
+    )
+    candidates = (
+        (
+            (
+                comments.get(pk, 0.0)
+                + REACH_WEIGHT * math.log1p(followers or 0)
+            ) * decay(now - pub_date, half_life),
+            pk,
+        )
+        for pk, pub_date, followers in posts.iterator(CHUNK_SIZE)
+    )
+    return heapq.nlargest(TRENDING_SIZE, candidates)
+
+
+def compute(now=None):
+    """Пересчитывает таблицу TrendingPost; возвращает число мест."""
+    now = now or timezone.now()
+    ranked = [
+        TrendingPost(rank=rank, post_id=pk, score=score, computed=now)
+        for rank, (score, pk) in enumerate(scores(now), start=1)
+    ]
+    with transaction.atomic():
+        previous = list(TrendingPost.objects.values_list('post_id', flat=True))
+        TrendingPost.objects.all().delete()
+        TrendingPost.objects.bulk_create(ranked)
+    if previous != [entry.post_id for entry in ranked]:
+        bump_generation(GENERATION_KEY)
+    return len(ranked)
@@ -1,6 +1,6 @@
 from django.urls import path
 
-from . import views
+from . import api, feeds, views
 
 app_name = 'posts'
 urlpatterns = [
@@ -8,10 +8,39 @@ urlpatterns = [
     path('create/', views.post_create, name='post_create'),
     path('profile/<str:username>/', views.profile, name='profile'),
     path('posts/<int:post_id>/', views.post_detail, name='post_detail'),
+    path(
+        'posts/<int:post_id>/comments/',
+        views.post_comments,
+        name='post_comments'
+    ),
     path('posts/<int:post_id>/edit/', views.post_edit, name='post_edit'),
     path('posts/<int:post_id>/comment', views.add_comment, name='add_comment'),
     path('group/<slug:slug>/', views.group_posts, name='group_posts'),
     path('follow/', views.follow_index, name='follow_index'),
+    path('trending/', views.trending, name='trending'),
+    path('search/', views.search_posts, name='search'),
+    path('export/', views.export_data, name='export'),
+    path('feeds/rss/', feeds.index_rss, name='index_rss'),
+    path('feeds/atom/', feeds.index_atom, name='index_atom'),
+    path('group/<slug:slug>/rss/', feeds.group_rss, name='group_rss'),
+    path('group/<slug:slug>/atom/', feeds.group_atom, name='group_atom'),
+    path(
+        'profile/<str:username>/rss/', feeds.author_rss, name='author_rss'
+    ),
+    path(
+        'profile/<str:username>/atom/',
+        feeds.author_atom,
+        name='author_atom'
+    ),
+    path('api/posts/', api.posts, name='api_posts'),
+    path('api/posts/<int:post_id>/', api.post, name='api_post'),
+    path(
+        'api/posts/<int:post_id>/comments/',
+        api.comments,
+        name='api_comments'
+    ),
+    path('api/groups/', api.groups, name='api_groups'),
+    path('api/follow/', api.follow, name='api_follow'),
     path(
         'profile/<str:username>/follow/',
         views.profile_follow,
@@ -1,51 +1,102 @@
+from urllib.parse import urlencode
+
 from django.contrib.auth.decorators import login_required
-from django.core.paginator import Paginator
+from django.http import Http404
 from django.shortcuts import get_object_or_404, redirect, render
 
+from core.sqlite import retry_on_lock
+
+from . import conditional, counters, export, search, timeline
+from .conditional import conditional_page
 from .forms import PostForm, CommentForm
-from .models import Group, Post, User, Follow
-from .post_settings import PAGINATOR_SET
+from .listing_cache import cached_count, listing_cache, posts_generation
+from .models import Comment, Follow, Group, Post, TrendingPost, User
+from .page_cache import anonymous_page
+from .paginators import CursorPaginator, WindowedPaginator
+from .post_settings import (COMMENTS_PAGE_SIZE, PAGINATION_MODE,
+                            PAGINATOR_SET)
+from .trending import version as trending_version
+
+COMMENTS_ORDERING = ('-created', '-id')
+
 
+def pagination(request, to_pagination, ordering=('-pub_date', '-id'),
+               count=None):
+    """
+    Вспомогательная функция для паджинации.
 
-def pagination(request, to_pagination):
-    """Вспомогательная функция для паджинации."""
-    paginator = Paginator(to_pagination, PAGINATOR_SET)
+    В режиме 'cursor' (или при наличии ?cursor=) страницы выбираются
+    по ключу ordering (по умолчанию (pub_date, id)) без OFFSET и COUNT(*).
+    count — известное число постов или функция для него вместо COUNT(*).
+    """
+    cursor = request.GET.get('cursor')
+    if PAGINATION_MODE == 'cursor' or cursor is not None:
+        paginator = CursorPaginator(to_pagination, PAGINATOR_SET, ordering)
+        return paginator.get_page(cursor)
+    paginator = WindowedPaginator(to_pagination, PAGINATOR_SET, count)
     page_number = request.GET.get('page')
     page_obj = paginator.get_page(page_number)
     return page_obj
 
 
+def comments_page(post_id, cursor=None):
+    """Страница комментариев поста по курсору на (created, id)."""
+    comments = Comment.objects.filter(post_id=post_id).select_related(
+        'author'
+    )
+    paginator = CursorPaginator(
+        comments, COMMENTS_PAGE_SIZE, COMMENTS_ORDERING
+    )
+    return paginator.get_page(cursor)
+
+
+@conditional_page(conditional.index_latest)
+@anonymous_page
 def index(request):
     """View функция для главной страницы."""
-    posts = Post.objects.all()
-    page_obj = pagination(request, posts)
+    posts = Post.objects.select_related('author', 'group')
+    page_obj = pagination(
+        request, posts, count=lambda: cached_count(Post.objects, 'index')
+    )
     context = {
         'page_obj': page_obj,
         'index': True,
+        'listing_cache': listing_cache('index', page_obj),
     }
     return render(request, 'posts/index.html', context)
 
 
+@conditional_page(conditional.group_latest)
+@anonymous_page
 def group_posts(request, slug):
     """View функция для страницы сообщества."""
     group = get_object_or_404(Group, slug=slug)
-    posts = group.posts.all()
-    page_obj = pagination(request, posts)
+    posts = group.posts.select_related('author')
+    page_obj = pagination(
+        request, posts,
+        count=lambda: cached_count(group.posts, 'group', group.pk),
+    )
     template = 'posts/group_list.html'
     context = {
         'group': group,
         'posts': posts,
         'page_obj': page_obj,
+        'listing_cache': listing_cache('group', page_obj, group.pk),
     }
     return render(request, template, context)
 
 
+@conditional_page(conditional.profile_latest)
+@anonymous_page
 def profile(request, username):
     """View функция для страницы профиля."""
-    author = get_object_or_404(User, username=username)
-    posts = author.posts.all()
-    count = posts.count()
-    page_obj = pagination(request, posts)
+    author = get_object_or_404(
+        User.objects.select_related('stats'), username=username
+    )
+    stats = counters.user_stats(author)
+    posts = author.posts.select_related('group')
+    # Счетчик уже загружен вместе с автором: COUNT(*) не нужен.
+    page_obj = pagination(request, posts, count=stats.posts_count)
     following = False
     if request.user.is_authenticated:
         following = Follow.objects.filter(
@@ -55,17 +106,57 @@ def profile(request, username):
         ).exists()
     context = {
         'page_obj': page_obj,
-        'count': count,
+        'count': stats.posts_count,
+        'stats': stats,
         'author': author,
         'following': following,
+        'listing_cache': listing_cache('profile', page_obj, author.pk),
     }
     return render(request, 'posts/profile.html', context)
 
 
+@anonymous_page(extra_version=trending_version)
+def trending(request):
+    """View функция для ленты «В тренде»."""
+    entries = TrendingPost.objects.select_related(
+        'post__author', 'post__group'
+    )
+    page_obj = pagination(
+        request, entries, ordering=('rank',),
+        count=lambda: cached_count(
+            TrendingPost.objects, 'trending',
+            version=(posts_generation(), trending_version()),
+        ),
+    )
+    context = {'page_obj': page_obj, 'trending': True}
+    return render(request, 'posts/trending.html', context)
+
+
+def search_posts(request):
+    """View функция для поиска по постам."""
+    query = request.GET.get('q', '').strip()
+    page_obj = None
+    if query:
+        backend = search.get_backend()
+        results = backend.search(query).select_related('author', 'group')
+        paginator = CursorPaginator(results, PAGINATOR_SET, backend.ordering)
+        page_obj = paginator.get_page(request.GET.get('cursor'))
+    context = {
+        'query': query,
+        'page_obj': page_obj,
+        'page_query': urlencode({'q': query}) + '&' if query else '',
+    }
+    return render(request, 'posts/search.html', context)
+
+
+@conditional_page(conditional.post_latest)
+@anonymous_page
 def post_detail(request, post_id):
     """View функция для страницы поста."""
-    post = get_object_or_404(Post, id=post_id)
-    comments = post.comments.all()
+    post = get_object_or_404(
+        Post.objects.select_related('author__stats', 'group'), id=post_id
+    )
+    comments = comments_page(post_id, request.GET.get('comments'))
     form = CommentForm(request.POST or None)
     if form.is_valid():
         comment = form.save(commit=False)
@@ -73,18 +164,32 @@ def post_detail(request, post_id):
         comment.post = post
         comment.save()
     author = post.author
-    count = author.posts.all().count()
+    count = counters.user_stats(author).posts_count
     context = {
         'count': count,
         'author': author,
         'post': post,
+        'post_id': post_id,
         'comments': comments,
         'form': form,
     }
     return render(request, 'posts/post_detail.html', context)
 
 
+@conditional_page(conditional.post_latest)
+@anonymous_page
+def post_comments(request, post_id):
+    """Фрагмент со следующей страницей комментариев поста."""
+    # Дата поста уже закеширована валидатором: проверка бесплатна.
+    if conditional.post_latest(post_id) is None:
+        raise Http404
+    comments = comments_page(post_id, request.GET.get('cursor'))
+    context = {'post_id': post_id, 'comments': comments}
+    return render(request, 'posts/includes/comment_page.html', context)
+
+
 @login_required
+@retry_on_lock
 def post_create(request):
     """View функция для создания нового поста."""
     form = PostForm(
@@ -100,6 +205,7 @@ def post_create(request):
     return render(request, 'posts/create_post.html', {'form': form})
 
 
+@retry_on_lock
 def post_edit(request, post_id):
     """View функция для редактирования поста."""
     post = get_object_or_404(Post, id=post_id)
@@ -120,6 +226,7 @@ def post_edit(request, post_id):
 
 
 @login_required
+@retry_on_lock
 def add_comment(request, post_id):
     """View функция для добавления комментария."""
     post = get_object_or_404(Post, id=post_id)
@@ -132,27 +239,34 @@ def add_comment(request, post_id):
     return redirect('posts:post_detail', post_id=post_id)
 
 
+@login_required
+def export_data(request):
+    """View функция для выгрузки своих данных (JSONL или ZIP)."""
+    if request.GET.get('format') == 'zip':
+        return export.zip_response(request, request.user)
+    return export.jsonl_response(request.user)
+
+
 @login_required
 def follow_index(request):
-    user = get_object_or_404(User, username=request.user.username)
-    follows = Follow.objects.filter(user=user).values_list('author_id')
-    posts = Post.objects.filter(author_id__in=follows)
-    page_obj = pagination(request, posts)
+    posts = timeline.feed(request.user)
+    page_obj = pagination(request, posts, timeline.FEED_ORDERING)
     context = {'page_obj': page_obj, 'follow': True}
     return render(request, 'posts/follow.html', context)
 
 
 @login_required
+@retry_on_lock(safe_methods=True)
 def profile_follow(request, username):
     if request.user.username == username:
         return redirect('posts:profile', username=username)
     author = get_object_or_404(User, username=username)
-    follow = Follow(user=request.user, author=author)
-    follow.save()
+    Follow.objects.get_or_create(user=request.user, author=author)
     return redirect('posts:profile', username=username)
 
 
 @login_required
+@retry_on_lock(safe_methods=True)
 def profile_unfollow(request, username):
     author = get_object_or_404(User, username=username)
     follow = get_object_or_404(
@@ -37,6 +37,46 @@ EMAIL_BACKEND = 'django.core.mail.backends.filebased.EmailBackend'
 EMAIL_FILE_PATH = os.path.join(BASE_DIR, 'sent_emails')
 
 POSTS_PAGINATOR_SET = 10
+# Комментариев на странице поста и в каждой догружаемой порции
+POSTS_COMMENTS_PAGE_SIZE = 20
+# Сколько соседних номеров страниц показывать по обе стороны от текущей
+POSTS_PAGINATOR_WINDOW = 2
+# 'page' — номера страниц, 'cursor' — keyset-паджинация по (pub_date, id)
+POSTS_PAGINATION_MODE = 'page'
+# Лента подписок: сколько записей хранить на читателя (лишние удаляет
+# команда trim_timelines) и с какого числа подписчиков посты автора не
+# раскладываются по лентам
+POSTS_TIMELINE_SIZE = 800
+POSTS_TIMELINE_FANOUT_LIMIT = 10000
+# Фрагменты лент сбрасываются сигналами, поэтому TTL может быть большим
+POSTS_LISTING_CACHE_TIMEOUT = 60 * 60 * 4
+# Страницы анонимов кешируются целиком (posts.page_cache); 0 — выключить
+POSTS_PAGE_CACHE_TIMEOUT = 60 * 10
+# Потоки фоновой генерации миниатюр; 0 — строить сразу при сохранении
+POSTS_THUMBNAIL_WORKERS = 2
+# Загруженные картинки: наибольшая сторона, ширины копий WebP/JPEG и
+# процессы перекодирования; 0 — перекодировать сразу при сохранении
+POSTS_IMAGE_MAX_SIDE = 2048
+POSTS_IMAGE_WIDTHS = (480, 960, 1600)
+POSTS_IMAGE_WORKERS = 2
+# Сколько секунд файл без ссылок ждет удаления командой sweep_blobs
+POSTS_BLOB_GRACE = 60 * 60 * 24
+# Рейтинг «В тренде» (команда update_trending): посты за сколько часов,
+# полупериод затухания в часах и сколько мест хранить
+POSTS_TRENDING_WINDOW = 72
+POSTS_TRENDING_HALF_LIFE = 12
+POSTS_TRENDING_SIZE = 200
+# Сколько последних постов отдают RSS/Atom ленты
+POSTS_FEED_SIZE = 20
+# Полнотекстовый поиск: FTS5 в SQLite или LIKE-запасной вариант
+POSTS_SEARCH_BACKEND = 'posts.search.SQLiteFTSBackend'
+# Готовые ZIP-выгрузки пользователей: каталог и срок хранения (для
+# докачки по Range)
+POSTS_EXPORT_DIR = os.path.join(BASE_DIR, 'exports')
+POSTS_EXPORT_MAX_AGE = 60 * 60 * 24
+# JSON API: размер страницы по умолчанию и наибольший limit
+POSTS_API_PAGE_SIZE = 20
+POSTS_API_MAX_PAGE_SIZE = 100
 
 INSTALLED_APPS = [
     'core.apps.CoreConfig',
@@ -55,7 +95,11 @@ INSTALLED_APPS = [
 STATICFILES_DIRS = [os.path.join(BASE_DIR, 'static')]
 
 MIDDLEWARE = [
+    'core.metrics.MetricsMiddleware',
+    'core.query_budget.QueryBudgetMiddleware',
+    'core.db_router.ReplicaPinMiddleware',
     'django.middleware.security.SecurityMiddleware',
+    'core.staticfiles.StaticFilesMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -64,6 +108,43 @@ MIDDLEWARE = [
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
 
+# Максимум SQL-запросов на один ответ view, включая сессию и пользователя.
+# Проверяется тестами и отладочной QueryBudgetMiddleware (при DEBUG=True).
+QUERY_BUDGETS = {
+    'posts:index': 5,
+    'posts:group_posts': 6,
+    'posts:profile': 6,
+    'posts:post_detail': 5,
+    'posts:post_comments': 4,
+    'posts:post_create': 8,
+    'posts:post_edit': 5,
+    'posts:add_comment': 5,
+    'posts:follow_index': 5,
+    'posts:trending': 4,
+    'posts:profile_follow': 10,
+    'posts:profile_unfollow': 8,
+    'posts:search': 3,
+    'posts:export': 6,
+    'posts:index_rss': 2,
+    'posts:index_atom': 2,
+    'posts:group_rss': 3,
+    'posts:group_atom': 3,
+    'posts:author_rss': 3,
+    'posts:author_atom': 3,
+    'posts:api_posts': 1,
+    'posts:api_post': 1,
+    'posts:api_comments': 2,
+    'posts:api_groups': 1,
+    'posts:api_follow': 4,
+}
+QUERY_BUDGET_STRICT = False
+
+# Доля запросов, для которых MetricsMiddleware снимает время SQL, шаблонов
+# и миниатюр (гистограммы на /metrics, заголовок Server-Timing).
+# 0 — middleware отключена и ничего не стоит.
+METRICS_SAMPLE_RATE = 0.1
+METRICS_ALLOWED_IPS = ['127.0.0.1']
+
 ROOT_URLCONF = 'yatube.urls'
 TEMPLATES_DIR = os.path.join(BASE_DIR, 'templates')
 TEMPLATES = [
@@ -93,14 +174,41 @@ DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': os.path.join(BASE_DIR, 'db.sqlite3'),
-    }
+    },
+    # Реплика для локальной проверки: второй файл SQLite, который
+    # обновляет команда sync_replicas. В тестах смотрит в default.
+    # 'replica': {
+    #     'ENGINE': 'django.db.backends.sqlite3',
+    #     'NAME': os.path.join(BASE_DIR, 'db.replica.sqlite3'),
+    #     'TEST': {'MIRROR': 'default'},
+    # },
 }
+DATABASE_ROUTERS = ['core.db_router.PrimaryReplicaRouter']
+# Алиасы реплик для чтения; пусто — все запросы идут в default
+DATABASE_REPLICAS = []
+# Сколько секунд после записи клиент читает основную базу
+DATABASE_PIN_SECONDS = 15
+# SQLite: PRAGMA для каждого нового соединения (боевые значения —
+# в settings_production), транзакции BEGIN IMMEDIATE для view записи и
+# повторы записи при «database is locked»
+SQLITE_PRAGMAS = {}
+SQLITE_WRITE_TRANSACTIONS = True
+SQLITE_WRITE_RETRIES = 3
+SQLITE_RETRY_DELAY = 0.05
 
 CACHES = {
     'default': {
         'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
     }
 }
+# Защита от лавины пересчетов (core.stampede): сколько секунд после
+# срока хранить запись для отдачи устаревшей, срок блокировки пересчета,
+# сколько ждать чужого пересчета без устаревшей записи и коэффициент
+# раннего пересчета (больше — раньше)
+CACHE_STALE_TTL = 60 * 60
+CACHE_LOCK_TIMEOUT = 30
+CACHE_LOCK_WAIT = 2
+CACHE_EARLY_BETA = 1.0
 # Password validation
 # https://docs.djangoproject.com/en/2.2/ref/settings/#auth-password-validators
 
@@ -138,6 +246,10 @@ USE_TZ = True
 # https://docs.djangoproject.com/en/2.2/howto/static-files/
 
 STATIC_URL = '/static/'
+# Сюда collectstatic собирает статику; при DEBUG=False ее отдает
+# core.staticfiles.StaticFilesMiddleware (хеш в именах и сжатые копии
+# включает STATICFILES_STORAGE из settings_production).
+STATIC_ROOT = os.path.join(BASE_DIR, 'staticfiles')
 
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
\ No newline at end of file
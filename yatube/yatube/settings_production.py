@@ -0,0 +1,39 @@
+"""
+Профиль для небольших инстансов на SQLite:
+DJANGO_SETTINGS_MODULE=yatube.settings_production.
+
+WAL пускает читателей параллельно с писателем, synchronous=NORMAL в
+WAL не теряет целостность при сбое процесса, соединения живут между
+запросами (CONN_MAX_AGE), а писатели ждут блокировку до timeout секунд.
+
+Статика собирается collectstatic с хешем в именах и копиями .gz/.br и
+кешируется браузером навсегда (core.staticfiles).
+"""
+from .settings import *  # noqa: F401,F403
+from .settings import DATABASES
+
+DEBUG = False
+
+# Копия: модуль импортирует и sqlite_benchmark, базовые настройки
+# процесса меняться не должны.
+DATABASES = {
+    **DATABASES,
+    'default': {
+        **DATABASES['default'],
+        'CONN_MAX_AGE': 600,
+        'OPTIONS': {'timeout': 5},
+    },
+}
+
+SQLITE_PRAGMAS = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    # Отрицательное значение — размер в КиБ: 64 МиБ страничного кеша.
+    'cache_size': -64000,
+    'mmap_size': 256 * 1024 * 1024,
+    'temp_store': 'MEMORY',
+    'busy_timeout': 5000,
+}
+SQLITE_WRITE_RETRIES = 5
+
+STATICFILES_STORAGE = 'core.staticfiles.CompressedManifestStaticFilesStorage'
@@ -3,6 +3,8 @@ from django.urls import include, path
 from django.conf import settings
 from django.conf.urls.static import static
 
+from core.views import metrics
+
 handler404 = 'core.views.page_not_found'
 handler403 = 'core.views.permission_denied_view'
 handler500 = 'core.views.server_error'
@@ -14,6 +16,7 @@ urlpatterns = [
     path('', include('posts.urls', namespace='posts')),
     path('group/<slug:slug>/', include('posts.urls', namespace='posts')),
     path('about/', include('about.urls', namespace='about')),
+    path('metrics', metrics, name='metrics'),
 ]
 
 if settings.DEBUG: